@@ -0,0 +1,314 @@
+"""
+Analitik ABC & perputaran stok per barang dan per kategori.
+
+Alur job harian (`compute_abc_analysis`):
+1. `DailyItemMovement` (total masuk/keluar per barang per hari) diperbarui
+   inkremental: hanya pasangan (barang, hari) dari transaksi yang dibuat sejak
+   run sebelumnya dihitung ulang dengan query GROUP BY. Transaksi yang diedit
+   (termasuk perubahan status) menghitung ulang seluruh hari barangnya, juga
+   barang lama jika barangnya diganti (dari AuditLog).
+2. Baris harian dalam window terpanjang dimuat sebagai array NumPy. Untuk setiap
+   window: pemakaian, penerimaan, rata-rata stok (direkonstruksi mundur dari
+   stok saat ini), ranking ABC, perputaran, dan days of cover dihitung vektor
+   untuk seluruh katalog sekaligus.
+3. Hasil ditulis ke ItemAnalytics (upsert), lalu diringkas per kategori dengan
+   satu query agregat ke CategoryAnalytics.
+
+Katalog tidak menyimpan harga barang, sehingga nilai pemakaian = jumlah unit keluar.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+from .models import (
+    ArchivedIncomingTransaction, ArchivedOutgoingTransaction, AuditLog, CategoryAnalytics,
+    DailyItemMovement, IncomingTransaction, ItemAnalytics, Items, OutgoingTransaction,
+)
+
+# (model, model arsip, status yang dihitung, kolom DailyItemMovement)
+MOVEMENT_SOURCES = [
+    (IncomingTransaction, ArchivedIncomingTransaction, 'received', 'quantity_in'),
+    (OutgoingTransaction, ArchivedOutgoingTransaction, 'released', 'quantity_out'),
+]
+# Transaksi yang di-commit belakangan bisa punya updated_at sedikit lebih lama dari awal run sebelumnya
+SINCE_OVERLAP = timedelta(minutes=5)
+
+
+def analysis_windows():
+    return sorted(getattr(settings, 'INVENTORY_ANALYTICS_WINDOWS', [30, 90, 365]))
+
+
+def abc_thresholds():
+    """Batas porsi kumulatif kelas A dan B"""
+    return getattr(settings, 'INVENTORY_ABC_THRESHOLDS', (0.8, 0.95))
+
+
+def _movement_rows(start, end, item_ids=None, days=None):
+    """{(item_id, hari): {kolom: jumlah}} dari transaksi aktif + arsip (query GROUP BY)"""
+    totals = {}
+    for model, archive_model, status, column in MOVEMENT_SOURCES:
+        for source in (model, archive_model):
+            queryset = source.objects.filter(
+                status=status, transaction_date__gte=start, transaction_date__lte=end,
+            )
+            if item_ids is not None:
+                queryset = queryset.filter(item_id__in=item_ids)
+            if days is not None:
+                queryset = queryset.filter(transaction_date__in=days)
+            rows = queryset.values('item_id', 'transaction_date').annotate(
+                total=Sum('quantity')
+            ).values_list('item_id', 'transaction_date', 'total').order_by()
+            for item_id, day, total in rows:
+                key = (item_id, day)
+                totals.setdefault(key, {'quantity_in': 0, 'quantity_out': 0})[column] += total
+    return totals
+
+
+def _write_movements(totals, existing):
+    """Ganti baris harian `existing` (queryset) dengan `totals`"""
+    existing.delete()
+    DailyItemMovement.objects.bulk_create([
+        DailyItemMovement(item_id=item_id, day=day, **quantities)
+        for (item_id, day), quantities in totals.items()
+        if quantities['quantity_in'] or quantities['quantity_out']
+    ], batch_size=1000)
+
+
+def _previous_items(model, pks, since):
+    """Barang lama transaksi `pks` yang barangnya diganti sejak `since` (dari AuditLog)"""
+    if not pks:
+        return set()
+    changes = AuditLog.objects.filter(
+        object_type=model._meta.model_name, object_id__in=pks, action='update',
+        created_at__gte=since, changes__has_key='item',
+    ).values_list('changes', flat=True)
+    return {entry['item'][0] for entry in changes if entry['item'][0] is not None}
+
+
+def refresh_daily_movements(start, end, since=None):
+    """
+    Perbarui DailyItemMovement untuk hari `start`..`end`.
+    `since` None = bangun ulang penuh. Return jumlah pasangan (barang, hari) yang dihitung ulang.
+    """
+    with transaction.atomic():
+        DailyItemMovement.objects.filter(day__lt=start).delete()
+        if since is None:
+            totals = _movement_rows(start, end)
+            _write_movements(totals, DailyItemMovement.objects.all())
+            return len(totals)
+
+        dirty_pairs = set()
+        edited_items = set()
+        for model, _, _, _ in MOVEMENT_SOURCES:
+            changed = model.objects.filter(updated_at__gte=since).values_list(
+                'pk', 'item_id', 'transaction_date', 'version'
+            ).order_by()
+            edited = []
+            for pk, item_id, day, version in changed:
+                if version > 1:
+                    # Tanggal lama tidak diketahui: hitung ulang semua hari barang ini
+                    edited.append(pk)
+                    edited_items.add(item_id)
+                elif start <= day <= end:
+                    dirty_pairs.add((item_id, day))
+            edited_items |= _previous_items(model, edited, since)
+
+        if edited_items:
+            _write_movements(
+                _movement_rows(start, end, item_ids=edited_items),
+                DailyItemMovement.objects.filter(item_id__in=edited_items),
+            )
+        dirty_pairs = {(item_id, day) for item_id, day in dirty_pairs if item_id not in edited_items}
+        if dirty_pairs:
+            item_ids = {item_id for item_id, _ in dirty_pairs}
+            days = {day for _, day in dirty_pairs}
+            # Filter item IN & hari IN adalah superset; disaring lagi ke pasangan yang berubah
+            totals = {
+                key: value for key, value in _movement_rows(start, end, item_ids, days).items()
+                if key in dirty_pairs
+            }
+            stale = [
+                pk for pk, item_id, day in DailyItemMovement.objects.filter(
+                    item_id__in=item_ids, day__in=days
+                ).values_list('pk', 'item_id', 'day')
+                if (item_id, day) in dirty_pairs
+            ]
+            _write_movements(totals, DailyItemMovement.objects.filter(pk__in=stale))
+        return len(dirty_pairs) + len(edited_items)
+
+
+def _classify(consumption, thresholds):
+    """Kelas ABC & porsi kumulatif: urut pemakaian terbesar, kelas dari porsi kumulatif sebelum barang"""
+    total = consumption.sum()
+    classes = np.full(len(consumption), 'C', dtype='<U1')
+    share = np.zeros(len(consumption))
+    cumulative = np.zeros(len(consumption))
+    if total <= 0:
+        return classes, share, cumulative
+
+    share = consumption / total
+    order = np.argsort(-consumption, kind='stable')
+    cumulative[order] = np.cumsum(share[order])
+    before = cumulative - share
+    a_limit, b_limit = thresholds
+    classes[(before < b_limit) & (consumption > 0)] = 'B'
+    classes[(before < a_limit) & (consumption > 0)] = 'A'
+    return classes, share, cumulative
+
+
+def compute_item_analytics(windows, today=None, full=False):
+    """
+    Perbarui histori harian lalu hitung ulang ItemAnalytics & CategoryAnalytics
+    untuk semua barang aktif. Return (jumlah barang, pasangan barang-hari yang dihitung ulang).
+    """
+    today = today or timezone.localdate()
+    computed_at = timezone.now()
+    history_days = max(windows)
+    start = today - timedelta(days=history_days - 1)
+
+    last_run = None if full else ItemAnalytics.objects.aggregate(last=Max('computed_at'))['last']
+    # Histori harian belum mencakup window terpanjang: bangun ulang
+    if last_run is not None and ItemAnalytics.objects.filter(window_days=history_days).exists():
+        refreshed = refresh_daily_movements(start, today, since=last_run - SINCE_OVERLAP)
+    else:
+        refreshed = refresh_daily_movements(start, today)
+
+    items = list(
+        Items.objects.filter(is_active=True).order_by('items_id').values_list(
+            'items_id', 'current_stock', 'last_in_at', 'last_out_at'
+        )
+    )
+    with transaction.atomic():
+        ItemAnalytics.objects.exclude(window_days__in=windows).delete()
+        ItemAnalytics.objects.filter(item__is_active=False).delete()
+        if items:
+            _write_item_analytics(items, windows, today, start, computed_at)
+        _write_category_analytics(windows, computed_at)
+    return len(items), refreshed
+
+
+def _write_item_analytics(items, windows, today, start, computed_at):
+    item_ids = np.array([row[0] for row in items], dtype=np.int64)
+    current_stock = np.array([row[1] for row in items], dtype=np.float64)
+    last_moved = [max(filter(None, row[2:]), default=None) for row in items]
+    days_since = [(today - day).days if day else None for day in last_moved]
+
+    rows = list(
+        DailyItemMovement.objects.filter(day__gte=start, day__lte=today).values_list(
+            'item_id', 'day', 'quantity_in', 'quantity_out'
+        ).order_by()
+    )
+    if rows:
+        movement_items, days, quantity_in, quantity_out = (np.array(column) for column in zip(*rows))
+        day_index = (days.astype('datetime64[D]') - np.datetime64(start, 'D')).astype(np.int64)
+        positions = np.clip(np.searchsorted(item_ids, movement_items.astype(np.int64)), 0, len(item_ids) - 1)
+        known = item_ids[positions] == movement_items
+        positions, day_index = positions[known], day_index[known]
+        quantity_in = quantity_in[known].astype(np.float64)
+        quantity_out = quantity_out[known].astype(np.float64)
+    else:
+        positions = day_index = np.array([], dtype=np.int64)
+        quantity_in = quantity_out = np.array([], dtype=np.float64)
+
+    n_items = len(item_ids)
+    history_days = (today - start).days + 1
+    thresholds = abc_thresholds()
+    results = []
+    for window in windows:
+        window_start = history_days - window
+        mask = day_index >= window_start
+        consumption = np.bincount(positions[mask], weights=quantity_out[mask], minlength=n_items)
+        receipts = np.bincount(positions[mask], weights=quantity_in[mask], minlength=n_items)
+        # Rata-rata stok akhir hari dalam window, mundur dari stok saat ini:
+        # mutasi pada hari t mempengaruhi stok akhir semua hari window sebelum t
+        net = quantity_in[mask] - quantity_out[mask]
+        weight = (day_index[mask] - window_start).astype(np.float64)
+        average_stock = np.maximum(
+            current_stock - np.bincount(positions[mask], weights=net * weight, minlength=n_items) / window, 0
+        )
+
+        classes, share, cumulative = _classify(consumption, thresholds)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            turnover = np.where(average_stock > 0, consumption / average_stock, np.nan)
+            days_of_cover = np.where(consumption > 0, current_stock / (consumption / window), np.nan)
+        dead_stock = (consumption == 0) & (current_stock > 0)
+
+        results.extend(
+            ItemAnalytics(
+                item_id=int(item_ids[i]),
+                window_days=window,
+                consumption=int(consumption[i]),
+                receipts=int(receipts[i]),
+                consumption_share=float(share[i]),
+                cumulative_share=float(cumulative[i]),
+                abc_class=str(classes[i]),
+                average_stock=float(average_stock[i]),
+                turnover=None if np.isnan(turnover[i]) else float(turnover[i]),
+                days_of_cover=None if np.isnan(days_of_cover[i]) else float(days_of_cover[i]),
+                days_since_movement=days_since[i],
+                is_dead_stock=bool(dead_stock[i]),
+                computed_at=computed_at,
+            )
+            for i in range(n_items)
+        )
+
+    ItemAnalytics.objects.bulk_create(
+        results,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['item', 'window_days'],
+        update_fields=[
+            'consumption', 'receipts', 'consumption_share', 'cumulative_share', 'abc_class',
+            'average_stock', 'turnover', 'days_of_cover', 'days_since_movement', 'is_dead_stock',
+            'computed_at',
+        ],
+    )
+
+
+def _write_category_analytics(windows, computed_at):
+    """Ringkasan per kategori dari ItemAnalytics dengan satu query GROUP BY"""
+    groups = ItemAnalytics.objects.filter(window_days__in=windows).values(
+        'window_days', 'item__category_id'
+    ).annotate(
+        item_count=Count('pk'),
+        total_consumption=Sum('consumption'),
+        total_average_stock=Sum('average_stock'),
+        class_a_count=Count('pk', filter=Q(abc_class='A')),
+        class_b_count=Count('pk', filter=Q(abc_class='B')),
+        class_c_count=Count('pk', filter=Q(abc_class='C')),
+        dead_stock_count=Count('pk', filter=Q(is_dead_stock=True)),
+    ).order_by()
+
+    groups = list(groups)
+    window_totals = {}
+    for group in groups:
+        window_totals[group['window_days']] = window_totals.get(group['window_days'], 0) + group['total_consumption']
+
+    CategoryAnalytics.objects.all().delete()
+    CategoryAnalytics.objects.bulk_create([
+        CategoryAnalytics(
+            category_id=group['item__category_id'],
+            window_days=group['window_days'],
+            item_count=group['item_count'],
+            consumption=group['total_consumption'],
+            consumption_share=(
+                group['total_consumption'] / window_totals[group['window_days']]
+                if window_totals[group['window_days']] else 0
+            ),
+            average_stock=group['total_average_stock'],
+            turnover=(
+                group['total_consumption'] / group['total_average_stock']
+                if group['total_average_stock'] else None
+            ),
+            class_a_count=group['class_a_count'],
+            class_b_count=group['class_b_count'],
+            class_c_count=group['class_c_count'],
+            dead_stock_count=group['dead_stock_count'],
+            computed_at=computed_at,
+        )
+        for group in groups
+    ])
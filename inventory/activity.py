@@ -0,0 +1,88 @@
+"""
+Hitung ulang counter aktivitas barang & supplier dari data transaksi.
+
+Counter (Items.lifetime_in/out, last_in_at/out_at; Supplier.total_deliveries,
+total_quantity, last_delivery_date) dijaga inkremental oleh save() transaksi.
+Modul ini dipakai untuk edit transaksi (hitung ulang barang/supplier yang
+terdampak) dan command `rebuild_activity_counters` (semua data).
+
+Hanya transaksi yang memengaruhi stok yang dihitung: barang masuk `received`
+dan barang keluar `released`, termasuk yang sudah dipindah ke tabel arsip.
+"""
+from django.db.models import Count, Max, Sum
+
+from .models import (
+    ArchivedIncomingTransaction, ArchivedOutgoingTransaction, IncomingTransaction, Items,
+    OutgoingTransaction, Supplier,
+)
+
+INCOMING_SOURCES = [IncomingTransaction, ArchivedIncomingTransaction]
+OUTGOING_SOURCES = [OutgoingTransaction, ArchivedOutgoingTransaction]
+
+
+def _totals(models, status, group_field, ids):
+    """{id: (jumlah transaksi, total quantity, tanggal terakhir)} dari beberapa tabel"""
+    totals = {}
+    for model in models:
+        queryset = model.objects.filter(status=status, **{f'{group_field}__isnull': False})
+        if ids is not None:
+            queryset = queryset.filter(**{f'{group_field}__in': ids})
+        rows = queryset.order_by().values(group_field).annotate(
+            count=Count('pk'), quantity=Sum('quantity'), last=Max('transaction_date')
+        ).values_list(group_field, 'count', 'quantity', 'last')
+        for key, count, quantity, last in rows:
+            old_count, old_quantity, old_last = totals.get(key, (0, 0, None))
+            totals[key] = (
+                old_count + count,
+                old_quantity + quantity,
+                max(filter(None, [old_last, last]), default=None),
+            )
+    return totals
+
+
+def _clean_ids(ids):
+    return None if ids is None else {pk for pk in ids if pk is not None}
+
+
+def rebuild_item_counters(item_ids=None, batch_size=1000):
+    """Hitung ulang counter barang (`item_ids` None = semua barang). Return jumlah barang"""
+    item_ids = _clean_ids(item_ids)
+    incoming = _totals(INCOMING_SOURCES, 'received', 'item_id', item_ids)
+    outgoing = _totals(OUTGOING_SOURCES, 'released', 'item_id', item_ids)
+
+    queryset = Items.objects.order_by().only('items_id')
+    if item_ids is not None:
+        queryset = queryset.filter(pk__in=item_ids)
+
+    items = []
+    for item in queryset.iterator(chunk_size=batch_size):
+        _, item.lifetime_in, item.last_in_at = incoming.get(item.pk, (0, 0, None))
+        _, item.lifetime_out, item.last_out_at = outgoing.get(item.pk, (0, 0, None))
+        items.append(item)
+
+    Items.objects.bulk_update(
+        items, ['lifetime_in', 'last_in_at', 'lifetime_out', 'last_out_at'], batch_size=batch_size
+    )
+    return len(items)
+
+
+def rebuild_supplier_counters(supplier_ids=None, batch_size=1000):
+    """Hitung ulang counter supplier (`supplier_ids` None = semua supplier). Return jumlah supplier"""
+    supplier_ids = _clean_ids(supplier_ids)
+    deliveries = _totals(INCOMING_SOURCES, 'received', 'supplier_id', supplier_ids)
+
+    queryset = Supplier.objects.order_by().only('supplier_id')
+    if supplier_ids is not None:
+        queryset = queryset.filter(pk__in=supplier_ids)
+
+    suppliers = []
+    for supplier in queryset.iterator(chunk_size=batch_size):
+        supplier.total_deliveries, supplier.total_quantity, supplier.last_delivery_date = deliveries.get(
+            supplier.pk, (0, 0, None)
+        )
+        suppliers.append(supplier)
+
+    Supplier.objects.bulk_update(
+        suppliers, ['total_deliveries', 'total_quantity', 'last_delivery_date'], batch_size=batch_size
+    )
+    return len(suppliers)
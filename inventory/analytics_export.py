@@ -0,0 +1,299 @@
+"""
+Export data ke Parquet (kolumnar) untuk analitik di luar aplikasi.
+
+Struktur output (partisi gaya Hive, bisa dibaca langsung oleh pyarrow/DuckDB/Spark):
+
+    <output>/<dataset>/month=YYYY-MM/data.parquet
+    <output>/_state.json        watermark & skema per dataset
+
+- Export penuh membaca tabel dengan `.values().iterator()` dan menulis per
+  record batch ke satu ParquetWriter per partisi, tanpa memuat seluruh tabel
+  ke memori. Hasil ditulis ke direktori sementara lalu ditukar sekaligus.
+- Export inkremental hanya membaca baris dengan `updated_at` >= watermark
+  (kolom ber-index). Salinan lama baris yang berubah dicari dari kolom pk file
+  partisi yang ada; hanya partisi yang terdampak yang ditulis ulang.
+- Transaksi digabung dari tabel aktif dan tabel arsip (kolom sama), sehingga
+  pengarsipan tidak mengubah isi export.
+
+Kolom yang diubah lewat UPDATE atomik tanpa menyentuh `updated_at` (stok barang,
+counter aktivitas barang & supplier, saldo arsip) tidak diexport karena tidak bisa
+diikuti secara inkremental; mutasi stok pun tidak membuat baris barang ditulis ulang. Baris yang dihapus permanen baru hilang dari
+export setelah export penuh (`--full`).
+"""
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from django.utils import timezone
+
+from .archival import _archive_fields
+from .models import (
+    ArchivedIncomingTransaction, ArchivedOutgoingTransaction, IncomingTransaction, Items,
+    OutgoingTransaction, RequestItems, Supplier,
+)
+
+# dataset: (sumber [model aktif, model arsip], kolom partisi bulan, kolom yang tidak diexport)
+DATASETS = {
+    'items': ([Items], 'created_at', set(Items.ATOMIC_FIELDS) | {'version'}),
+    'suppliers': ([Supplier], 'created_at', {'total_deliveries', 'total_quantity', 'last_delivery_date'}),
+    'incoming': ([IncomingTransaction, ArchivedIncomingTransaction], 'transaction_date', set()),
+    'outgoing': ([OutgoingTransaction, ArchivedOutgoingTransaction], 'transaction_date', set()),
+    'requests': ([RequestItems], 'request_date', set()),
+}
+
+STATE_FILE = '_state.json'
+DATA_FILE = 'data.parquet'
+# Baris yang di-commit belakangan bisa punya updated_at sedikit lebih lama dari
+# watermark; dibaca ulang dengan jendela ini. Baris di jendela yang sudah
+# diexport (pk + updated_at sama, disimpan di state) tidak ditulis ulang.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+ARROW_TYPES = {
+    'AutoField': pa.int64(),
+    'BigAutoField': pa.int64(),
+    'IntegerField': pa.int64(),
+    'BigIntegerField': pa.int64(),
+    'PositiveIntegerField': pa.int64(),
+    'CharField': pa.string(),
+    'TextField': pa.string(),
+    'EmailField': pa.string(),
+    'BooleanField': pa.bool_(),
+    'DateField': pa.date32(),
+    'DateTimeField': pa.timestamp('us', tz='UTC'),
+    'FloatField': pa.float64(),
+}
+
+
+def _arrow_type(field):
+    if field.is_relation:
+        field = field.target_field
+    return ARROW_TYPES[field.get_internal_type()]
+
+
+def dataset_columns(name):
+    """Kolom export dataset (urutan sama dengan model); kolom pertama = pk"""
+    sources, _, excluded = DATASETS[name]
+    model = sources[0]
+    if len(sources) > 1:
+        names = _archive_fields(sources[1])
+    else:
+        names = [field.attname for field in model._meta.concrete_fields]
+    fields = {field.attname: field for field in model._meta.concrete_fields}
+    return [attname for attname in names if fields[attname].name not in excluded and attname not in excluded]
+
+
+def dataset_schema(name):
+    model = DATASETS[name][0][0]
+    fields = {field.attname: field for field in model._meta.concrete_fields}
+    return pa.schema([(attname, _arrow_type(fields[attname])) for attname in dataset_columns(name)])
+
+
+def _partition(row, column):
+    value = row[column]
+    if isinstance(value, datetime):
+        value = timezone.localtime(value)
+    return f'{value:%Y-%m}'
+
+
+def _partition_file(root, month):
+    return root / f'month={month}' / DATA_FILE
+
+
+def _rows(name, since=None, chunk_size=5000):
+    """Baris dataset dari semua sumber (aktif + arsip) sebagai dict"""
+    sources, _, _ = DATASETS[name]
+    columns = dataset_columns(name)
+    for model in sources:
+        queryset = model.objects.all()
+        if since is not None:
+            queryset = queryset.filter(updated_at__gte=since)
+        yield from queryset.order_by().values(*columns).iterator(chunk_size=chunk_size)
+
+
+class _PartitionWriter:
+    """Tampung baris per partisi dan tulis sebagai record batch berukuran tetap"""
+
+    def __init__(self, root, schema, batch_size):
+        self.root = root
+        self.schema = schema
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.writers = {}
+        self.rows = 0
+
+    def add(self, month, row):
+        buffer = self.buffers.setdefault(month, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self._flush(month)
+
+    def _flush(self, month):
+        rows = self.buffers.pop(month, [])
+        if not rows:
+            return
+        writer = self.writers.get(month)
+        if writer is None:
+            path = _partition_file(self.root, month)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            writer = self.writers[month] = pq.ParquetWriter(path, self.schema)
+        writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=self.schema))
+        self.rows += len(rows)
+
+    def close(self):
+        for month in list(self.buffers):
+            self._flush(month)
+        for writer in self.writers.values():
+            writer.close()
+
+
+def load_state(output):
+    path = Path(output) / STATE_FILE
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def _save_state(output, state):
+    path = Path(output) / STATE_FILE
+    temp = path.with_suffix('.tmp')
+    temp.write_text(json.dumps(state, indent=2))
+    os.replace(temp, path)
+
+
+def _boundary(updated, watermark):
+    """{pk: updated_at} baris di jendela overlap watermark, untuk run berikutnya"""
+    if watermark is None:
+        return {}
+    since = watermark - WATERMARK_OVERLAP
+    return {str(pk): value.isoformat() for pk, value in updated.items() if value >= since}
+
+
+def export_full(name, output, batch_size=5000):
+    """Tulis ulang seluruh dataset. Return (jumlah baris, jumlah partisi, watermark, boundary)"""
+    _, partition_column, _ = DATASETS[name]
+    root = Path(output) / name
+    temp_root = Path(output) / f'.{name}.tmp'
+    shutil.rmtree(temp_root, ignore_errors=True)
+
+    schema = dataset_schema(name)
+    pk_column = schema.names[0]
+    writer = _PartitionWriter(temp_root, schema, batch_size)
+    updated = {}
+    try:
+        for row in _rows(name, chunk_size=batch_size):
+            # Baris yang sedang dipindah ke arsip bisa terbaca dari kedua tabel
+            if row[pk_column] in updated:
+                continue
+            updated[row[pk_column]] = row['updated_at']
+            writer.add(_partition(row, partition_column), row)
+    finally:
+        writer.close()
+
+    temp_root.mkdir(parents=True, exist_ok=True)
+    shutil.rmtree(root, ignore_errors=True)
+    os.replace(temp_root, root)
+    watermark = max(updated.values(), default=None)
+    return writer.rows, len(writer.writers), watermark, _boundary(updated, watermark)
+
+
+def _existing_partitions(root, pk_column, pks):
+    """{bulan: jumlah} partisi yang masih menyimpan salinan lama dari `pks`"""
+    affected = {}
+    if not pks:
+        return affected
+    value_set = pa.array(sorted(pks), type=pa.int64())
+    for path in root.glob(f'month=*/{DATA_FILE}'):
+        column = pq.read_table(path, columns=[pk_column]).column(pk_column)
+        stale = pc.sum(pc.is_in(column, value_set=value_set)).as_py() or 0
+        if stale:
+            affected[path.parent.name.removeprefix('month=')] = stale
+    return affected
+
+
+def export_incremental(name, output, watermark, boundary, batch_size=5000):
+    """
+    Terapkan baris yang berubah sejak `watermark`.
+    Return (jumlah baris berubah, jumlah partisi ditulis ulang, watermark baru, boundary baru).
+    """
+    _, partition_column, _ = DATASETS[name]
+    schema = dataset_schema(name)
+    pk_column = schema.names[0]
+    root = Path(output) / name
+
+    changed = {}
+    updated = {}
+    for row in _rows(name, since=watermark - WATERMARK_OVERLAP, chunk_size=batch_size):
+        pk = row[pk_column]
+        updated[pk] = row['updated_at']
+        if boundary.get(str(pk)) != row['updated_at'].isoformat():
+            changed[pk] = row
+    watermark = max([watermark, *updated.values()])
+    boundary = _boundary(updated, watermark)
+    if not changed:
+        return 0, 0, watermark, boundary
+
+    by_month = {}
+    for row in changed.values():
+        by_month.setdefault(_partition(row, partition_column), []).append(row)
+
+    # Baris yang pindah bulan (mis. tanggal transaksi diedit) juga menghapus salinan di partisi lama
+    months = set(by_month) | set(_existing_partitions(root, pk_column, set(changed)))
+    changed_pks = pa.array(sorted(changed), type=pa.int64())
+    for month in sorted(months):
+        path = _partition_file(root, month)
+        tables = []
+        if path.exists():
+            existing = pq.read_table(path, schema=schema)
+            tables.append(existing.filter(pc.invert(pc.is_in(existing.column(pk_column), value_set=changed_pks))))
+        if month in by_month:
+            tables.append(pa.Table.from_pylist(by_month[month], schema=schema))
+        table = pa.concat_tables(tables).sort_by(pk_column)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_suffix('.tmp')
+        if table.num_rows:
+            pq.write_table(table, temp, row_group_size=batch_size)
+            os.replace(temp, path)
+        else:
+            shutil.rmtree(path.parent)
+    return len(changed), len(months), watermark, boundary
+
+
+def export_dataset(name, output, full=False, batch_size=5000):
+    """
+    Export satu dataset; otomatis penuh pada run pertama atau jika kolom berubah.
+    Return dict ringkasan untuk ditampilkan command.
+    """
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    state = load_state(output)
+    previous = state.get(name)
+    columns = dataset_columns(name)
+    started = timezone.now()
+
+    if (full or not previous or previous.get('columns') != columns
+            or not previous.get('watermark') or not (output / name).exists()):
+        rows, partitions, watermark, boundary = export_full(name, output, batch_size)
+        mode = 'penuh'
+    else:
+        rows, partitions, watermark, boundary = export_incremental(
+            name, output, datetime.fromisoformat(previous['watermark']),
+            previous.get('boundary', {}), batch_size,
+        )
+        mode = 'inkremental'
+
+    state = load_state(output)
+    state[name] = {
+        # Tabel kosong: baris pertama nanti tetap terbaca oleh export berikutnya
+        'watermark': (watermark or started).isoformat(),
+        'boundary': boundary,
+        'columns': columns,
+        'exported_at': started.isoformat(),
+    }
+    _save_state(output, state)
+    return {'dataset': name, 'mode': mode, 'rows': rows, 'partitions': partitions}
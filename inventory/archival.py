@@ -0,0 +1,160 @@
+"""
+Arsip transaksi lama & penghapusan permanen barang yang sudah dihapus (soft delete).
+
+Semua operasi berjalan per batch dengan transaksi DB pendek, sehingga lama
+penguncian tabel transaksi tetap kecil berapapun jumlah data yang diproses.
+
+Carry-forward: transaksi yang diarsip menambah/mengurangi `Items.archived_balance`
+sehingga rekonsiliasi stok (saldo arsip + transaksi aktif) tetap benar.
+Lot & alokasinya tetap tersimpan; referensi ke transaksi yang diarsip dikosongkan.
+
+Purge mengklaim barang dulu (`purge_started_at`, versi dinaikkan) sebelum batch
+pertama, sehingga barang tidak bisa diaktifkan kembali setelah historinya mulai
+dihapus. Counter supplier dihitung ulang di batch yang menghapus barang masuknya.
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .models import (
+    ArchivedIncomingTransaction, ArchivedOutgoingTransaction, IncomingTransaction, Items, ItemStock,
+    LotAllocation, OutgoingTransaction, ReorderSuggestion, RequestItems, StockAdjustment, StockAlert,
+    StockLot, StockSnapshot, StockTransfer,
+)
+from .activity import INCOMING_SOURCES, rebuild_supplier_counters
+from .outbox import emit_item_deleted
+
+# (model aktif, model arsip, status yang mempengaruhi stok, tanda mutasi, status final)
+ARCHIVE_TABLES = [
+    (IncomingTransaction, ArchivedIncomingTransaction, 'received', 1, ['received', 'cancelled']),
+    (OutgoingTransaction, ArchivedOutgoingTransaction, 'released', -1, ['released', 'cancelled']),
+]
+
+
+def _archive_fields(archive_model):
+    """Nama kolom yang disalin (sama antara tabel aktif & arsip)"""
+    return [
+        field.attname for field in archive_model._meta.concrete_fields
+        if field.attname != 'archived_at'
+    ]
+
+
+def archive_batch(model, archive_model, stock_status, sign, final_statuses, cutoff, batch_size=1000):
+    """
+    Pindahkan satu batch transaksi final dengan tanggal <= cutoff ke tabel arsip.
+    Return jumlah baris yang dipindahkan (0 = selesai).
+    """
+    fields = _archive_fields(archive_model)
+
+    with transaction.atomic():
+        rows = list(
+            model.objects.select_for_update().filter(
+                transaction_date__lte=cutoff,
+                status__in=final_statuses,
+            ).order_by('pk').values(*fields)[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        archive_model.objects.bulk_create([archive_model(**row) for row in rows])
+
+        balances = {}
+        for row in rows:
+            if row['status'] == stock_status:
+                balances[row['item_id']] = balances.get(row['item_id'], 0) + sign * row['quantity']
+
+        if balances:
+            Items.objects.filter(pk__in=balances).update(
+                archived_balance=F('archived_balance') + Case(
+                    *[When(pk=item_id, then=Value(delta)) for item_id, delta in balances.items()],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+            )
+
+        pk_name = model._meta.pk.attname
+        model.objects.filter(pk__in=[row[pk_name] for row in rows]).delete()
+
+    return len(rows)
+
+
+def archive_transactions(cutoff, batch_size=1000, progress=None):
+    """Arsipkan semua transaksi final s.d. `cutoff`. Return {nama model: jumlah}"""
+    result = {}
+    for model, archive_model, stock_status, sign, final_statuses in ARCHIVE_TABLES:
+        total = 0
+        while True:
+            moved = archive_batch(model, archive_model, stock_status, sign, final_statuses, cutoff, batch_size)
+            if not moved:
+                break
+            total += moved
+            if progress:
+                progress(model, total)
+        result[model.__name__] = total
+    return result
+
+
+def _delete_in_batches(queryset, batch_size):
+    """
+    Hapus baris queryset per batch (satu transaksi DB per batch). Untuk barang masuk,
+    counter supplier yang terdampak dihitung ulang di transaksi batch yang sama.
+    """
+    model = queryset.model
+    deleted = 0
+    while True:
+        pks = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        with transaction.atomic():
+            batch = model.objects.filter(pk__in=pks)
+            supplier_ids = set(batch.values_list('supplier_id', flat=True)) if model in INCOMING_SOURCES else None
+            batch.delete()
+            if supplier_ids:
+                rebuild_supplier_counters(supplier_ids)
+        deleted += len(pks)
+
+
+def claim_for_purge(item_id):
+    """
+    Tandai barang yang di-retire sebagai sedang di-purge (UPDATE bersyarat). Versi ikut naik
+    sehingga form edit yang masih terbuka konflik, dan ItemForm menolak mengaktifkannya kembali.
+    Return False jika barang sudah aktif kembali / tidak ditemukan.
+    """
+    return bool(Items.objects.filter(pk=item_id, is_active=False, retired_at__isnull=False).update(
+        purge_started_at=timezone.now(),
+        version=F('version') + 1,
+    ))
+
+
+def purge_item(item_id, batch_size=1000):
+    """
+    Hapus permanen barang yang sudah di-retire beserta seluruh historinya, per batch.
+    Return False jika barang sudah aktif kembali / tidak ditemukan.
+    """
+    if not claim_for_purge(item_id):
+        return False
+
+    # Urutan penting: lot dulu (agar transaksi tidak perlu melepas referensinya satu per satu),
+    # lalu transaksi keluar karena mereferensikan permintaan barang
+    for queryset in [
+        LotAllocation.objects.filter(lot__item_id=item_id),
+        StockLot.objects.filter(item_id=item_id),
+        OutgoingTransaction.objects.filter(item_id=item_id),
+        IncomingTransaction.objects.filter(item_id=item_id),
+        RequestItems.objects.filter(item_id=item_id),
+        ArchivedOutgoingTransaction.objects.filter(item_id=item_id),
+        ArchivedIncomingTransaction.objects.filter(item_id=item_id),
+        StockTransfer.objects.filter(item_id=item_id),
+        ItemStock.objects.filter(item_id=item_id),
+        StockAlert.objects.filter(item_id=item_id),
+        StockSnapshot.objects.filter(item_id=item_id),
+        StockAdjustment.objects.filter(item_id=item_id),
+        ReorderSuggestion.objects.filter(item_id=item_id),
+    ]:
+        _delete_in_batches(queryset, batch_size)
+
+    with transaction.atomic():
+        deleted, _ = Items.objects.filter(pk=item_id, purge_started_at__isnull=False).delete()
+        if deleted:
+            emit_item_deleted(item_id)
+    return bool(deleted)
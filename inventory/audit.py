@@ -0,0 +1,193 @@
+"""
+Audit trail perubahan field untuk barang, supplier, transaksi, permintaan, dan user.
+
+- Nilai field dicatat di memori saat instance dimuat (post_init), tanpa query tambahan.
+- post_save membandingkan nilai tersebut dengan nilai yang disimpan; hanya field
+  yang berubah dicatat sebagai diff ringkas {field: [lama, baru]}.
+- Selama request (`audit_middleware`) entri ditampung di buffer dan ditulis dengan
+  satu bulk_create setelah view selesai: paling banyak satu INSERT tambahan per
+  request. Entri masuk buffer lewat `transaction.on_commit`, sehingga perubahan
+  yang di-rollback tidak ikut tercatat.
+- Di luar request (command, shell) entri ditulis setelah commit.
+
+Penulisan massal (bulk_create, bulk_update, queryset.update/delete) tidak
+memanggil signal; kode yang perlu mencatatnya memanggil `record_change` /
+`record_created`. Hapus hanya dicatat untuk supplier & user (dihapus satu per
+satu lewat view); barang memakai soft delete, dan transaksi dipindah ke arsip
+dengan delete massal yang harus tetap tanpa signal.
+"""
+import contextvars
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils.decorators import sync_and_async_middleware
+
+from .models import (
+    AuditLog, IncomingTransaction, Items, OutgoingTransaction, RequestItems, Supplier, User,
+)
+
+# model: (label, field pengenal untuk object_repr, field yang tidak dicatat)
+TRACKED_MODELS = {
+    Items: ('Barang', 'code', set(Items.ATOMIC_FIELDS) | {'version', 'created_at', 'updated_at'}),
+    Supplier: ('Supplier', 'code', {'total_deliveries', 'total_quantity', 'last_delivery_date', 'created_at', 'updated_at'}),
+    IncomingTransaction: ('Barang Masuk', 'transaction_number', {'version', 'created_at', 'updated_at'}),
+    OutgoingTransaction: ('Barang Keluar', 'transaction_number', {'version', 'created_at', 'updated_at'}),
+    RequestItems: ('Permintaan Barang', 'request_number', {'created_at', 'updated_at'}),
+    User: ('User', 'username', {'password', 'created_at', 'updated_at'}),
+}
+OBJECT_TYPES = {model._meta.model_name: label for model, (label, _, _) in TRACKED_MODELS.items()}
+# Model yang dihapus satu per satu (delete massal model lain tetap tanpa signal)
+DELETE_TRACKED_MODELS = [Supplier, User]
+
+# model -> [(nama field, attname)], diisi oleh connect()
+_fields = {}
+
+_buffer = contextvars.ContextVar('inventory_audit_buffer', default=None)
+
+
+class AuditBuffer:
+    """Entri audit satu request; ditulis sekaligus oleh flush()"""
+
+    def __init__(self, request):
+        self.request = request
+        self.entries = []
+
+    def user_id(self):
+        return self.request.session.get('user_id')
+
+    def flush(self):
+        entries, self.entries = self.entries, []
+        if entries:
+            # Jika masih di dalam atomic (mis. ATOMIC_REQUESTS), tulis setelah commit
+            transaction.on_commit(lambda: AuditLog.objects.bulk_create(entries))
+
+
+def _values(model, instance, names=None):
+    values = instance.__dict__
+    return {
+        attname: values[attname]
+        for name, attname in _fields[model]
+        if attname in values and (names is None or name in names)
+        # Ekspresi F() belum punya nilai (kolom yang dijaga atomik di DB)
+        and not hasattr(values[attname], 'resolve_expression')
+    }
+
+
+def _names(model):
+    return {attname: name for name, attname in _fields[model]}
+
+
+def record_change(instance, action, changes, user_id=None):
+    """Catat satu entri audit (ditulis bersama entri lain di request yang sama)"""
+    _, repr_field, _ = TRACKED_MODELS[type(instance)]
+    buffer = _buffer.get()
+    entry = AuditLog(
+        object_type=instance._meta.model_name,
+        object_id=instance.pk,
+        object_repr=str(getattr(instance, repr_field) or '')[:200],
+        action=action,
+        changes=changes,
+        user_id=user_id or (buffer.user_id() if buffer else None),
+    )
+    if buffer is None:
+        transaction.on_commit(lambda: AuditLog.objects.bulk_create([entry]))
+    else:
+        transaction.on_commit(lambda: buffer.entries.append(entry))
+
+
+def record_created(instance, user_id=None):
+    """Catat data baru yang dibuat tanpa save() (bulk_create)"""
+    model = type(instance)
+    names = _names(model)
+    changes = {
+        names[attname]: [None, value]
+        for attname, value in _values(model, instance).items()
+        if value not in (None, '')
+    }
+    record_change(instance, 'create', changes, user_id=user_id)
+
+
+def describe(entry):
+    """Baris (label field, lama, baru) dari entri audit untuk ditampilkan"""
+    labels = {}
+    for model in TRACKED_MODELS:
+        if model._meta.model_name == entry.object_type:
+            labels = {field.name: field.verbose_name for field in model._meta.concrete_fields}
+    return [(labels.get(name, name), old, new) for name, (old, new) in entry.changes.items()]
+
+
+def _snapshot(sender, instance, **kwargs):
+    instance._audit_snapshot = _values(sender, instance)
+
+
+def _record_save(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    current = _values(sender, instance, update_fields)
+    if created:
+        record_created(instance)
+    else:
+        old = getattr(instance, '_audit_snapshot', {})
+        names = _names(sender)
+        changes = {
+            names[attname]: [old[attname], value]
+            for attname, value in current.items()
+            if attname in old and old[attname] != value
+            # Form mengubah NULL menjadi string kosong: bukan perubahan
+            and not (old[attname] in (None, '') and value in (None, ''))
+        }
+        if changes:
+            record_change(instance, 'update', changes)
+    instance._audit_snapshot = {**getattr(instance, '_audit_snapshot', {}), **current}
+
+
+def _record_delete(sender, instance, **kwargs):
+    names = _names(sender)
+    changes = {
+        names[attname]: [value, None]
+        for attname, value in getattr(instance, '_audit_snapshot', {}).items()
+        if value not in (None, '')
+    }
+    record_change(instance, 'delete', changes)
+
+
+def connect():
+    """Pasang signal audit (dipanggil dari InventoryConfig.ready)"""
+    for model, (_, _, excluded) in TRACKED_MODELS.items():
+        _fields[model] = [
+            (field.name, field.attname)
+            for field in model._meta.concrete_fields
+            if not field.primary_key and field.name not in excluded
+        ]
+        uid = f'inventory_audit_{model._meta.model_name}'
+        post_init.connect(_snapshot, sender=model, dispatch_uid=uid)
+        post_save.connect(_record_save, sender=model, dispatch_uid=uid)
+    for model in DELETE_TRACKED_MODELS:
+        post_delete.connect(_record_delete, sender=model, dispatch_uid=f'inventory_audit_{model._meta.model_name}')
+
+
+@sync_and_async_middleware
+def audit_middleware(get_response):
+    """Tampung entri audit per request lalu tulis dengan satu bulk_create"""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            buffer = AuditBuffer(request)
+            token = _buffer.set(buffer)
+            try:
+                return await get_response(request)
+            finally:
+                _buffer.reset(token)
+                if buffer.entries:
+                    await sync_to_async(buffer.flush)()
+    else:
+        def middleware(request):
+            buffer = AuditBuffer(request)
+            token = _buffer.set(buffer)
+            try:
+                return get_response(request)
+            finally:
+                _buffer.reset(token)
+                buffer.flush()
+    return middleware
@@ -0,0 +1,180 @@
+"""
+Helper data grafik transaksi (time-series) untuk dashboard.
+
+Semua bucket dihitung dengan satu query GROUP BY per tabel transaksi
+(TruncDay/TruncWeek/TruncMonth), lalu periode yang kosong diisi nol di Python.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import IncomingTransaction, OutgoingTransaction
+
+GRANULARITY_CHOICES = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+LABEL_FORMATS = {
+    'day': '%d/%m',
+    'week': '%d/%m/%Y',
+    'month': '%b %Y',
+}
+
+# Batas jumlah bucket per request agar satu request tidak bisa membuat respons raksasa
+MAX_BUCKETS = 1100
+
+CACHE_TIMEOUT_CURRENT = 60        # range yang menyentuh hari ini masih bisa berubah
+CACHE_TIMEOUT_HISTORICAL = 60 * 60
+
+
+class ChartParameterError(ValueError):
+    """Parameter grafik tidak valid"""
+
+
+def period_start(day, granularity):
+    """Return awal bucket untuk tanggal `day`"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_period(day, granularity):
+    """Return awal bucket berikutnya"""
+    if granularity == 'week':
+        return day + timedelta(days=7)
+    if granularity == 'month':
+        if day.month == 12:
+            return day.replace(year=day.year + 1, month=1, day=1)
+        return day.replace(month=day.month + 1, day=1)
+    return day + timedelta(days=1)
+
+
+def build_periods(start, end, granularity):
+    """Return daftar awal bucket dari `start` sampai `end` (inklusif)"""
+    periods = []
+    current = period_start(start, granularity)
+    while current <= end:
+        periods.append(current)
+        if len(periods) > MAX_BUCKETS:
+            raise ChartParameterError(
+                f'Rentang terlalu panjang untuk granularitas {granularity} '
+                f'(maksimal {MAX_BUCKETS} titik data).'
+            )
+        current = next_period(current, granularity)
+    return periods
+
+
+def _grouped_totals(queryset, granularity, pk_field):
+    """Satu query GROUP BY periode -> {periode: (quantity, count)}"""
+    trunc = GRANULARITY_CHOICES[granularity]
+    rows = queryset.annotate(
+        period=trunc('transaction_date')
+    ).values('period').annotate(
+        total_quantity=Sum('quantity'),
+        total_count=Count(pk_field),
+    ).order_by('period')
+
+    totals = {}
+    for row in rows:
+        period = row['period']
+        # Beberapa backend mengembalikan datetime untuk hasil Trunc
+        if hasattr(period, 'date'):
+            period = period.date()
+        totals[period] = (row['total_quantity'] or 0, row['total_count'] or 0)
+    return totals
+
+
+def transaction_series(start, end, granularity='day', item_id=None, category_id=None, supplier_id=None):
+    """
+    Return data time-series barang masuk & keluar untuk rentang tanggal.
+
+    Hanya transaksi yang mempengaruhi stok yang dihitung
+    (incoming `received`, outgoing `released`).
+    """
+    if granularity not in GRANULARITY_CHOICES:
+        raise ChartParameterError('Granularitas harus salah satu dari: day, week, month.')
+    if start > end:
+        raise ChartParameterError('Tanggal awal tidak boleh melebihi tanggal akhir.')
+
+    periods = build_periods(start, end, granularity)
+
+    incoming = IncomingTransaction.objects.filter(
+        status='received',
+        transaction_date__gte=start,
+        transaction_date__lte=end,
+    )
+    outgoing = OutgoingTransaction.objects.filter(
+        status='released',
+        transaction_date__gte=start,
+        transaction_date__lte=end,
+    )
+
+    if item_id:
+        incoming = incoming.filter(item_id=item_id)
+        outgoing = outgoing.filter(item_id=item_id)
+    if category_id:
+        incoming = incoming.filter(item__category_id=category_id)
+        outgoing = outgoing.filter(item__category_id=category_id)
+    if supplier_id:
+        incoming = incoming.filter(supplier_id=supplier_id)
+        # Barang keluar tidak punya supplier: batasi ke barang yang pernah dipasok supplier tsb
+        outgoing = outgoing.filter(
+            item_id__in=IncomingTransaction.objects.filter(
+                supplier_id=supplier_id
+            ).values('item_id')
+        )
+
+    incoming_totals = _grouped_totals(incoming, granularity, 'incoming_id')
+    outgoing_totals = _grouped_totals(outgoing, granularity, 'outgoing_id')
+
+    label_format = LABEL_FORMATS[granularity]
+    series = {
+        'granularity': granularity,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'periods': [p.isoformat() for p in periods],
+        'labels': [p.strftime(label_format) for p in periods],
+        'incoming': {'quantity': [], 'count': []},
+        'outgoing': {'quantity': [], 'count': []},
+    }
+
+    # Gap filling: periode tanpa transaksi tetap muncul dengan nilai 0
+    for period in periods:
+        in_qty, in_count = incoming_totals.get(period, (0, 0))
+        out_qty, out_count = outgoing_totals.get(period, (0, 0))
+        series['incoming']['quantity'].append(in_qty)
+        series['incoming']['count'].append(in_count)
+        series['outgoing']['quantity'].append(out_qty)
+        series['outgoing']['count'].append(out_count)
+
+    series['totals'] = {
+        'incoming_quantity': sum(series['incoming']['quantity']),
+        'incoming_count': sum(series['incoming']['count']),
+        'outgoing_quantity': sum(series['outgoing']['quantity']),
+        'outgoing_count': sum(series['outgoing']['count']),
+    }
+    return series
+
+
+def cached_transaction_series(start, end, granularity='day', item_id=None, category_id=None, supplier_id=None):
+    """Versi ber-cache dari `transaction_series` (key per kombinasi filter)"""
+    raw_key = f'{start}|{end}|{granularity}|{item_id}|{category_id}|{supplier_id}'
+    cache_key = 'chart_series:' + hashlib.md5(raw_key.encode()).hexdigest()
+
+    series = cache.get(cache_key)
+    if series is None:
+        series = transaction_series(
+            start, end, granularity,
+            item_id=item_id, category_id=category_id, supplier_id=supplier_id,
+        )
+        timeout = CACHE_TIMEOUT_CURRENT if end >= timezone.localdate() else CACHE_TIMEOUT_HISTORICAL
+        cache.set(cache_key, series, timeout)
+    return series
@@ -0,0 +1,8 @@
+from .models import StockAlert
+
+
+def stock_alerts(request):
+    """Badge jumlah alert stok terbuka untuk sidebar (Gudang & Direktur)"""
+    if request.session.get('role') not in ['pegawai_gudang', 'direktur']:
+        return {}
+    return {'open_stock_alert_count': StockAlert.open_count()}
@@ -0,0 +1,190 @@
+"""
+Widget dashboard per role, dimuat terpisah.
+
+Halaman dashboard hanya berisi kerangka (shell) berisi placeholder widget yang
+boleh dilihat role user; tiap widget diambil browser dari endpoint
+`dashboard_widget` secara paralel. Role yang tidak melihat analitik Direktur
+tidak menjalankan query-nya sama sekali, dan widget yang lambat tidak menahan
+widget lain.
+
+Kebijakan cache per widget:
+- `cache_timeout`: lama HTML widget disimpan di cache (0 = tidak di-cache).
+- `per_user`: key cache per user (data milik user), selain itu dibagi semua user.
+- `live`: key cache memuat id LiveEvent terakhir, sehingga cache otomatis
+  usang saat ada perubahan stok/permintaan. Angka awal widget selalu sesuai
+  dengan event live yang diterapkan browser sesudahnya.
+
+Loader yang dipakai beberapa widget (mis. `stock_summary` untuk `stock` dan
+`stock_distribution`) hasilnya di-cache sekali per loader, sehingga query
+agregatnya tidak dijalankan ulang untuk setiap widget.
+"""
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .live_events import latest_event_id
+from .models import Category, IncomingTransaction, Items, OutgoingTransaction, RequestItems
+
+ALL_ROLES = ('admin', 'pegawai_gudang', 'pegawai_produksi', 'direktur')
+MANAGEMENT_ROLES = ('admin', 'pegawai_gudang', 'direktur')
+
+
+def _start_of_month():
+    return timezone.localdate().replace(day=1)
+
+
+def stock_summary(user):
+    """Total & status stok barang aktif dalam satu query agregat"""
+    aggregate = Items.objects.filter(is_active=True).aggregate(
+        total_items=Count('items_id'),
+        total_stock=Sum('current_stock'),
+        out_of_stock_count=Count('items_id', filter=Q(current_stock__lte=0)),
+        low_stock_count=Count(
+            'items_id',
+            filter=Q(current_stock__gt=0, current_stock__lte=F('minimum_stock'))
+        ),
+    )
+    total_items = aggregate['total_items'] or 0
+    low_stock_count = aggregate['low_stock_count'] or 0
+    out_of_stock_count = aggregate['out_of_stock_count'] or 0
+    return {
+        'total_items': total_items,
+        'total_stock': aggregate['total_stock'] or 0,
+        'in_stock_count': total_items - low_stock_count - out_of_stock_count,
+        'low_stock_count': low_stock_count,
+        'out_of_stock_count': out_of_stock_count,
+    }
+
+
+def monthly_flows(user):
+    """Barang masuk & keluar bulan ini"""
+    start = _start_of_month()
+    incoming = IncomingTransaction.objects.filter(transaction_date__gte=start).aggregate(
+        total_transactions=Count('incoming_id'), total_quantity=Sum('quantity')
+    )
+    outgoing = OutgoingTransaction.objects.filter(transaction_date__gte=start).aggregate(
+        total_transactions=Count('outgoing_id'), total_quantity=Sum('quantity')
+    )
+    return {
+        'incoming_transactions': incoming['total_transactions'] or 0,
+        'incoming_quantity': incoming['total_quantity'] or 0,
+        'outgoing_transactions': outgoing['total_transactions'] or 0,
+        'outgoing_quantity': outgoing['total_quantity'] or 0,
+    }
+
+
+def _request_counts(queryset):
+    aggregate = queryset.aggregate(
+        total_requests=Count('request_id'),
+        pending_requests=Count('request_id', filter=Q(status='pending')),
+        approved_requests=Count('request_id', filter=Q(status='approved')),
+        rejected_requests=Count('request_id', filter=Q(status='rejected')),
+        completed_requests=Count('request_id', filter=Q(status='completed')),
+    )
+    return {key: value or 0 for key, value in aggregate.items()}
+
+
+def request_summary(user):
+    """Statistik permintaan produksi per status"""
+    return _request_counts(RequestItems.objects.all())
+
+
+def my_requests(user):
+    """Permintaan milik user: jumlah per status & 5 terbaru"""
+    queryset = RequestItems.objects.filter(requested_by=user)
+    return {
+        **_request_counts(queryset),
+        'recent_requests': list(
+            queryset.select_related('item').order_by('-created_at')[:5]
+        ),
+    }
+
+
+def low_stock_items(user):
+    """Barang aktif yang menipis/habis (untuk cek ketersediaan sebelum membuat permintaan)"""
+    return {
+        'low_stock_items': list(
+            Items.objects.filter(is_active=True, current_stock__lte=F('minimum_stock'))
+            .order_by('current_stock', 'name')
+            .only('items_id', 'code', 'name', 'unit', 'current_stock', 'minimum_stock')[:10]
+        ),
+    }
+
+
+def category_options(user):
+    """Pilihan kategori untuk filter grafik (data grafik diambil dari dashboard_chart_data)"""
+    return {'categories': list(Category.objects.all())}
+
+
+class Widget:
+    """Satu widget dashboard: loader data, template fragmen, role yang boleh melihat, dan cache"""
+
+    def __init__(self, name, loader, roles, column='col-12', cache_timeout=60, per_user=False, live=False):
+        self.name = name
+        self.loader = loader
+        self.roles = roles
+        self.column = column
+        self.cache_timeout = cache_timeout
+        self.per_user = per_user
+        self.live = live
+
+    @property
+    def template_name(self):
+        return f'inventory/dashboard/{self.name}.html'
+
+    def cache_key(self, user, kind='widget', name=None):
+        parts = [f'dashboard_{kind}', name or self.name]
+        if self.per_user:
+            parts.append(f'user{user.pk}')
+        if self.live:
+            parts.append(f'event{latest_event_id()}')
+        return ':'.join(parts)
+
+    def render(self, user):
+        """HTML fragmen widget (dari cache bila ada)"""
+        if not self.cache_timeout:
+            return self._render(user)
+        key = self.cache_key(user)
+        html = cache.get(key)
+        if html is None:
+            html = self._render(user)
+            cache.set(key, html, self.cache_timeout)
+        return html
+
+    def load(self, user):
+        """Data widget; loader bersama di-cache dengan key per loader (bukan per widget)"""
+        if self.loader not in SHARED_LOADERS or not self.cache_timeout:
+            return self.loader(user)
+        key = self.cache_key(user, kind='data', name=self.loader.__name__)
+        return cache.get_or_set(key, lambda: self.loader(user), self.cache_timeout)
+
+    def _render(self, user):
+        return render_to_string(self.template_name, {'user': user, **self.load(user)})
+
+
+# Urutan = urutan tampil di dashboard
+DASHBOARD_WIDGETS = {
+    widget.name: widget for widget in [
+        Widget('stock', stock_summary, ALL_ROLES, live=True),
+        Widget('my_requests', my_requests, ('pegawai_produksi',), column='col-md-8', per_user=True, live=True),
+        Widget('low_stock', low_stock_items, ('pegawai_produksi',), column='col-md-4', live=True),
+        Widget('flows', monthly_flows, MANAGEMENT_ROLES, column='col-md-6'),
+        Widget('requests', request_summary, MANAGEMENT_ROLES, column='col-md-6', live=True),
+        Widget('stock_distribution', stock_summary, MANAGEMENT_ROLES, column='col-md-4', live=True),
+        Widget('transactions', category_options, MANAGEMENT_ROLES, column='col-md-8', cache_timeout=600),
+    ]
+}
+
+
+# Loader yang dipakai lebih dari satu widget (hasilnya di-cache bersama, lihat Widget.load)
+SHARED_LOADERS = {
+    loader for loader, count in Counter(widget.loader for widget in DASHBOARD_WIDGETS.values()).items() if count > 1
+}
+
+
+def widgets_for_role(role):
+    """Widget yang boleh dilihat role ini, sesuai urutan tampil"""
+    return [widget for widget in DASHBOARD_WIDGETS.values() if role in widget.roles]
@@ -1,17 +1,20 @@
 from django.views.generic import TemplateView, ListView
-from django.db.models import Sum, Count, Q, F
+from django.db.models import Q
 from django.utils import timezone
-from django.http import HttpResponse
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.views import View
+from django.contrib import messages
 from datetime import datetime, timedelta
-from .models import Items, IncomingTransaction, OutgoingTransaction, RequestItems, User
+from django.utils.dateparse import parse_date
+from .models import AuditLog, CategoryAnalytics, Items, IncomingTransaction, OutgoingTransaction, RequestItems, User, StockAdjustment
+from .audit import OBJECT_TYPES, describe
 from .mixins import DirekturRequiredMixin
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from io import BytesIO
+from .reconciliation import find_discrepancies
+from .snapshots import nearest_snapshot_date, stock_as_of_queryset
+from .reports import REPORTS
+from .abc_analysis import analysis_windows
+from .lots import expiry_warning_days
 
 class DirekturDashboardView(DirekturRequiredMixin, TemplateView):
     """
@@ -25,6 +28,27 @@ class DirekturDashboardView(DirekturRequiredMixin, TemplateView):
         return redirect('dashboard')
 
 
+def _parse_date(value):
+    """Tanggal YYYY-MM-DD dari query string; None jika kosong/tidak valid"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def _report_filters(request, as_of=None):
+    """Filter laporan dari query string (dipakai halaman laporan & export)"""
+    window = request.GET.get('window', '')
+    return {
+        'search': request.GET.get('search', ''),
+        'date_from': _parse_date(request.GET.get('date_from', '')),
+        'date_to': _parse_date(request.GET.get('date_to', '')),
+        'as_of': as_of,
+        # Window analisis ABC; tidak valid = default laporan
+        'window': int(window) if window.isdigit() else None,
+    }
+
+
 class LaporanListView(DirekturRequiredMixin, TemplateView):
     """
     Laporan Gudang dengan tabs:
@@ -32,6 +56,8 @@ class LaporanListView(DirekturRequiredMixin, TemplateView):
     - Laporan Barang Masuk
     - Laporan Barang Keluar
     - Laporan Permintaan Barang
+    - Analisis ABC & perputaran stok (hasil job compute_abc_analysis)
+    - Lot yang segera/sudah kedaluwarsa
     """
     template_name = 'inventory/director/report_list.html'
     
@@ -40,94 +66,41 @@ class LaporanListView(DirekturRequiredMixin, TemplateView):
         
         # Active tab (default: stok)
         active_tab = self.request.GET.get('tab', 'stok')
+        if active_tab not in REPORTS:
+            active_tab = 'stok'
         
         # Filter parameters
         search = self.request.GET.get('search', '')
         date_from = self.request.GET.get('date_from', '')
         date_to = self.request.GET.get('date_to', '')
-        
-        # Laporan Stok Barang
-        stok_items = Items.objects.filter(is_active=True)
-        if search:
-            stok_items = stok_items.filter(
-                Q(name__icontains=search) |
-                Q(code__icontains=search) |
-                Q(category__name__icontains=search)
-            )
-        stok_items = stok_items.select_related('category').order_by('-current_stock')
-        
-        # Categorize items by stock status
-        stok_items_list = list(stok_items)
-        in_stock_items = [item for item in stok_items_list if item.stock_status == 'in_stock']
-        low_stock_items = [item for item in stok_items_list if item.stock_status == 'low_stock']
-        out_of_stock_items = [item for item in stok_items_list if item.stock_status == 'out_of_stock']
-        
-        # Laporan Barang Masuk
-        incoming = IncomingTransaction.objects.all()
-        if search:
-            incoming = incoming.filter(
-                Q(item__name__icontains=search) |
-                Q(supplier__name__icontains=search) |
-                Q(notes__icontains=search)
-            )
-        if date_from:
-            incoming = incoming.filter(transaction_date__gte=date_from)
-        if date_to:
-            incoming = incoming.filter(transaction_date__lte=date_to)
-        incoming = incoming.select_related('item', 'supplier', 'received_by').order_by('-transaction_date')
-        
-        # Laporan Barang Keluar
-        outgoing = OutgoingTransaction.objects.all()
-        if search:
-            outgoing = outgoing.filter(
-                Q(item__name__icontains=search) |
-                Q(purpose__icontains=search) |
-                Q(notes__icontains=search)
-            )
-        if date_from:
-            outgoing = outgoing.filter(transaction_date__gte=date_from)
-        if date_to:
-            outgoing = outgoing.filter(transaction_date__lte=date_to)
-        outgoing = outgoing.select_related('item', 'released_by').order_by('-transaction_date')
-        
-        # Laporan Permintaan Barang
-        requests = RequestItems.objects.all()
-        if search:
-            requests = requests.filter(
-                Q(request_number__icontains=search) |
-                Q(item__name__icontains=search) |
-                Q(purpose__icontains=search)
-            )
-        if date_from:
-            requests = requests.filter(request_date__gte=date_from)
-        if date_to:
-            requests = requests.filter(request_date__lte=date_to)
-        requests = requests.select_related('item', 'requested_by', 'approved_by').order_by('-request_date')
-        
-        # Summary statistics per tab
-        stok_summary = {
-            'total_items': stok_items.count(),
-            'total_stock': stok_items.aggregate(total=Sum('current_stock'))['total'] or 0,
-            'low_stock_count': stok_items.filter(current_stock__lt=F('minimum_stock')).count(),
-            'in_stock_count': len(in_stock_items),
-            'out_of_stock_count': len(out_of_stock_items),
-        }
-        
-        incoming_summary = {
-            'total_transactions': incoming.count(),
-            'total_quantity': incoming.aggregate(total=Sum('quantity'))['total'] or 0,
-        }
-        
-        outgoing_summary = {
-            'total_transactions': outgoing.count(),
-            'total_quantity': outgoing.aggregate(total=Sum('quantity'))['total'] or 0,
-        }
-        
-        request_summary = {
-            'total_requests': requests.count(),
-            'pending': requests.filter(status='pending').count(),
-            'approved': requests.filter(status='approved').count(),
-            'rejected': requests.filter(status='rejected').count(),
+        as_of = self._parse_as_of(self.request.GET.get('as_of', ''))
+        
+        # Hanya tab aktif yang mengambil data (satu query, di-cache per filter);
+        # tab lain cukup jumlah baris untuk badge
+        reports = {slug: report_class(**_report_filters(self.request, as_of)) for slug, report_class in REPORTS.items()}
+        result = reports[active_tab].result()
+        if active_tab == 'stok':
+            # Satu reverse untuk semua baris; {% url %} per baris mendominasi waktu render
+            stock_card_url = reverse('item_stock_card', args=[0]).replace('/0/', '/{}/')
+            for row in result['rows']:
+                row['stock_card_url'] = stock_card_url.format(row['items_id'])
+        if active_tab == 'abc':
+            context.update({
+                'window': reports['abc'].window,
+                'windows': analysis_windows(),
+                'category_rows': CategoryAnalytics.objects.filter(
+                    window_days=reports['abc'].window
+                ).select_related('category'),
+            })
+        if active_tab == 'kedaluwarsa':
+            window = reports['kedaluwarsa'].window
+            context.update({
+                'window': window,
+                'windows': sorted({7, 30, 60, 90, expiry_warning_days(), window}),
+            })
+        tab_counts = {
+            slug: len(result['rows']) if slug == active_tab else report.count()
+            for slug, report in reports.items()
         }
         
         context.update({
@@ -135,380 +108,105 @@ class LaporanListView(DirekturRequiredMixin, TemplateView):
             'search': search,
             'date_from': date_from,
             'date_to': date_to,
-            
-            # Data per tab
-            'stok_items': stok_items,
-            'in_stock_items': in_stock_items,
-            'low_stock_items': low_stock_items,
-            'out_of_stock_items': out_of_stock_items,
-            'incoming_transactions': incoming,
-            'outgoing_transactions': outgoing,
-            'request_items': requests,
-            
-            # Summaries
-            'stok_summary': stok_summary,
-            'incoming_summary': incoming_summary,
-            'outgoing_summary': outgoing_summary,
-            'request_summary': request_summary,
+            'as_of': as_of,
+            'as_of_snapshot': nearest_snapshot_date(as_of) if as_of else None,
+            'rows': result['rows'],
+            'summary': result['summary'],
+            'tab_counts': tab_counts,
+            'export_query': self.request.GET.urlencode(),
         })
         
         return context
+    
+    def _parse_as_of(self, value):
+        """Tanggal 'per tanggal' untuk laporan stok; None = stok saat ini"""
+        if not value:
+            return None
+        as_of = _parse_date(value)
+        if as_of is None:
+            messages.warning(self.request, f'Format tanggal tidak valid: {value}')
+            return None
+        # Hari ini/masa depan: stok saat ini sudah merupakan jawabannya
+        if as_of >= timezone.localdate():
+            return None
+        return as_of
 
 
-class ExportPDFBarangMasukView(DirekturRequiredMixin, TemplateView):
+class StockAsOfView(DirekturRequiredMixin, View):
     """
-    Export Laporan Barang Masuk ke PDF
+    JSON stok barang per tanggal (point-in-time).
+    
+    Query params:
+    - date: tanggal (YYYY-MM-DD), wajib
+    - item, category: filter opsional (ID)
+    - page: halaman hasil (500 barang per halaman)
     """
-    def get(self, request, *args, **kwargs):
-        # Get filter parameters
-        search = request.GET.get('search', '')
-        date_from = request.GET.get('date_from', '')
-        date_to = request.GET.get('date_to', '')
-        
-        # Query data
-        incoming = IncomingTransaction.objects.all()
-        if search:
-            incoming = incoming.filter(
-                Q(item__name__icontains=search) |
-                Q(supplier__name__icontains=search) |
-                Q(notes__icontains=search)
-            )
-        if date_from:
-            incoming = incoming.filter(transaction_date__gte=date_from)
-        if date_to:
-            incoming = incoming.filter(transaction_date__lte=date_to)
-        incoming = incoming.select_related('item', 'supplier', 'received_by').order_by('-transaction_date')
-        
-        # Calculate summary
-        total_quantity = incoming.aggregate(total=Sum('quantity'))['total'] or 0
-        
-        # Generate PDF
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=landscape(A4),
-            rightMargin=1*cm,
-            leftMargin=1*cm,
-            topMargin=1.5*cm,
-            bottomMargin=1.5*cm
-        )
-        
-        # Container for PDF elements
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            textColor=colors.HexColor('#2c5aa0'),
-            spaceAfter=12,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        )
-        
-        subtitle_style = ParagraphStyle(
-            'CustomSubtitle',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=colors.grey,
-            spaceAfter=20,
-            alignment=TA_CENTER
-        )
-        
-        # Header Section
-        elements.append(Paragraph("LAPORAN BARANG MASUK", title_style))
-        elements.append(Paragraph("Sistem Informasi Manajemen Inventaris Gudang - PT Delimajaya", subtitle_style))
-        
-        # Info Section
-        info_data = [
-            ['Dicetak oleh:', request.session.get('name', 'Direktur'), 'Tanggal Cetak:', datetime.now().strftime('%d/%m/%Y %H:%M')],
-            ['Periode:', f"{date_from or 'Semua'} s/d {date_to or 'Sekarang'}", 'Total Transaksi:', str(incoming.count())],
-            ['Filter Pencarian:', search or '-', 'Total Quantity:', f"{total_quantity:,}"],
-        ]
-        
-        info_table = Table(info_data, colWidths=[3*cm, 6*cm, 3*cm, 6*cm])
-        info_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e9ecef')),
-            ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#e9ecef')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
-        elements.append(info_table)
-        elements.append(Spacer(1, 0.5*cm))
-        
-        # Table Header
-        table_data = [[
-            'No',
-            'No. Transaksi',
-            'Tanggal',
-            'Kode Barang',
-            'Nama Barang',
-            'Supplier',
-            'Quantity',
-            'Satuan',
-            'Status',
-            'Diterima Oleh'
-        ]]
-        
-        # Table Data
-        for idx, trans in enumerate(incoming, 1):
-            table_data.append([
-                str(idx),
-                trans.transaction_number,
-                trans.transaction_date.strftime('%d/%m/%Y'),
-                trans.item.code,
-                trans.item.name[:30] + '...' if len(trans.item.name) > 30 else trans.item.name,
-                trans.supplier.name[:20] + '...' if trans.supplier and len(trans.supplier.name) > 20 else (trans.supplier.name if trans.supplier else '-'),
-                str(trans.quantity),
-                trans.item.get_unit_display(),
-                trans.get_status_display(),
-                trans.received_by.name[:15] + '...' if trans.received_by and len(trans.received_by.name) > 15 else (trans.received_by.name if trans.received_by else '-'),
-            ])
-        
-        # Create table
-        table = Table(table_data, colWidths=[1*cm, 3*cm, 2.2*cm, 2.2*cm, 4*cm, 3.5*cm, 1.8*cm, 1.8*cm, 2*cm, 2.5*cm])
-        
-        # Table Style
-        table.setStyle(TableStyle([
-            # Header style
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5aa0')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('TOPPADDING', (0, 0), (-1, 0), 8),
-            
-            # Data rows style
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # No
-            ('ALIGN', (6, 1), (6, -1), 'RIGHT'),   # Quantity
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 1), (-1, -1), 5),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 5),
-            
-            # Alternating row colors
-            *[('BACKGROUND', (0, i), (-1, i), colors.HexColor('#f8f9fa')) for i in range(2, len(table_data), 2)]
-        ]))
-        
-        elements.append(table)
-        
-        # Footer
-        elements.append(Spacer(1, 0.5*cm))
-        footer_style = ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=8,
-            textColor=colors.grey,
-            alignment=TA_RIGHT
+    page_size = 500
+    
+    def get(self, request):
+        try:
+            day = datetime.strptime(request.GET.get('date', ''), '%Y-%m-%d').date()
+        except ValueError:
+            return JsonResponse({'error': 'Parameter date wajib diisi (YYYY-MM-DD).'}, status=400)
+        
+        items = Items.objects.order_by('items_id')
+        for param, field in [('item', 'items_id'), ('category', 'category_id')]:
+            value = request.GET.get(param)
+            if value:
+                if not value.isdigit():
+                    return JsonResponse({'error': f'ID filter tidak valid: {value}'}, status=400)
+                items = items.filter(**{field: int(value)})
+        
+        page = request.GET.get('page', '1')
+        page = int(page) if page.isdigit() and int(page) > 0 else 1
+        offset = (page - 1) * self.page_size
+        
+        rows = list(
+            stock_as_of_queryset(day, items).values(
+                'items_id', 'code', 'name', 'stock_as_of'
+            )[offset:offset + self.page_size + 1]
         )
-        elements.append(Paragraph(f"Dicetak pada: {datetime.now().strftime('%d %B %Y, %H:%M:%S')}", footer_style))
-        
-        # Build PDF
-        doc.build(elements)
-        
-        # Get PDF from buffer
-        pdf = buffer.getvalue()
-        buffer.close()
-        
-        # Create response
-        response = HttpResponse(content_type='application/pdf')
-        filename = f"laporan_barang_masuk_{datetime.now().strftime('%Y%m%d')}.pdf"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(pdf)
-        
-        return response
+        snapshot_date = nearest_snapshot_date(day)
+        
+        return JsonResponse({
+            'date': day.isoformat(),
+            'snapshot_date': snapshot_date.isoformat() if snapshot_date else None,
+            'page': page,
+            'has_next': len(rows) > self.page_size,
+            'items': [
+                {
+                    'id': row['items_id'],
+                    'code': row['code'],
+                    'name': row['name'],
+                    'stock': row['stock_as_of'],
+                }
+                for row in rows[:self.page_size]
+            ],
+        })
+    
+    def handle_no_permission(self):
+        return JsonResponse({'error': 'Akses ditolak.'}, status=403)
 
 
-class ExportPDFBarangKeluarView(DirekturRequiredMixin, TemplateView):
+class ReportExportView(DirekturRequiredMixin, View):
     """
-    Export Laporan Barang Keluar ke PDF
+    Export laporan (stok, barang masuk, barang keluar, permintaan) ke PDF/CSV
+    dengan filter yang sama seperti halaman laporan.
     """
-    def get(self, request, *args, **kwargs):
-        # Get filter parameters
-        search = request.GET.get('search', '')
-        date_from = request.GET.get('date_from', '')
-        date_to = request.GET.get('date_to', '')
-        
-        # Query data
-        outgoing = OutgoingTransaction.objects.all()
-        if search:
-            outgoing = outgoing.filter(
-                Q(item__name__icontains=search) |
-                Q(purpose__icontains=search) |
-                Q(notes__icontains=search)
-            )
-        if date_from:
-            outgoing = outgoing.filter(transaction_date__gte=date_from)
-        if date_to:
-            outgoing = outgoing.filter(transaction_date__lte=date_to)
-        outgoing = outgoing.select_related('item', 'released_by').order_by('-transaction_date')
-        
-        # Calculate summary
-        total_quantity = outgoing.aggregate(total=Sum('quantity'))['total'] or 0
-        
-        # Generate PDF
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=landscape(A4),
-            rightMargin=1*cm,
-            leftMargin=1*cm,
-            topMargin=1.5*cm,
-            bottomMargin=1.5*cm
-        )
-        
-        # Container for PDF elements
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            textColor=colors.HexColor('#2c5aa0'),
-            spaceAfter=12,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        )
-        
-        subtitle_style = ParagraphStyle(
-            'CustomSubtitle',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=colors.grey,
-            spaceAfter=20,
-            alignment=TA_CENTER
-        )
-        
-        # Header Section
-        elements.append(Paragraph("LAPORAN BARANG KELUAR", title_style))
-        elements.append(Paragraph("Sistem Informasi Manajemen Inventaris Gudang - PT Delimajaya", subtitle_style))
-        
-        # Info Section
-        info_data = [
-            ['Dicetak oleh:', request.session.get('name', 'Direktur'), 'Tanggal Cetak:', datetime.now().strftime('%d/%m/%Y %H:%M')],
-            ['Periode:', f"{date_from or 'Semua'} s/d {date_to or 'Sekarang'}", 'Total Transaksi:', str(outgoing.count())],
-            ['Filter Pencarian:', search or '-', 'Total Quantity:', f"{total_quantity:,}"],
-        ]
-        
-        info_table = Table(info_data, colWidths=[3*cm, 6*cm, 3*cm, 6*cm])
-        info_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e9ecef')),
-            ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#e9ecef')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
-        elements.append(info_table)
-        elements.append(Spacer(1, 0.5*cm))
-        
-        # Table Header
-        table_data = [[
-            'No',
-            'No. Transaksi',
-            'Tanggal',
-            'Kode Barang',
-            'Nama Barang',
-            'Tujuan/Keperluan',
-            'Quantity',
-            'Satuan',
-            'Status',
-            'Dikeluarkan Oleh'
-        ]]
-        
-        # Table Data
-        for idx, trans in enumerate(outgoing, 1):
-            table_data.append([
-                str(idx),
-                trans.transaction_number,
-                trans.transaction_date.strftime('%d/%m/%Y'),
-                trans.item.code,
-                trans.item.name[:30] + '...' if len(trans.item.name) > 30 else trans.item.name,
-                trans.purpose[:25] + '...' if len(trans.purpose) > 25 else trans.purpose,
-                str(trans.quantity),
-                trans.item.get_unit_display(),
-                trans.get_status_display(),
-                trans.released_by.name[:15] + '...' if trans.released_by and len(trans.released_by.name) > 15 else (trans.released_by.name if trans.released_by else '-'),
-            ])
-        
-        # Create table
-        table = Table(table_data, colWidths=[1*cm, 3*cm, 2.2*cm, 2.2*cm, 4*cm, 4*cm, 1.8*cm, 1.8*cm, 2*cm, 2.5*cm])
-        
-        # Table Style
-        table.setStyle(TableStyle([
-            # Header style
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5aa0')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('TOPPADDING', (0, 0), (-1, 0), 8),
-            
-            # Data rows style
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # No
-            ('ALIGN', (6, 1), (6, -1), 'RIGHT'),   # Quantity
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 1), (-1, -1), 5),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 5),
-            
-            # Alternating row colors
-            *[('BACKGROUND', (0, i), (-1, i), colors.HexColor('#f8f9fa')) for i in range(2, len(table_data), 2)]
-        ]))
-        
-        elements.append(table)
-        
-        # Footer
-        elements.append(Spacer(1, 0.5*cm))
-        footer_style = ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=8,
-            textColor=colors.grey,
-            alignment=TA_RIGHT
-        )
-        elements.append(Paragraph(f"Dicetak pada: {datetime.now().strftime('%d %B %Y, %H:%M:%S')}", footer_style))
-        
-        # Build PDF
-        doc.build(elements)
-        
-        # Get PDF from buffer
-        pdf = buffer.getvalue()
-        buffer.close()
-        
-        # Create response
-        response = HttpResponse(content_type='application/pdf')
-        filename = f"laporan_barang_keluar_{datetime.now().strftime('%Y%m%d')}.pdf"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(pdf)
-        
-        return response
+    formats = ('pdf', 'csv')
+    
+    def get(self, request, slug, fmt):
+        if slug not in REPORTS or fmt not in self.formats:
+            raise Http404('Laporan tidak ditemukan.')
+        
+        as_of = _parse_date(request.GET.get('as_of', ''))
+        if as_of and as_of >= timezone.localdate():
+            as_of = None
+        report = REPORTS[slug](**_report_filters(request, as_of))
+        
+        if fmt == 'csv':
+            return report.csv_response()
+        return report.pdf_response(request.session.get('name', 'Direktur'))
 
 
 class HistoriAktivitasView(DirekturRequiredMixin, ListView):
@@ -638,3 +336,81 @@ class HistoriAktivitasView(DirekturRequiredMixin, ListView):
         context['request_count'] = sum(1 for a in all_activities if a['type'] == 'request')
         
         return context
+
+
+class RekonsiliasiStokView(DirekturRequiredMixin, TemplateView):
+    """
+    Laporan rekonsiliasi stok (read only):
+    selisih stok tercatat vs histori transaksi + riwayat koreksi stok.
+    Perbaikan dilakukan lewat command `reconcile_stock --repair`.
+    """
+    template_name = 'inventory/director/stock_reconciliation.html'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        discrepancies = find_discrepancies()
+        
+        context['discrepancies'] = discrepancies
+        context['discrepancy_count'] = len(discrepancies)
+        context['surplus_total'] = sum(row['difference'] for row in discrepancies if row['difference'] > 0)
+        context['shortage_total'] = sum(-row['difference'] for row in discrepancies if row['difference'] < 0)
+        context['adjustments'] = StockAdjustment.objects.select_related('item', 'created_by')[:20]
+        return context
+
+
+class AuditLogView(DirekturRequiredMixin, TemplateView):
+    """
+    Audit log perubahan field, terbaru dulu. Paginasi keyset (?before=<id>) di atas
+    index (jenis data, id data) dan (user), sehingga tanpa COUNT maupun OFFSET.
+    """
+    template_name = 'inventory/director/audit_log.html'
+    page_size = 50
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        params = self.request.GET
+        logs = AuditLog.objects.select_related('user')
+        
+        object_type = params.get('type', '')
+        object_id = params.get('object', '')
+        user_id = params.get('user', '')
+        date_from = parse_date(params.get('date_from', '') or '')
+        date_to = parse_date(params.get('date_to', '') or '')
+        before = params.get('before', '')
+        
+        if object_type in OBJECT_TYPES:
+            logs = logs.filter(object_type=object_type)
+            if object_id.isdigit():
+                logs = logs.filter(object_id=int(object_id))
+        if user_id.isdigit():
+            logs = logs.filter(user_id=int(user_id))
+        if date_from:
+            logs = logs.filter(created_at__gte=timezone.make_aware(datetime.combine(date_from, datetime.min.time())))
+        if date_to:
+            logs = logs.filter(created_at__lt=timezone.make_aware(datetime.combine(date_to + timedelta(days=1), datetime.min.time())))
+        if before.isdigit():
+            logs = logs.filter(audit_id__lt=int(before))
+        
+        entries = list(logs.order_by('-audit_id')[:self.page_size + 1])
+        has_more = len(entries) > self.page_size
+        entries = entries[:self.page_size]
+        for entry in entries:
+            entry.type_label = OBJECT_TYPES.get(entry.object_type, entry.object_type)
+            entry.rows = describe(entry)
+        
+        querystring = params.copy()
+        querystring.pop('before', None)
+        context.update({
+            'entries': entries,
+            'next_cursor': entries[-1].audit_id if has_more else None,
+            'is_first_page': not before.isdigit(),
+            'querystring': querystring.urlencode(),
+            'object_types': list(OBJECT_TYPES.items()),
+            'users': User.objects.order_by('name').only('user_id', 'name'),
+            'object_type': object_type,
+            'object_id': object_id,
+            'user_filter': user_id,
+            'date_from': params.get('date_from', ''),
+            'date_to': params.get('date_to', ''),
+        })
+        return context
@@ -0,0 +1,214 @@
+"""
+Forecasting pemakaian barang & saran reorder point.
+
+Alur:
+1. Satu query GROUP BY (item, tanggal) atas barang keluar `released`.
+2. Hasil dibentuk menjadi matriks padat item x hari (NumPy), per chunk item
+   agar memori tetap terkendali untuk katalog besar.
+3. Rata-rata bergerak, variabilitas, dan safety stock dihitung vektor untuk
+   seluruh chunk sekaligus (tanpa loop per barang).
+"""
+import math
+from datetime import timedelta
+from statistics import NormalDist
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import audit
+from .models import Items, OutgoingTransaction, ReorderSuggestion, StockAlert
+
+
+def load_daily_demand(start, end):
+    """
+    Return (item_ids, day_index, quantity) sebagai array NumPy dari satu query
+    grouped untuk seluruh katalog.
+    """
+    rows = OutgoingTransaction.objects.filter(
+        status='released',
+        transaction_date__gte=start,
+        transaction_date__lte=end,
+    ).values('item_id', 'transaction_date').annotate(
+        total=Sum('quantity')
+    ).values_list('item_id', 'transaction_date', 'total').order_by()
+
+    rows = list(rows)
+    if not rows:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, np.array([], dtype=np.float64)
+
+    item_ids, dates, totals = zip(*rows)
+    day_index = (
+        np.array(dates, dtype='datetime64[D]') - np.datetime64(start, 'D')
+    ).astype(np.int64)
+    return (
+        np.array(item_ids, dtype=np.int64),
+        day_index,
+        np.array(totals, dtype=np.float64),
+    )
+
+
+def _rolling_stats(matrix, first_day, window_days, lead_time_days):
+    """
+    Statistik pemakaian untuk satu chunk matriks item x hari.
+    `first_day` = indeks hari pertama barang tercatat (hari sebelum barang dibuat
+    tidak ikut dihitung sebagai pemakaian nol).
+    """
+    n_items, n_days = matrix.shape
+    rows = np.arange(n_items)
+
+    cumsum = np.zeros((n_items, n_days + 1))
+    np.cumsum(matrix, axis=1, out=cumsum[:, 1:])
+    cumsum_sq = np.zeros((n_items, n_days + 1))
+    np.cumsum(matrix ** 2, axis=1, out=cumsum_sq[:, 1:])
+
+    # Moving average & std harian pada window terakhir (dibatasi umur barang)
+    valid_days = np.clip(n_days - first_day, 1, n_days)
+    window = np.minimum(window_days, valid_days)
+    window_start = n_days - window
+    window_sum = cumsum[:, -1] - cumsum[rows, window_start]
+    window_sum_sq = cumsum_sq[:, -1] - cumsum_sq[rows, window_start]
+    avg_daily = window_sum / window
+    daily_var = np.maximum(window_sum_sq / window - avg_daily ** 2, 0)
+
+    # Variabilitas pemakaian selama lead time: std dari rolling sum L hari
+    # yang seluruhnya berada di dalam window yang sama
+    lead = max(1, min(lead_time_days, n_days))
+    lead_sums = cumsum[:, lead:] - cumsum[:, :-lead]
+    start_idx = np.arange(lead_sums.shape[1])
+    mask = start_idx[np.newaxis, :] >= window_start[:, np.newaxis]
+    counts = mask.sum(axis=1)
+    safe_counts = np.maximum(counts, 1)
+    lead_mean = (lead_sums * mask).sum(axis=1) / safe_counts
+    lead_var = np.maximum((lead_sums ** 2 * mask).sum(axis=1) / safe_counts - lead_mean ** 2, 0)
+    lead_std = np.sqrt(lead_var)
+
+    # Barang yang umurnya lebih pendek dari lead time: pakai pendekatan sqrt(L)
+    fallback = np.sqrt(daily_var) * math.sqrt(lead)
+    lead_std = np.where(counts > 1, lead_std, fallback)
+
+    return avg_daily, np.sqrt(daily_var), lead_std
+
+
+def compute_reorder_suggestions(history_days=365, window_days=90, lead_time_days=7,
+                                review_days=30, service_level=0.95, chunk_size=2000, today=None):
+    """
+    Hitung ulang ReorderSuggestion untuk semua barang aktif.
+    Return jumlah barang yang diproses.
+    """
+    today = today or timezone.localdate()
+    start = today - timedelta(days=history_days - 1)
+    z = NormalDist().inv_cdf(service_level)
+    computed_at = timezone.now()
+
+    items = list(
+        Items.objects.filter(is_active=True).order_by('items_id').values_list('items_id', 'created_at')
+    )
+    if not items:
+        return 0
+
+    item_ids = np.array([pk for pk, _ in items], dtype=np.int64)
+    created_days = np.array(
+        [(timezone.localdate(created) - start).days if created else 0 for _, created in items],
+        dtype=np.int64,
+    )
+    first_day = np.clip(created_days, 0, history_days - 1)
+
+    demand_items, demand_days, demand_qty = load_daily_demand(start, today)
+
+    # Petakan item_id ke indeks baris; buang baris dari barang nonaktif
+    positions = np.searchsorted(item_ids, demand_items)
+    positions = np.clip(positions, 0, len(item_ids) - 1)
+    known = item_ids[positions] == demand_items
+    positions, demand_days, demand_qty = positions[known], demand_days[known], demand_qty[known]
+
+    order = np.argsort(positions, kind='stable')
+    positions, demand_days, demand_qty = positions[order], demand_days[order], demand_qty[order]
+
+    processed = 0
+    for chunk_start in range(0, len(item_ids), chunk_size):
+        chunk_end = min(chunk_start + chunk_size, len(item_ids))
+        lo, hi = np.searchsorted(positions, [chunk_start, chunk_end])
+
+        matrix = np.zeros((chunk_end - chunk_start, history_days))
+        matrix[positions[lo:hi] - chunk_start, demand_days[lo:hi]] = demand_qty[lo:hi]
+
+        avg_daily, daily_std, lead_std = _rolling_stats(
+            matrix, first_day[chunk_start:chunk_end], window_days, lead_time_days
+        )
+        safety_stock = np.ceil(z * lead_std)
+        reorder_point = np.ceil(avg_daily * lead_time_days + safety_stock)
+        reorder_quantity = np.ceil(avg_daily * review_days)
+
+        suggestions = [
+            ReorderSuggestion(
+                item_id=int(item_ids[chunk_start + i]),
+                avg_daily_demand=float(avg_daily[i]),
+                demand_std=float(daily_std[i]),
+                lead_time_demand_std=float(lead_std[i]),
+                safety_stock=int(safety_stock[i]),
+                reorder_point=int(reorder_point[i]),
+                reorder_quantity=int(reorder_quantity[i]),
+                history_days=history_days,
+                window_days=window_days,
+                lead_time_days=lead_time_days,
+                service_level=service_level,
+                computed_at=computed_at,
+            )
+            for i in range(chunk_end - chunk_start)
+        ]
+        ReorderSuggestion.objects.bulk_create(
+            suggestions,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['item'],
+            update_fields=[
+                'avg_daily_demand', 'demand_std', 'lead_time_demand_std', 'safety_stock',
+                'reorder_point', 'reorder_quantity', 'history_days', 'window_days',
+                'lead_time_days', 'service_level', 'computed_at',
+            ],
+        )
+        processed += len(suggestions)
+
+    return processed
+
+
+def apply_suggestions(suggestions, user_id=None):
+    """
+    Terapkan reorder point sebagai `minimum_stock` barang secara bulk.
+    Return jumlah barang yang berubah.
+    """
+    now = timezone.now()
+    changed = []
+
+    with transaction.atomic():
+        suggestions = list(suggestions.select_related('item'))
+        for suggestion in suggestions:
+            item = suggestion.item
+            if item.minimum_stock == suggestion.reorder_point:
+                continue
+            changed.append((item, item.minimum_stock))
+            item.minimum_stock = suggestion.reorder_point
+            item.updated_by_id = user_id
+            item.updated_at = now
+            # Form edit barang yang sedang terbuka harus melihat perubahan ini sebagai konflik
+            item.version = F('version') + 1
+
+        Items.objects.bulk_update(
+            [item for item, _ in changed],
+            ['minimum_stock', 'updated_by', 'updated_at', 'version'],
+            batch_size=500
+        )
+        ReorderSuggestion.objects.filter(
+            pk__in=[s.pk for s in suggestions]
+        ).update(applied_at=now)
+
+        # Threshold baru bisa membuka/menutup alert, hanya untuk barang yang berubah
+        for item, old_minimum in changed:
+            StockAlert.track(item, item.current_stock, old_minimum=old_minimum)
+            # bulk_update tidak memanggil signal audit
+            audit.record_change(item, 'update', {'minimum_stock': [old_minimum, item.minimum_stock]}, user_id=user_id)
+
+    return len(changed)
@@ -1,10 +1,38 @@
 from django import forms
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Submit, Div, Field, HTML, Row, Column
 from crispy_forms.bootstrap import FormActions
-from .models import User, Category, Supplier, Items, IncomingTransaction, OutgoingTransaction, RequestItems
-
-class UserForm(forms.ModelForm):
+from .models import (
+    User, Category, Supplier, Items, IncomingTransaction, OutgoingTransaction, RequestItems, Location, ItemStock,
+    StockTransfer,
+)
+from .widgets import ItemLookupWidget
+
+
+class CachedHelperMixin:
+    """
+    FormHelper crispy dibangun sekali per class form, saat pertama dipakai oleh
+    `{% crispy form %}`, bukan di setiap __init__. Layout hanya berisi nama field
+    sehingga aman dipakai bersama semua instance; subclass mendefinisikan `build_layout()`.
+    """
+
+    @property
+    def helper(self):
+        cls = type(self)
+        helper = cls.__dict__.get('_cached_helper')
+        if helper is None:
+            if not hasattr(cls, 'build_layout'):
+                raise ImproperlyConfigured(f'{cls.__name__} harus mendefinisikan classmethod build_layout().')
+            helper = FormHelper()
+            helper.form_method = 'post'
+            helper.layout = cls.build_layout()
+            cls._cached_helper = helper
+        return helper
+
+
+class UserForm(CachedHelperMixin, forms.ModelForm):
     """Form for creating and updating user accounts"""
 
     password = forms.CharField(
@@ -29,11 +57,9 @@ class UserForm(forms.ModelForm):
             'role': forms.Select(attrs={'class': 'form-control'}),
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
-        self.helper.form_method = 'post'
-        self.helper.layout = Layout(
+    @classmethod
+    def build_layout(cls):
+        return Layout(
             Div(
                 Field('name', css_class='mb-3'),
                 Field('username', css_class='mb-3'),
@@ -48,6 +74,9 @@ class UserForm(forms.ModelForm):
                 HTML('<a href="{% url \'user_list\' %}" class="btn btn-secondary">Batal</a>'),
             )
         )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         
         # Make password optional when updating
         if self.instance and self.instance.pk:
@@ -101,7 +130,7 @@ class UserForm(forms.ModelForm):
         return user
 
 
-class UserUpdateForm(forms.ModelForm):
+class UserUpdateForm(CachedHelperMixin, forms.ModelForm):
     """Form for updating user information without password"""
     
     class Meta:
@@ -113,11 +142,9 @@ class UserUpdateForm(forms.ModelForm):
             'role': forms.Select(attrs={'class': 'form-control'}),
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
-        self.helper.form_method = 'post'
-        self.helper.layout = Layout(
+    @classmethod
+    def build_layout(cls):
+        return Layout(
             Div(
                 Field('name', css_class='mb-3'),
                 Field('username', css_class='mb-3'),
@@ -141,7 +168,7 @@ class UserUpdateForm(forms.ModelForm):
         return username
 
 
-class ResetPasswordForm(forms.Form):
+class ResetPasswordForm(CachedHelperMixin, forms.Form):
     """Form for resetting user password by admin"""
     
     new_password = forms.CharField(
@@ -165,11 +192,9 @@ class ResetPasswordForm(forms.Form):
         widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
     )
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
-        self.helper.form_method = 'post'
-        self.helper.layout = Layout(
+    @classmethod
+    def build_layout(cls):
+        return Layout(
             Div(
                 Field('new_password', css_class='mb-3'),
                 Field('confirm_password', css_class='mb-3'),
@@ -194,7 +219,7 @@ class ResetPasswordForm(forms.Form):
 
         return cleaned_data
     
-class CategoryForm(forms.ModelForm):
+class CategoryForm(CachedHelperMixin, forms.ModelForm):
     """Form untuk kategori barang"""
     
     class Meta:
@@ -205,11 +230,9 @@ class CategoryForm(forms.ModelForm):
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'Deskripsi kategori (opsional)'}),
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
-        self.helper.form_method = 'post'
-        self.helper.layout = Layout(
+    @classmethod
+    def build_layout(cls):
+        return Layout(
             Field('name', css_class='mb-3'),
             Field('description', css_class='mb-3'),
             FormActions(
@@ -218,7 +241,7 @@ class CategoryForm(forms.ModelForm):
             )
         )
 
-class SupplierForm(forms.ModelForm):
+class SupplierForm(CachedHelperMixin, forms.ModelForm):
     """Form untuk data supplier"""
     class Meta:
         model = Supplier
@@ -231,12 +254,9 @@ class SupplierForm(forms.ModelForm):
             'email': forms.EmailInput(attrs={'class': 'form-control', 'placeholder': 'email@supplier.com'}),
             'address': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'Alamat lengkap supplier'}),
         }
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.fields['code'].required = False
-        self.helper = FormHelper()
-        self.helper.form_method = 'post'
-        self.helper.layout = Layout(
+    @classmethod
+    def build_layout(cls):
+        return Layout(
             Row(
                 Column(Field('code', css_class='mb-3'), css_class='col-md-6'),
                 Column(Field('name', css_class='mb-3'), css_class='col-md-6'),
@@ -250,9 +270,14 @@ class SupplierForm(forms.ModelForm):
             Field('is_active', css_class='form-check-input mb-3'),
             FormActions(
                 Submit('submit', 'Simpan', css_class='btn btn-primary'),
-                HTML('<a href="/suppliers/" class="btn btn-secondary">Batal</a>'),
+                HTML('<a href="{% url \'supplier_list\' %}" class="btn btn-secondary">Batal</a>'),
             )
         )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['code'].required = False
+
     def clean(self):
         cleaned_data = super().clean()
         name = cleaned_data.get('name')
@@ -272,34 +297,22 @@ class SupplierForm(forms.ModelForm):
             self.data['code'] = code
         return cleaned_data
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
-        self.helper.form_method = 'post'
-        self.helper.layout = Layout(
-            Row(
-                Column(Field('code', css_class='mb-3'), css_class='col-md-6'),
-                Column(Field('name', css_class='mb-3'), css_class='col-md-6'),
-            ),
-            Row(
-                Column(Field('contact_person', css_class='mb-3'), css_class='col-md-6'),
-                Column(Field('phone', css_class='mb-3'), css_class='col-md-6'),
-            ),
-            Field('email', css_class='mb-3'),
-            Field('address', css_class='mb-3'),
-            Field('is_active', css_class='form-check-input mb-3'),
-            FormActions(
-                Submit('submit', 'Simpan', css_class='btn btn-primary'),
-                HTML('<a href="{% url \'supplier_list\' %}" class="btn btn-secondary">Batal</a>'),
-            )
-        )
 
-class ItemForm(forms.ModelForm):
+def _optional_version(form):
+    """
+    Versi wajib di form edit: tanpa versi UPDATE bersyarat (optimistic locking) terlewati
+    dan perubahan pengguna lain tertimpa diam-diam. Form tambah memakai default model.
+    """
+    form.fields['version'].required = form.instance.pk is not None
+
+
+class ItemForm(CachedHelperMixin, forms.ModelForm):
     """Form untuk master barang"""
     class Meta:
         model = Items
-        fields = ['code', 'name', 'category', 'unit', 'minimum_stock', 'description', 'is_active']
+        fields = ['code', 'name', 'category', 'unit', 'minimum_stock', 'description', 'is_active', 'version']
         widgets = {
+            'version': forms.HiddenInput(),
             'code': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'BRG001'}),
             'name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Nama Barang'}),
             'category': forms.Select(attrs={'class': 'form-control'}),
@@ -308,11 +321,9 @@ class ItemForm(forms.ModelForm):
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'Deskripsi barang (opsional)'}),
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
-        self.helper.form_method = 'post'
-        self.helper.layout = Layout(
+    @classmethod
+    def build_layout(cls):
+        return Layout(
             Row(
                 Column(Field('code', css_class='mb-3'), css_class='col-md-6'),
                 Column(Field('name', css_class='mb-3'), css_class='col-md-6'),
@@ -324,53 +335,97 @@ class ItemForm(forms.ModelForm):
             ),
             Field('description', css_class='mb-3'),
             Field('is_active', css_class='form-check-input mb-3'),
+            Field('version'),
             FormActions(
                 Submit('submit', 'Simpan', css_class='btn btn-primary'),
                 HTML('<a href="{% url \'item_list\' %}" class="btn btn-secondary">Batal</a>'),
             )
         )
 
-class IncomingTransactionForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _optional_version(self)
+
+    def clean_is_active(self):
+        is_active = self.cleaned_data.get('is_active')
+        if is_active and self.instance.purge_started_at:
+            raise forms.ValidationError('Barang sedang dihapus permanen dan tidak dapat diaktifkan kembali.')
+        return is_active
+
+def _limit_locations(form, field='location'):
+    """Pilihan lokasi aktif (plus lokasi yang sudah terpasang); kosong = lokasi default"""
+    current = getattr(form.instance, f'{field}_id', None)
+    form.fields[field].queryset = Location.objects.filter(Q(is_active=True) | Q(pk=current))
+    form.fields[field].empty_label = '-- Lokasi default --'
+
+
+class IncomingTransactionForm(CachedHelperMixin, forms.ModelForm):
     """Form untuk transaksi barang masuk"""
     
     transaction_date = forms.DateField(
         widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
         label='Tanggal Transaksi'
     )
+    expiry_date = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label='Tanggal Kedaluwarsa',
+        help_text='Kosongkan jika barang tidak kedaluwarsa'
+    )
     
     class Meta:
         model = IncomingTransaction
-        fields = ['item', 'supplier', 'quantity', 'transaction_date', 'status', 'notes']
+        fields = [
+            'item', 'supplier', 'location', 'quantity', 'lot_number', 'expiry_date',
+            'transaction_date', 'status', 'notes', 'version',
+        ]
         widgets = {
-            'item': forms.Select(attrs={'class': 'form-control'}),
+            'version': forms.HiddenInput(),
+            'item': ItemLookupWidget(attrs={'class': 'form-control'}),
             'supplier': forms.Select(attrs={'class': 'form-control'}),
+            'location': forms.Select(attrs={'class': 'form-control'}),
             'quantity': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Jumlah', 'min': '1'}),
+            'lot_number': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Kosongkan = nomor transaksi'}),
             'status': forms.Select(attrs={'class': 'form-control'}),
             'notes': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'Catatan (opsional)'}),
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
-        self.helper.form_method = 'post'
-        self.helper.layout = Layout(
+    @classmethod
+    def build_layout(cls):
+        return Layout(
             Row(
                 Column(Field('item', css_class='mb-3'), css_class='col-md-6'),
                 Column(Field('supplier', css_class='mb-3'), css_class='col-md-6'),
             ),
+            Field('location', css_class='mb-3'),
             Row(
                 Column(Field('quantity', css_class='mb-3'), css_class='col-md-4'),
                 Column(Field('transaction_date', css_class='mb-3'), css_class='col-md-4'),
                 Column(Field('status', css_class='mb-3'), css_class='col-md-4'),
             ),
+            Row(
+                Column(Field('lot_number', css_class='mb-3'), css_class='col-md-6'),
+                Column(Field('expiry_date', css_class='mb-3'), css_class='col-md-6'),
+            ),
             Field('notes', css_class='mb-3'),
+            Field('version'),
             FormActions(
                 Submit('submit', 'Simpan', css_class='btn btn-primary'),
                 HTML('<a href="{% url \'incoming_list\' %}" class="btn btn-secondary">Batal</a>'),
             )
         )
 
-class OutgoingTransactionForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        # Validasi cukup satu lookup pk; barang nonaktif hanya diterima jika sudah terpasang di transaksi
+        self.fields['item'].queryset = Items.objects.filter(
+            Q(is_active=True) | Q(pk=self.instance.item_id)
+        )
+        _limit_locations(self)
+        _optional_version(self)
+
+class OutgoingTransactionForm(CachedHelperMixin, forms.ModelForm):
     """Form untuk transaksi barang keluar"""
     
     transaction_date = forms.DateField(
@@ -379,21 +434,24 @@ class OutgoingTransactionForm(forms.ModelForm):
     )
     class Meta:
         model = OutgoingTransaction
-        fields = ['item', 'quantity', 'transaction_date', 'purpose', 'status', 'notes']
+        fields = ['item', 'location', 'quantity', 'transaction_date', 'purpose', 'status', 'notes', 'version']
         widgets = {
-            'item': forms.Select(attrs={'class': 'form-control'}),
+            'version': forms.HiddenInput(),
+            'item': ItemLookupWidget(attrs={'class': 'form-control'}),
+            'location': forms.Select(attrs={'class': 'form-control'}),
             'quantity': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Jumlah', 'min': '1'}),
             'purpose': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Tujuan/Keperluan'}),
             'status': forms.Select(attrs={'class': 'form-control'}),
             'notes': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'Catatan (opsional)'}),
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
-        self.helper.form_method = 'post'
-        self.helper.layout = Layout(
-            Field('item', css_class='mb-3'),
+    @classmethod
+    def build_layout(cls):
+        return Layout(
+            Row(
+                Column(Field('item', css_class='mb-3'), css_class='col-md-6'),
+                Column(Field('location', css_class='mb-3'), css_class='col-md-6'),
+            ),
             Row(
                 Column(Field('quantity', css_class='mb-3'), css_class='col-md-4'),
                 Column(Field('transaction_date', css_class='mb-3'), css_class='col-md-4'),
@@ -401,38 +459,57 @@ class OutgoingTransactionForm(forms.ModelForm):
             ),
             Field('purpose', css_class='mb-3'),
             Field('notes', css_class='mb-3'),
+            Field('version'),
             FormActions(
                 Submit('submit', 'Simpan', css_class='btn btn-primary'),
                 HTML('<a href="{% url \'outgoing_list\' %}" class="btn btn-secondary">Batal</a>'),
             )
         )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        # Validasi cukup satu lookup pk; barang nonaktif hanya diterima jika sudah terpasang di transaksi
+        self.fields['item'].queryset = Items.objects.filter(
+            Q(is_active=True) | Q(pk=self.instance.item_id)
+        )
+        _limit_locations(self)
+        _optional_version(self)
+
     def clean(self):
         cleaned_data = super().clean()
         item = cleaned_data.get('item')
         quantity = cleaned_data.get('quantity')
         status = cleaned_data.get('status')
+        location = cleaned_data.get('location') or Location.get_default()
         
-        # Validate stock if status is released
+        # Validate stock if status is released (saldo di lokasi pengambilan)
         if item and quantity and status == 'released':
-            if item.current_stock < quantity:
+            available = ItemStock.quantity_at(item, location)
+            old = self.instance
+            if old.pk and old.status == 'released' and old.item_id == item.pk and old.location_id == location.pk:
+                # Edit transaksi yang sudah mengurangi saldo lokasi ini
+                available += old.quantity
+            if available < quantity:
                 raise forms.ValidationError(
-                    f'Stok tidak mencukupi! Stok saat ini: {item.current_stock} {item.unit}'
+                    f'Stok tidak mencukupi! Stok di {location.name}: {available} {item.unit}'
                 )
         
         return cleaned_data
 
-class RequestItemForm(forms.ModelForm):
+class RequestItemForm(CachedHelperMixin, forms.ModelForm):
     """Form untuk permintaan barang dari pegawai produksi"""
     
     class Meta:
         model = RequestItems
-        fields = ['item', 'quantity', 'request_date', 'needed_date', 'purpose', 'notes']
+        fields = ['item', 'location', 'quantity', 'request_date', 'needed_date', 'purpose', 'notes']
         widgets = {
             'request_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'needed_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'purpose': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Contoh: Produksi Batch #123'}),
             'notes': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'Catatan tambahan (opsional)'}),
+            'item': ItemLookupWidget(attrs={'class': 'form-control'}),
+            'location': forms.Select(attrs={'class': 'form-control'}),
         }
         labels = {
             'item': 'Pilih Barang',
@@ -443,16 +520,15 @@ class RequestItemForm(forms.ModelForm):
             'notes': 'Catatan',
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
-        self.helper.form_method = 'post'
-        self.helper.layout = Layout(
+    @classmethod
+    def build_layout(cls):
+        return Layout(
             Row(
                 Column('item', css_class='form-group col-md-6 mb-0'),
                 Column('quantity', css_class='form-group col-md-6 mb-0'),
                 css_class='form-row'
             ),
+            Field('location', css_class='mb-3'),
             Row(
                 Column('request_date', css_class='form-group col-md-6 mb-0'),
                 Column('needed_date', css_class='form-group col-md-6 mb-0'),
@@ -461,9 +537,13 @@ class RequestItemForm(forms.ModelForm):
             Field('purpose', css_class='mb-3'),
             Field('notes', css_class='mb-3'),
         )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         
         # Filter only active items
         self.fields['item'].queryset = Items.objects.filter(is_active=True)
+        _limit_locations(self)
 
     def clean(self):
         cleaned_data = super().clean()
@@ -488,7 +568,7 @@ class RequestItemForm(forms.ModelForm):
         return cleaned_data
 
 
-class ApproveRequestForm(forms.ModelForm):
+class ApproveRequestForm(CachedHelperMixin, forms.ModelForm):
     """Form untuk approve/reject permintaan barang (untuk Admin/Gudang)"""
     
     class Meta:
@@ -499,14 +579,15 @@ class ApproveRequestForm(forms.ModelForm):
             'rejection_reason': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'Alasan penolakan (wajib diisi jika ditolak)'}),
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
-        self.helper.form_method = 'post'
-        self.helper.layout = Layout(
+    @classmethod
+    def build_layout(cls):
+        return Layout(
             Field('status', css_class='mb-3'),
             Field('rejection_reason', css_class='mb-3'),
         )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         
         # Limit status choices to approved/rejected only
         self.fields['status'].choices = [
@@ -525,3 +606,115 @@ class ApproveRequestForm(forms.ModelForm):
             raise forms.ValidationError('Alasan penolakan wajib diisi jika permintaan ditolak!')
         
         return cleaned_data
+
+
+class LocationForm(CachedHelperMixin, forms.ModelForm):
+    """Form untuk master lokasi penyimpanan"""
+
+    class Meta:
+        model = Location
+        fields = ['code', 'name', 'description', 'is_default', 'is_active']
+        widgets = {
+            'code': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Contoh: RAK-A1'}),
+            'name': forms.TextInput(attrs={'class': 'form-control'}),
+            'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
+        }
+
+    @classmethod
+    def build_layout(cls):
+        return Layout(
+            Row(
+                Column(Field('code', css_class='mb-3'), css_class='col-md-6'),
+                Column(Field('name', css_class='mb-3'), css_class='col-md-6'),
+            ),
+            Field('description', css_class='mb-3'),
+            Field('is_default', css_class='form-check-input mb-3'),
+            Field('is_active', css_class='form-check-input mb-3'),
+        )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('is_default') and not cleaned_data.get('is_active'):
+            raise forms.ValidationError('Lokasi default harus aktif!')
+        if self.instance.pk and self.instance.is_default and not cleaned_data.get('is_default'):
+            raise forms.ValidationError('Pilih lokasi lain sebagai default terlebih dahulu.')
+        return cleaned_data
+
+
+class ItemStockForm(forms.ModelForm):
+    """Stok minimum barang di satu lokasi"""
+
+    class Meta:
+        model = ItemStock
+        fields = ['minimum_stock']
+        widgets = {
+            'minimum_stock': forms.NumberInput(attrs={'class': 'form-control', 'min': '0'}),
+        }
+        help_texts = {
+            'minimum_stock': '0 = tidak dipantau per lokasi',
+        }
+
+
+class StockTransferForm(CachedHelperMixin, forms.ModelForm):
+    """Form transfer stok antar lokasi"""
+
+    transaction_date = forms.DateField(
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label='Tanggal Transfer'
+    )
+
+    class Meta:
+        model = StockTransfer
+        fields = ['item', 'from_location', 'to_location', 'quantity', 'transaction_date', 'notes']
+        widgets = {
+            'item': ItemLookupWidget(attrs={'class': 'form-control'}),
+            'from_location': forms.Select(attrs={'class': 'form-control'}),
+            'to_location': forms.Select(attrs={'class': 'form-control'}),
+            'quantity': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Jumlah', 'min': '1'}),
+            'notes': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'Catatan (opsional)'}),
+        }
+
+    @classmethod
+    def build_layout(cls):
+        return Layout(
+            Field('item', css_class='mb-3'),
+            Row(
+                Column(Field('from_location', css_class='mb-3'), css_class='col-md-6'),
+                Column(Field('to_location', css_class='mb-3'), css_class='col-md-6'),
+            ),
+            Row(
+                Column(Field('quantity', css_class='mb-3'), css_class='col-md-6'),
+                Column(Field('transaction_date', css_class='mb-3'), css_class='col-md-6'),
+            ),
+            Field('notes', css_class='mb-3'),
+        )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.fields['item'].queryset = Items.objects.filter(is_active=True)
+        self.fields['from_location'].queryset = Location.objects.filter(is_active=True)
+        self.fields['to_location'].queryset = Location.objects.filter(is_active=True)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        item = cleaned_data.get('item')
+        from_location = cleaned_data.get('from_location')
+        to_location = cleaned_data.get('to_location')
+        quantity = cleaned_data.get('quantity')
+
+        if quantity is not None and quantity <= 0:
+            self.add_error('quantity', 'Jumlah transfer harus lebih dari 0!')
+
+        if from_location and to_location and from_location == to_location:
+            raise forms.ValidationError('Lokasi asal dan tujuan tidak boleh sama!')
+
+        # Cek awal untuk pesan yang jelas; cek final dilakukan dengan lock di StockTransfer.save()
+        if item and from_location and quantity:
+            available = ItemStock.quantity_at(item, from_location)
+            if available < quantity:
+                raise forms.ValidationError(
+                    f'Stok di {from_location.name} tidak mencukupi! Tersedia: {available} {item.unit}'
+                )
+
+        return cleaned_data
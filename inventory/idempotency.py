@@ -0,0 +1,141 @@
+"""
+Kunci idempotensi untuk POST yang membuat data.
+
+Form menyertakan `idempotency_key` (dibuat saat form dirender), klien JSON
+mengirim header `Idempotency-Key`. Kunci dicatat di tabel IdempotencyKey
+(kolom unik) dalam transaksi DB yang sama dengan data yang dibuat:
+- kiriman pertama menjalankan view lalu menyimpan respons (redirect / JSON),
+- kiriman ulang dengan kunci yang sama mendapat respons tersimpan tanpa
+  menjalankan view lagi; kiriman bersamaan menunggu baris unik tersebut
+  (PostgreSQL) atau mendapat 409 bila kiriman pertama belum selesai,
+- respons yang tidak menghasilkan data (form tidak valid, error) tidak
+  disimpan, sehingga kunci yang sama bisa dipakai untuk mencoba lagi.
+
+Kunci kedaluwarsa (INVENTORY_IDEMPOTENCY_KEY_TTL_HOURS) dibersihkan setelah
+commit setiap SWEEP_EVERY kunci baru dan oleh command `sweep_idempotency_keys`.
+"""
+import re
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+KEY_PATTERN = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+# Pembersihan kunci kedaluwarsa dijalankan sekali setiap N kunci baru
+SWEEP_EVERY = 500
+
+
+def ttl():
+    return timedelta(hours=getattr(settings, 'INVENTORY_IDEMPOTENCY_KEY_TTL_HOURS', 24))
+
+
+def new_key():
+    return uuid.uuid4().hex
+
+
+def sweep_expired_keys():
+    """Hapus kunci yang sudah kedaluwarsa. Return jumlah yang dihapus"""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def _should_store(response):
+    """
+    Hanya respons yang menandakan data tersimpan: redirect sukses atau JSON 2xx.
+    View di balik mixin ini melaporkan kegagalan lewat form_invalid / status error, bukan redirect.
+    """
+    if response.status_code in (301, 302, 303):
+        return True
+    return 200 <= response.status_code < 300 and response.get('Content-Type', '').startswith('application/json')
+
+
+def _replay(record):
+    if record.response_location:
+        return HttpResponseRedirect(record.response_location)
+    return HttpResponse(
+        record.response_body, status=record.response_status, content_type=record.response_content_type
+    )
+
+
+class IdempotentPostMixin:
+    """
+    Mixin view: POST dengan kunci idempotensi dijalankan paling banyak sekali.
+    Template form menyertakan `{{ idempotency_key }}` sebagai input tersembunyi.
+    """
+    idempotency_field = 'idempotency_key'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Render ulang form (mis. error validasi) tetap memakai kunci yang sama
+        context['idempotency_key'] = self.request.POST.get(self.idempotency_field) or new_key()
+        return context
+    
+    def _idempotency_error(self, message, status, from_header):
+        if from_header:
+            return JsonResponse({'errors': [message]}, status=status)
+        return HttpResponse(message, status=status, content_type='text/plain; charset=utf-8')
+    
+    def dispatch(self, request, *args, **kwargs):
+        # Dibungkus di dispatch (bukan post) agar berlaku juga untuk view yang mendefinisikan post() sendiri
+        if request.method != 'POST':
+            return super().dispatch(request, *args, **kwargs)
+        from_header = 'Idempotency-Key' in request.headers
+        key = request.headers.get('Idempotency-Key') if from_header else request.POST.get(self.idempotency_field)
+        if not key:
+            return super().dispatch(request, *args, **kwargs)
+        if not KEY_PATTERN.match(key):
+            return self._idempotency_error('Idempotency key tidak valid.', 400, from_header)
+        
+        user_id = request.session.get('user_id')
+        scope = request.resolver_match.view_name
+        now = timezone.now()
+        
+        with transaction.atomic():
+            IdempotencyKey.objects.filter(key=key, expires_at__lte=now).delete()
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        key=key, user_id=user_id, scope=scope, expires_at=now + ttl()
+                    )
+            except IntegrityError:
+                record = None
+            
+            if record is None:
+                existing = IdempotencyKey.objects.filter(key=key).first()
+                if existing is None or existing.response_status is None:
+                    return self._idempotency_error(
+                        'Kiriman yang sama sedang diproses, coba lagi sebentar.', 409, from_header
+                    )
+                if existing.scope != scope or existing.user_id != user_id:
+                    return self._idempotency_error(
+                        'Idempotency key sudah dipakai untuk permintaan lain.', 422, from_header
+                    )
+                if existing.response_location:
+                    messages.info(request, 'Data ini sudah tersimpan sebelumnya; kiriman ulang diabaikan.')
+                return _replay(existing)
+            
+            response = super().dispatch(request, *args, **kwargs)
+            
+            if _should_store(response):
+                created = getattr(self, 'object', None)
+                record.object_id = getattr(created, 'pk', None)
+                record.response_status = response.status_code
+                record.response_location = response.get('Location', '') if response.status_code in (301, 302, 303) else ''
+                record.response_content_type = response.get('Content-Type', '')
+                record.response_body = '' if record.response_location else response.content.decode(response.charset)
+                record.save(update_fields=[
+                    'object_id', 'response_status', 'response_location', 'response_content_type', 'response_body'
+                ])
+                if record.pk % SWEEP_EVERY == 0:
+                    transaction.on_commit(sweep_expired_keys)
+            else:
+                # Tidak ada data tersimpan: kunci dilepas agar kiriman berikutnya dieksekusi
+                record.delete()
+        
+        return response
@@ -15,16 +15,101 @@ Views untuk Fitur Pegawai Gudang
 - CRUD Transaksi Barang Masuk (Incoming)
 - CRUD Transaksi Barang Keluar (Outgoing)
 """
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView
+from django.views import View
+from django.http import JsonResponse
 from django.contrib import messages
-from django.db.models import Q, Sum
-from datetime import datetime
+from django.conf import settings
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q, Sum, Count, F
+from datetime import date, datetime
+
+from .models import (
+    Category, Supplier, Items, IncomingTransaction, OutgoingTransaction, User, StockAlert, ReorderSuggestion,
+    Location, ItemStock, StockTransfer, ConcurrentEditError,
+)
+from .forecasting import apply_suggestions
+from .forms import (
+    CategoryForm, SupplierForm, ItemForm, IncomingTransactionForm, OutgoingTransactionForm,
+    LocationForm, ItemStockForm, StockTransferForm,
+)
+from .mixins import GudangRequiredMixin, GudangOrDirekturMixin
+from .stock_card import decode_cursor, stock_card_csv_response, stock_card_page
+from .scan_station import commit_batch, max_lines
+from .idempotency import IdempotentPostMixin
+from .widgets import item_lookup_data
+
+def _conflict_value(field, value):
+    """Nilai field form untuk ditampilkan di layar konflik (data terbaru vs kiriman pengguna)"""
+    try:
+        value = field.to_python(value)
+    except ValidationError:
+        pass
+    if isinstance(field, forms.BooleanField):
+        return 'Ya' if value else 'Tidak'
+    if value in (None, ''):
+        return '-'
+    if isinstance(field, forms.ChoiceField) and not isinstance(field, forms.ModelChoiceField):
+        return str(dict(field.choices).get(value, value))
+    if isinstance(value, date):
+        return value.strftime('%d/%m/%Y')
+    return str(value)
+
+
+class ConflictAwareUpdateMixin:
+    """
+    UpdateView dengan optimistic locking (kolom `version`, dicek di save() model).
+    Jika data sudah diubah pengguna lain sejak form dibuka, tampilkan layar konflik
+    berisi data terbaru dan perubahan pengguna, bukan menimpa diam-diam.
+    """
+    conflict_template_name = 'inventory/warehouse/edit_conflict.html'
+    
+    def post(self, request, *args, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().post(request, *args, **kwargs)
+        except ConcurrentEditError:
+            return self.render_conflict()
+    
+    def form_invalid(self, form):
+        # Tanpa versi tidak diketahui data mana yang dilihat pengguna: tangani sebagai konflik
+        if 'version' in form.errors:
+            return self.render_conflict()
+        return super().form_invalid(form)
+    
+    def render_conflict(self):
+        # Form dibangun ulang di atas data terbaru: initial = data tersimpan, data = kiriman pengguna
+        self.object = self.get_object()
+        form = self.get_form()
+        rows = []
+        for name, field in form.fields.items():
+            if name == 'version':
+                continue
+            current = _conflict_value(field, form.initial.get(name))
+            mine = _conflict_value(field, form[name].data)
+            rows.append({'label': field.label, 'current': current, 'mine': mine, 'changed': current != mine})
+        
+        resubmit = [
+            (key, value)
+            for key, values in self.request.POST.lists()
+            if key not in ('csrfmiddlewaretoken', 'version')
+            for value in values
+        ]
+        return render(self.request, self.conflict_template_name, {
+            'object': self.object,
+            'rows': rows,
+            'resubmit': resubmit,
+            'current_version': self.object.version,
+            'updated_by': getattr(self.object, 'updated_by', None),
+            'cancel_url': self.get_success_url(),
+        }, status=409)
 
-from .models import Category, Supplier, Items, IncomingTransaction, OutgoingTransaction, User
-from .forms import CategoryForm, SupplierForm, ItemForm, IncomingTransactionForm, OutgoingTransactionForm
-from .mixins import GudangRequiredMixin
 
 class CategoryListView(GudangRequiredMixin, ListView):
     """List all categories"""
@@ -102,7 +187,18 @@ class SupplierListView(GudangRequiredMixin, ListView):
             elif status_filter == 'inactive':
                 queryset = queryset.filter(is_active=False)
         
+        # Urutan dari counter aktivitas (kolom ber-index, tanpa agregat per baris)
+        sort = self.request.GET.get('sort')
+        if sort in self.sort_options:
+            queryset = queryset.order_by(*self.sort_options[sort])
+        
         return queryset
+    
+    sort_options = {
+        'last_delivery': [F('last_delivery_date').desc(nulls_last=True), '-supplier_id'],
+        'deliveries': ['-total_deliveries', '-supplier_id'],
+        'quantity': ['-total_quantity', '-supplier_id'],
+    }
 
 class SupplierCreateView(GudangRequiredMixin, CreateView):
     """Create new supplier"""
@@ -140,26 +236,12 @@ class SupplierDetailView(GudangRequiredMixin, DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        supplier = self.get_object()
         
-        # Get incoming transactions from this supplier (last 5)
-        from .models import IncomingTransaction
-        from django.db.models import Sum
-        
-        incoming_transactions = IncomingTransaction.objects.filter(
-            supplier=supplier
-        ).select_related('item').order_by('-transaction_date')[:5]
-        
-        # Get statistics
-        all_transactions = IncomingTransaction.objects.filter(supplier=supplier)
-        total_transactions = all_transactions.count()
-        total_quantity = all_transactions.aggregate(total=Sum('quantity'))['total'] or 0
-        last_transaction = all_transactions.order_by('-transaction_date').first()
-        
-        context['incoming_transactions'] = incoming_transactions
-        context['total_transactions'] = total_transactions
-        context['total_quantity'] = total_quantity
-        context['last_transaction'] = last_transaction
+        # Get incoming transactions from this supplier (last 5);
+        # statistik diambil dari counter di baris supplier
+        context['incoming_transactions'] = IncomingTransaction.objects.filter(
+            supplier=self.object
+        ).select_related('item').order_by('-transaction_date', '-created_at')[:5]
         
         return context
 
@@ -188,6 +270,9 @@ class ItemListView(GudangRequiredMixin, ListView):
         category_filter = self.request.GET.get('category')
         stock_status = self.request.GET.get('stock_status')
         
+        # Barang yang dihapus (menunggu purge) hanya tampil jika diminta
+        queryset = queryset.filter(retired_at__isnull=not self.request.GET.get('retired'))
+        
         if search:
             queryset = queryset.filter(
                 Q(code__icontains=search) |
@@ -197,6 +282,11 @@ class ItemListView(GudangRequiredMixin, ListView):
         if category_filter:
             queryset = queryset.filter(category_id=category_filter)
         
+        # Urutan dari counter aktivitas (kolom ber-index)
+        sort = self.request.GET.get('sort')
+        if sort in self.sort_options:
+            queryset = queryset.order_by(*self.sort_options[sort])
+        
         if stock_status:
             if stock_status == 'low':
                 queryset = [item for item in queryset if item.stock_status == 'low_stock']
@@ -207,12 +297,20 @@ class ItemListView(GudangRequiredMixin, ListView):
         
         return queryset
     
+    sort_options = {
+        'last_in': [F('last_in_at').desc(nulls_last=True), '-items_id'],
+        'last_out': [F('last_out_at').desc(nulls_last=True), '-items_id'],
+        'idle': [F('last_out_at').asc(nulls_first=True), 'items_id'],
+    }
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['categories'] = Category.objects.all()
         context['search'] = self.request.GET.get('search', '')
         context['category_filter'] = self.request.GET.get('category', '')
         context['stock_status'] = self.request.GET.get('stock_status', '')
+        context['show_retired'] = self.request.GET.get('retired', '')
+        context['sort'] = self.request.GET.get('sort', '')
         return context
 
 class ItemCreateView(GudangRequiredMixin, CreateView):
@@ -232,7 +330,7 @@ class ItemCreateView(GudangRequiredMixin, CreateView):
         messages.success(self.request, f'Barang {form.instance.name} berhasil ditambahkan.')
         return super().form_valid(form)
 
-class ItemUpdateView(GudangRequiredMixin, UpdateView):
+class ItemUpdateView(GudangRequiredMixin, ConflictAwareUpdateMixin, UpdateView):
     """Update existing item"""
     model = Items
     form_class = ItemForm
@@ -246,8 +344,21 @@ class ItemUpdateView(GudangRequiredMixin, UpdateView):
         if user_id:
             form.instance.updated_by_id = user_id
         
+        # Mengaktifkan kembali barang yang dihapus membatalkan purge
+        if form.instance.is_active:
+            form.instance.retired_at = None
+        
+        response = super().form_valid(form)
+        
+        # Perubahan stok minimum / status aktif bisa membuka atau menutup alert
+        StockAlert.track(
+            self.object,
+            self.object.current_stock,
+            old_minimum=form.initial.get('minimum_stock'),
+            old_active=form.initial.get('is_active')
+        )
         messages.success(self.request, f'Barang {form.instance.name} berhasil diperbarui.')
-        return super().form_valid(form)
+        return response
 
 class ItemDetailView(GudangRequiredMixin, DetailView):
     """View item details"""
@@ -258,31 +369,79 @@ class ItemDetailView(GudangRequiredMixin, DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        item = self.get_object()
+        item = self.object
         
         # Get recent incoming transactions
         context['recent_incoming'] = IncomingTransaction.objects.filter(
             item=item
-        ).order_by('-transaction_date')[:5]
+        ).select_related('supplier', 'received_by').order_by('-transaction_date', '-created_at')[:5]
         
         # Get recent outgoing transactions
         context['recent_outgoing'] = OutgoingTransaction.objects.filter(
             item=item
-        ).order_by('-transaction_date')[:5]
+        ).select_related('released_by').order_by('-transaction_date', '-created_at')[:5]
         
+        # Saldo per lokasi
+        context['location_stocks'] = item.location_stocks.select_related('location').order_by(
+            '-location__is_default', 'location__name'
+        )
+        
+        return context
+
+
+class ItemStockCardView(GudangOrDirekturMixin, DetailView):
+    """
+    Kartu stok barang: mutasi masuk & keluar (termasuk arsip) dengan saldo berjalan,
+    terbaru dulu, dipaginasi dengan cursor (?before=...)
+    """
+    model = Items
+    template_name = 'inventory/warehouse/item_stock_card.html'
+    context_object_name = 'item'
+    pk_url_kwarg = 'item_id'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        before = decode_cursor(self.request.GET.get('before', ''))
+        page = stock_card_page(self.object.pk, before)
+        context.update({
+            'movements': page['rows'],
+            'next_cursor': page['next_cursor'],
+            'anchor_date': page['anchor_date'],
+            'is_first_page': before is None,
+        })
         return context
 
+
+class ItemStockCardExportView(GudangOrDirekturMixin, View):
+    """Export seluruh kartu stok barang ke CSV (terlama dulu)"""
+    
+    def get(self, request, item_id):
+        item = get_object_or_404(Items, pk=item_id)
+        return stock_card_csv_response(item)
+
 class ItemDeleteView(GudangRequiredMixin, DeleteView):
-    """Delete item"""
+    """
+    Hapus barang (soft delete): barang dinonaktifkan seketika, histori dihapus
+    permanen belakangan oleh command `purge_retired_items` per batch.
+    """
     model = Items
     template_name = 'inventory/warehouse/item_confirm_delete.html'
     success_url = reverse_lazy('item_list')
     pk_url_kwarg = 'item_id'
     
-    def delete(self, request, *args, **kwargs):
-        item = self.get_object()
-        messages.success(request, f'Barang {item.name} berhasil dihapus.')
-        return super().delete(request, *args, **kwargs)
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['purge_after_days'] = getattr(settings, 'INVENTORY_PURGE_RETIRED_AFTER_DAYS', 30)
+        return context
+    
+    def form_valid(self, form):
+        self.object.retire(user_id=self.request.session.get('user_id'))
+        messages.success(
+            self.request,
+            f'Barang {self.object.name} berhasil dihapus. Data dapat dipulihkan dengan '
+            f'mengaktifkan kembali barang sebelum dibersihkan permanen.'
+        )
+        return redirect(self.get_success_url())
 
 class IncomingListView(GudangRequiredMixin, ListView):
     """List all incoming transactions"""
@@ -316,7 +475,7 @@ class IncomingListView(GudangRequiredMixin, ListView):
         
         return queryset
 
-class IncomingCreateView(GudangRequiredMixin, CreateView):
+class IncomingCreateView(GudangRequiredMixin, IdempotentPostMixin, CreateView):
     """Create new incoming transaction"""
     model = IncomingTransaction
     form_class = IncomingTransactionForm
@@ -342,7 +501,7 @@ class IncomingDetailView(GudangRequiredMixin, DetailView):
     context_object_name = 'transaction'
     pk_url_kwarg = 'incoming_id'
 
-class IncomingUpdateView(GudangRequiredMixin, UpdateView):
+class IncomingUpdateView(GudangRequiredMixin, ConflictAwareUpdateMixin, UpdateView):
     """Update existing incoming transaction"""
     model = IncomingTransaction
     form_class = IncomingTransactionForm
@@ -351,11 +510,12 @@ class IncomingUpdateView(GudangRequiredMixin, UpdateView):
     pk_url_kwarg = 'incoming_id'
     
     def form_valid(self, form):
+        response = super().form_valid(form)
         messages.success(
             self.request,
             f'Transaksi barang masuk berhasil diperbarui.'
         )
-        return super().form_valid(form)
+        return response
 class OutgoingListView(GudangRequiredMixin, ListView):
     """List all outgoing transactions"""
     model = OutgoingTransaction
@@ -388,7 +548,7 @@ class OutgoingListView(GudangRequiredMixin, ListView):
         
         return queryset
 
-class OutgoingCreateView(GudangRequiredMixin, CreateView):
+class OutgoingCreateView(GudangRequiredMixin, IdempotentPostMixin, CreateView):
     """Create new outgoing transaction"""
     model = OutgoingTransaction
     form_class = OutgoingTransactionForm
@@ -413,8 +573,14 @@ class OutgoingDetailView(GudangRequiredMixin, DetailView):
     template_name = 'inventory/warehouse/outgoing_detail.html'
     context_object_name = 'transaction'
     pk_url_kwarg = 'outgoing_id'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Lot yang dipakai (urutan FEFO saat dialokasikan)
+        context['lot_allocations'] = self.object.lot_allocations.select_related('lot')
+        return context
 
-class OutgoingUpdateView(GudangRequiredMixin, UpdateView):
+class OutgoingUpdateView(GudangRequiredMixin, ConflictAwareUpdateMixin, UpdateView):
     """Update existing outgoing transaction"""
     model = OutgoingTransaction
     form_class = OutgoingTransactionForm
@@ -423,8 +589,359 @@ class OutgoingUpdateView(GudangRequiredMixin, UpdateView):
     pk_url_kwarg = 'outgoing_id'
     
     def form_valid(self, form):
+        response = super().form_valid(form)
         messages.success(
             self.request,
             f'Transaksi barang keluar berhasil diperbarui.'
         )
+        return response
+
+class StockAlertListView(GudangOrDirekturMixin, ListView):
+    """Digest alert stok menipis/habis (Gudang & Direktur)"""
+    model = StockAlert
+    template_name = 'inventory/warehouse/stock_alert_list.html'
+    context_object_name = 'alerts'
+    paginate_by = 20
+    
+    def get_queryset(self):
+        queryset = StockAlert.objects.select_related('item', 'item__category')
+        status_filter = self.request.GET.get('status', 'open')
+        alert_type = self.request.GET.get('type')
+        search = self.request.GET.get('search')
+        
+        if status_filter in ['open', 'resolved']:
+            queryset = queryset.filter(status=status_filter)
+        
+        if alert_type:
+            queryset = queryset.filter(alert_type=alert_type)
+        
+        if search:
+            queryset = queryset.filter(
+                Q(item__code__icontains=search) |
+                Q(item__name__icontains=search)
+            )
+        
+        return queryset
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['summary'] = StockAlert.objects.filter(status='open').aggregate(
+            open_count=Count('alert_id'),
+            low_stock_count=Count('alert_id', filter=Q(alert_type='low_stock')),
+            out_of_stock_count=Count('alert_id', filter=Q(alert_type='out_of_stock')),
+        )
+        context['status_filter'] = self.request.GET.get('status', 'open')
+        context['alert_type'] = self.request.GET.get('type', '')
+        context['search'] = self.request.GET.get('search', '')
+        context['type_choices'] = StockAlert.ALERT_TYPE_CHOICES
+        return context
+
+
+class ReorderRecommendationView(GudangRequiredMixin, ListView):
+    """Saran reorder point hasil forecasting + terapkan massal ke minimum stok"""
+    model = ReorderSuggestion
+    template_name = 'inventory/warehouse/reorder_recommendation_list.html'
+    context_object_name = 'suggestions'
+    paginate_by = 25
+    
+    def get_queryset(self):
+        queryset = ReorderSuggestion.objects.select_related('item', 'item__category').filter(
+            item__is_active=True
+        )
+        search = self.request.GET.get('search')
+        only_changed = self.request.GET.get('changed')
+        
+        if search:
+            queryset = queryset.filter(
+                Q(item__code__icontains=search) |
+                Q(item__name__icontains=search)
+            )
+        
+        if only_changed:
+            queryset = queryset.exclude(reorder_point=F('item__minimum_stock'))
+        
+        return queryset
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['search'] = self.request.GET.get('search', '')
+        context['only_changed'] = self.request.GET.get('changed', '')
+        context['last_computed'] = ReorderSuggestion.objects.order_by('-computed_at').values_list(
+            'computed_at', flat=True
+        ).first()
+        return context
+    
+    def post(self, request, *args, **kwargs):
+        suggestions = ReorderSuggestion.objects.filter(item__is_active=True)
+        
+        if request.POST.get('apply_all'):
+            suggestions = suggestions.exclude(reorder_point=F('item__minimum_stock'))
+        else:
+            selected = [value for value in request.POST.getlist('selected') if value.isdigit()]
+            if not selected:
+                messages.warning(request, 'Pilih minimal satu barang untuk diterapkan.')
+                return redirect('reorder_recommendation_list')
+            suggestions = suggestions.filter(pk__in=selected)
+        
+        changed = apply_suggestions(suggestions, user_id=request.session.get('user_id'))
+        messages.success(request, f'Minimum stok {changed} barang berhasil diperbarui dari saran reorder.')
+        return redirect('reorder_recommendation_list')
+
+
+class LocationListView(GudangRequiredMixin, ListView):
+    """Daftar lokasi penyimpanan beserta ringkasan saldo"""
+    model = Location
+    template_name = 'inventory/warehouse/location_list.html'
+    context_object_name = 'locations'
+    paginate_by = 15
+    
+    def get_queryset(self):
+        queryset = super().get_queryset().annotate(
+            item_count=Count('item_stocks', filter=Q(item_stocks__quantity__gt=0)),
+            total_quantity=Sum('item_stocks__quantity'),
+            low_count=Count(
+                'item_stocks',
+                filter=Q(item_stocks__minimum_stock__gt=0, item_stocks__quantity__lte=F('item_stocks__minimum_stock'))
+            ),
+        ).order_by('-is_default', 'name')
+        search = self.request.GET.get('search')
+        if search:
+            queryset = queryset.filter(Q(code__icontains=search) | Q(name__icontains=search))
+        return queryset
+
+
+class LocationFormMixin:
+    """Simpan lokasi; hanya satu lokasi yang boleh menjadi default"""
+    model = Location
+    form_class = LocationForm
+    template_name = 'inventory/warehouse/location_form.html'
+    success_url = reverse_lazy('location_list')
+    
+    def form_valid(self, form):
+        with transaction.atomic():
+            response = super().form_valid(form)
+            if self.object.is_default:
+                Location.objects.filter(is_default=True).exclude(pk=self.object.pk).update(is_default=False)
+        messages.success(self.request, f'Lokasi {self.object.name} berhasil disimpan.')
+        return response
+
+
+class LocationCreateView(GudangRequiredMixin, LocationFormMixin, CreateView):
+    """Tambah lokasi penyimpanan"""
+
+
+class LocationUpdateView(GudangRequiredMixin, LocationFormMixin, UpdateView):
+    """Ubah lokasi penyimpanan"""
+    pk_url_kwarg = 'location_id'
+
+
+class LocationDetailView(GudangRequiredMixin, DetailView):
+    """Saldo semua barang di satu lokasi (?low=1 = hanya di bawah minimum lokasi)"""
+    model = Location
+    template_name = 'inventory/warehouse/location_detail.html'
+    context_object_name = 'location'
+    pk_url_kwarg = 'location_id'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        stocks = self.object.item_stocks.select_related('item', 'item__category').order_by('item__name')
+        search = self.request.GET.get('search')
+        only_low = self.request.GET.get('low')
+        
+        if search:
+            stocks = stocks.filter(Q(item__code__icontains=search) | Q(item__name__icontains=search))
+        if only_low:
+            stocks = stocks.filter(minimum_stock__gt=0, quantity__lte=F('minimum_stock'))
+        else:
+            stocks = stocks.exclude(quantity=0, minimum_stock=0)
+        
+        context['stocks'] = stocks
+        context['search'] = search or ''
+        context['only_low'] = only_low or ''
+        return context
+
+
+class ItemStockUpdateView(GudangRequiredMixin, UpdateView):
+    """Ubah stok minimum barang di satu lokasi"""
+    model = ItemStock
+    form_class = ItemStockForm
+    template_name = 'inventory/warehouse/item_stock_form.html'
+    context_object_name = 'stock'
+    pk_url_kwarg = 'item_stock_id'
+    
+    def get_queryset(self):
+        return super().get_queryset().select_related('item', 'location')
+    
+    def get_success_url(self):
+        return reverse_lazy('location_detail', kwargs={'location_id': self.object.location_id})
+    
+    def form_valid(self, form):
+        messages.success(
+            self.request,
+            f'Stok minimum {self.object.item.name} di {self.object.location.name} berhasil diperbarui.'
+        )
         return super().form_valid(form)
+
+
+class StockTransferListView(GudangRequiredMixin, ListView):
+    """Riwayat transfer stok antar lokasi"""
+    model = StockTransfer
+    template_name = 'inventory/warehouse/transfer_list.html'
+    context_object_name = 'transfers'
+    paginate_by = 15
+    
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related('item', 'from_location', 'to_location', 'created_by')
+        search = self.request.GET.get('search')
+        location = self.request.GET.get('location')
+        
+        if search:
+            queryset = queryset.filter(
+                Q(transfer_number__icontains=search) |
+                Q(item__name__icontains=search) |
+                Q(item__code__icontains=search)
+            )
+        if location and location.isdigit():
+            queryset = queryset.filter(Q(from_location_id=location) | Q(to_location_id=location))
+        return queryset
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['locations'] = Location.objects.all()
+        context['search'] = self.request.GET.get('search', '')
+        context['selected_location'] = self.request.GET.get('location', '')
+        return context
+
+
+class StockTransferCreateView(GudangRequiredMixin, CreateView):
+    """Buat transfer stok antar lokasi"""
+    model = StockTransfer
+    form_class = StockTransferForm
+    template_name = 'inventory/warehouse/transfer_form.html'
+    success_url = reverse_lazy('stock_transfer_list')
+    
+    def get_initial(self):
+        initial = super().get_initial()
+        initial['transaction_date'] = datetime.now().date()
+        if self.request.GET.get('item'):
+            initial['item'] = self.request.GET.get('item')
+        if self.request.GET.get('from'):
+            initial['from_location'] = self.request.GET.get('from')
+        return initial
+    
+    def form_valid(self, form):
+        form.instance.created_by_id = self.request.session.get('user_id')
+        try:
+            response = super().form_valid(form)
+        except ValidationError as error:
+            # Saldo berubah sejak form divalidasi (transfer/transaksi lain)
+            form.add_error(None, error)
+            return self.form_invalid(form)
+        messages.success(
+            self.request,
+            f'Transfer {self.object.transfer_number}: {self.object.quantity} {self.object.item.name} '
+            f'dari {self.object.from_location.name} ke {self.object.to_location.name} berhasil.'
+        )
+        return response
+
+
+def _payload_id(payload, key):
+    """Id opsional dari payload JSON (angka atau teks angka); ValueError(key) jika formatnya salah"""
+    value = payload.get(key)
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool) or not str(value).isdigit():
+        raise ValueError(key)
+    return int(value)
+
+
+class ScanStationView(GudangRequiredMixin, IdempotentPostMixin, View):
+    """
+    Scan station barang masuk/keluar: scan disimpan di browser, lalu dikirim
+    sebagai satu batch JSON dan disimpan dalam satu transaksi DB
+    """
+    template_name = 'inventory/warehouse/scan_station.html'
+    
+    def get(self, request):
+        return render(request, self.template_name, {
+            'locations': Location.objects.filter(is_active=True),
+            'suppliers': Supplier.objects.filter(is_active=True).order_by('name'),
+            'today': datetime.now().date(),
+            'max_lines': max_lines(),
+        })
+    
+    def post(self, request):
+        try:
+            payload = json.loads(request.body)
+            direction = payload['direction']
+            transaction_date = datetime.strptime(payload['transaction_date'], '%Y-%m-%d').date()
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({'errors': ['Data batch tidak valid.']}, status=400)
+        if direction not in ('in', 'out'):
+            return JsonResponse({'errors': ['Jenis transaksi tidak valid.']}, status=400)
+        
+        try:
+            location_id = _payload_id(payload, 'location')
+            supplier_id = _payload_id(payload, 'supplier')
+        except ValueError as error:
+            label = 'Lokasi' if str(error) == 'location' else 'Supplier'
+            return JsonResponse({'errors': [f'{label} tidak valid.']}, status=400)
+        
+        # Id yang dikirim harus menunjuk baris aktif; jangan diam-diam jatuh ke lokasi default/tanpa supplier
+        location = None
+        if location_id is not None:
+            location = Location.objects.filter(pk=location_id, is_active=True).first()
+            if location is None:
+                return JsonResponse({'errors': ['Lokasi tidak valid.']}, status=400)
+        supplier = None
+        if direction == 'in' and supplier_id is not None:
+            supplier = Supplier.objects.filter(pk=supplier_id, is_active=True).first()
+            if supplier is None:
+                return JsonResponse({'errors': ['Supplier tidak valid.']}, status=400)
+        
+        try:
+            transactions = commit_batch(
+                direction,
+                payload.get('lines'),
+                transaction_date,
+                user_id=request.session.get('user_id'),
+                location=location,
+                supplier=supplier,
+                purpose=str(payload.get('purpose') or '').strip(),
+                notes=str(payload.get('notes') or '').strip(),
+            )
+        except ValidationError as error:
+            return JsonResponse({'errors': error.messages}, status=400)
+        
+        return JsonResponse({
+            'transactions': [
+                {'number': trans.transaction_number, 'code': trans.item.code, 'quantity': trans.quantity}
+                for trans in transactions
+            ],
+        })
+    
+    def handle_no_permission(self):
+        if self.request.method == 'POST':
+            return JsonResponse({'errors': ['Sesi berakhir, silakan login kembali.']}, status=403)
+        return super().handle_no_permission()
+
+
+class ScanLookupView(GudangRequiredMixin, View):
+    """JSON satu barang aktif berdasarkan kode persis (hasil scan), plus saldo di lokasi terpilih"""
+    
+    def get(self, request):
+        code = request.GET.get('code', '').strip()
+        item = Items.objects.filter(code=code, is_active=True).first() if code else None
+        if item is None:
+            return JsonResponse({'error': f'Kode {code} tidak ditemukan.'}, status=404)
+        
+        data = item_lookup_data(item)
+        location = request.GET.get('location', '')
+        if location.isdigit():
+            data['location_stock'] = ItemStock.objects.filter(
+                item=item, location_id=location
+            ).values_list('quantity', flat=True).first() or 0
+        return JsonResponse({'item': data})
+    
+    def handle_no_permission(self):
+        return JsonResponse({'error': 'Silakan login terlebih dahulu.'}, status=403)
@@ -0,0 +1,219 @@
+"""
+Event live (Server-Sent Events) agar halaman stok & permintaan ter-update tanpa refresh.
+
+Alur:
+- Kode yang mengubah stok / permintaan memanggil `publish_stock_change` /
+  `publish_request_change`. Event dicatat ke tabel LiveEvent dalam transaksi
+  yang sama, lalu disiarkan ke hub in-process setelah commit.
+- Stream SSE di proses yang sama menerima event langsung dari hub.
+  Event dari worker/proses lain diambil lewat polling tabel LiveEvent
+  (fallback multi-worker), sekaligus menyusulkan event yang terlewat.
+
+Urutan id tidak sama dengan urutan commit: polling berhenti sebelum celah id yang
+masih baru (`gap_wait_seconds`, sama seperti outbox.fetch), agar cursor tidak
+melompati event yang belum commit. Umur celah dihitung dari waktu INSERT, sehingga
+event dari transaksi yang terbuka lebih lama dari batas itu tetap bisa terlewat.
+"""
+import asyncio
+import json
+import threading
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Items, LiveEvent
+
+# Pembersihan event lama dijalankan sekali setiap N event
+PRUNE_EVERY = 500
+# Maksimal event per query polling
+POLL_BATCH_SIZE = 200
+
+
+def poll_seconds():
+    return getattr(settings, 'INVENTORY_LIVE_EVENTS_POLL_SECONDS', 5)
+
+
+def stream_seconds():
+    return getattr(settings, 'INVENTORY_LIVE_EVENTS_STREAM_SECONDS', 300)
+
+
+def gap_wait_seconds():
+    return getattr(settings, 'INVENTORY_LIVE_EVENTS_GAP_WAIT_SECONDS', 10)
+
+
+class EventHub:
+    """Pub/sub in-process: satu asyncio.Queue per koneksi SSE (thread-safe)"""
+
+    def __init__(self, max_queue_size=1000):
+        self.max_queue_size = max_queue_size
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def broadcast(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._put, queue, event)
+            except RuntimeError:
+                # Event loop koneksi sudah ditutup
+                self.unsubscribe(queue)
+
+    @staticmethod
+    def _put(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Klien lambat: event tetap tersusul lewat polling tabel LiveEvent
+            pass
+
+
+hub = EventHub()
+
+
+def _serialize(event):
+    return {'id': event.event_id, 'type': event.event_type, 'data': event.payload}
+
+
+def publish(event_type, payload):
+    """Catat event (ikut transaksi aktif) dan siarkan ke hub setelah commit"""
+    event = LiveEvent.objects.create(event_type=event_type, payload=payload)
+    if event.event_id % PRUNE_EVERY == 0:
+        prune_events()
+    transaction.on_commit(lambda: hub.broadcast(_serialize(event)))
+    return event
+
+
+def prune_events():
+    """Hapus event yang lebih tua dari masa simpan (klien hanya butuh event terbaru)"""
+    hours = getattr(settings, 'INVENTORY_LIVE_EVENTS_RETENTION_HOURS', 24)
+    LiveEvent.objects.filter(created_at__lt=timezone.now() - timedelta(hours=hours)).delete()
+
+
+def publish_stock_change(item, old_stock, old_minimum=None, old_active=None):
+    """Event perubahan stok/threshold satu barang (status None = barang nonaktif)"""
+    if old_minimum is None:
+        old_minimum = item.minimum_stock
+    if old_active is None:
+        old_active = item.is_active
+    if (old_stock, old_minimum, old_active) == (item.current_stock, item.minimum_stock, item.is_active):
+        return None
+
+    return publish('stock', {
+        'item_id': item.pk,
+        'code': item.code,
+        'name': item.name,
+        'unit_display': item.get_unit_display(),
+        'current_stock': item.current_stock,
+        'old_stock': old_stock,
+        'minimum_stock': item.minimum_stock,
+        'is_active': item.is_active,
+        'old_active': old_active,
+        'stock_status': item.stock_status if item.is_active else None,
+        'old_status': Items.compute_stock_status(old_stock, old_minimum) if old_active else None,
+    })
+
+
+def publish_request_change(request_item, old_status):
+    """Event permintaan baru (old_status None) atau perubahan status permintaan"""
+    return publish('request', {
+        'request_id': request_item.pk,
+        'request_number': request_item.request_number,
+        'item_id': request_item.item_id,
+        'item_name': request_item.item.name,
+        'quantity': request_item.quantity,
+        'status': request_item.status,
+        'status_display': request_item.get_status_display(),
+        'old_status': old_status,
+        'requested_by_id': request_item.requested_by_id,
+    })
+
+
+def latest_event_id():
+    return LiveEvent.objects.order_by('-event_id').values_list('event_id', flat=True).first() or 0
+
+
+def events_after(last_id, limit=POLL_BATCH_SIZE):
+    """Event setelah `last_id` urut id, berhenti sebelum celah id yang masih baru"""
+    settled_before = timezone.now() - timedelta(seconds=gap_wait_seconds())
+    events = []
+    cursor = last_id
+    for event in LiveEvent.objects.filter(event_id__gt=last_id).order_by('event_id')[:limit]:
+        # Celah baru bisa berupa transaksi yang belum commit: tunggu poll berikutnya
+        if event.event_id != cursor + 1 and event.created_at > settled_before:
+            break
+        cursor = event.event_id
+        events.append(_serialize(event))
+    return events
+
+
+def format_event(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def polling_body(last_id):
+    """
+    Respons SSE sekali jalan (server WSGI): event tertunda lalu koneksi ditutup.
+    `retry` membuat browser menyambung ulang (polling) dengan Last-Event-ID terakhir.
+    """
+    events = events_after(last_id)
+    chunks = [f'retry: {poll_seconds() * 1000}\n\n']
+    if events:
+        chunks.extend(format_event(event) for event in events)
+    else:
+        # Tanpa data event tidak di-dispatch, tapi Last-Event-ID browser tetap diperbarui
+        chunks.append(f'id: {last_id}\n\n')
+    return ''.join(chunks)
+
+
+async def event_stream(last_id):
+    """
+    Stream SSE (server ASGI). Event dari hub dikirim langsung; polling DB setiap
+    `poll_seconds` mengambil event worker lain. Cursor polling hanya maju sampai
+    celah id pertama yang masih baru (lihat `events_after`). Stream ditutup setelah
+    `stream_seconds` dan browser menyambung ulang dengan Last-Event-ID.
+    """
+    queue = hub.subscribe()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + stream_seconds()
+    poll_cursor = last_id
+    sent = set()
+    next_poll = loop.time()
+    try:
+        yield f'retry: {poll_seconds() * 1000}\n\n'
+        while (now := loop.time()) < deadline:
+            if now >= next_poll:
+                events = await sync_to_async(events_after)(poll_cursor)
+                for event in events:
+                    poll_cursor = event['id']
+                    if event['id'] not in sent:
+                        yield format_event(event)
+                sent = {event_id for event_id in sent if event_id > poll_cursor}
+                if not events:
+                    yield ': keepalive\n\n'
+                # Batch penuh: masih ada event tertunda, langsung poll lagi
+                next_poll = now if len(events) == POLL_BATCH_SIZE else now + poll_seconds()
+                continue
+
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=min(next_poll, deadline) - now)
+            except asyncio.TimeoutError:
+                continue
+            if event['id'] > poll_cursor and event['id'] not in sent:
+                sent.add(event['id'])
+                yield format_event(event)
+    finally:
+        hub.unsubscribe(queue)
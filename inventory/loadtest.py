@@ -0,0 +1,350 @@
+"""
+Load test HTTP per role terhadap server yang sedang berjalan (command `loadtest`).
+
+Skenario (JSON di inventory/loadtest_scenarios/) berisi jumlah virtual user per
+role dan daftar tugas berbobot per role:
+
+    {
+      "description": "...",
+      "duration_seconds": 60,
+      "ramp_up_seconds": 10,
+      "think_time_seconds": [0.5, 2.0],
+      "users": {"pegawai_gudang": 5, "direktur": 1},
+      "tasks": {
+        "pegawai_gudang": [
+          {"url": "incoming_list", "weight": 3},
+          {"url": "incoming_create", "method": "POST", "form": true, "weight": 1,
+           "data": {"item": "{item}", "supplier": "{supplier}", "quantity": "{random:1:20}", ...}}
+        ]
+      }
+    }
+
+- `url` adalah nama URL Django (`args`, `query` opsional); statistik dikelompokkan
+  per nama URL + method (atau `label` bila diisi).
+- `form: true` membuka halaman form dulu (GET) lalu mengirim POST dengan token
+  CSRF & idempotency key dari form tersebut, seperti browser.
+- Placeholder di args/query/data: {today}, {random:a:b}, {item}, {stocked_item},
+  {supplier}, {pending_request} (diambil dari database, di-refresh berkala).
+- Respons sukses: status di `expect` (default GET 200, POST 302).
+
+Setiap virtual user memakai satu koneksi keep-alive dan cookie sendiri, login
+sebagai user aktif dengan role tersebut (bergiliran bila user lebih dari satu).
+"""
+import http.client
+import json
+import random
+import re
+import threading
+import time
+from datetime import date
+from html.parser import HTMLParser
+from http.cookies import SimpleCookie
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connections
+from django.urls import reverse
+
+from .models import Items, RequestItems, Supplier, User
+
+SCENARIO_DIR = Path(__file__).resolve().parent / 'loadtest_scenarios'
+# Data acak untuk placeholder di-refresh paling cepat tiap N detik (query dari sisi klien)
+POOL_TTL_SECONDS = 2
+PLACEHOLDER = re.compile(r'\{([a-z_]+)(?::(-?\d+):(-?\d+))?\}')
+DEFAULT_EXPECT = {'GET': [200], 'POST': [302]}
+
+
+class ScenarioError(Exception):
+    pass
+
+
+def available_scenarios():
+    return sorted(path.stem for path in SCENARIO_DIR.glob('*.json'))
+
+
+def load_scenario(name_or_path):
+    """Skenario dari nama file di SCENARIO_DIR atau path JSON"""
+    path = Path(name_or_path)
+    if not path.suffix:
+        path = SCENARIO_DIR / f'{name_or_path}.json'
+    if not path.exists():
+        raise ScenarioError(
+            f'Skenario {name_or_path} tidak ditemukan. Tersedia: {", ".join(available_scenarios())}.'
+        )
+    scenario = json.loads(path.read_text())
+    for role, tasks in scenario.get('tasks', {}).items():
+        for task in tasks:
+            if 'url' not in task:
+                raise ScenarioError(f'Tugas role {role} tanpa "url".')
+            try:
+                _url(task, lambda match: '1')
+            except Exception as e:
+                raise ScenarioError(f'URL {task["url"]} tidak valid: {e}')
+    return scenario
+
+
+class _FormFields(HTMLParser):
+    """Nilai input tersembunyi (csrfmiddlewaretoken, idempotency_key, version) dari form"""
+
+    def __init__(self):
+        super().__init__()
+        self.fields = {}
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'input' and attrs.get('type') == 'hidden' and attrs.get('name'):
+            self.fields[attrs['name']] = attrs.get('value') or ''
+
+
+class DataPool:
+    """Id acak untuk placeholder, dimuat dari database dan di-cache sebentar"""
+
+    QUERIES = {
+        'item': lambda: Items.objects.filter(is_active=True),
+        'stocked_item': lambda: Items.objects.filter(is_active=True, current_stock__gte=20),
+        'supplier': lambda: Supplier.objects.filter(is_active=True),
+        'pending_request': lambda: RequestItems.objects.filter(status='pending'),
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def pick(self, name):
+        with self.lock:
+            loaded_at, values = self.values.get(name, (0, []))
+            if time.monotonic() - loaded_at > POOL_TTL_SECONDS:
+                values = list(self.QUERIES[name]().values_list('pk', flat=True)[:500])
+                self.values[name] = (time.monotonic(), values)
+        if not values:
+            raise ScenarioError(f'Tidak ada data untuk placeholder {{{name}}}.')
+        return str(random.choice(values))
+
+
+def _fill(value, pool):
+    if not isinstance(value, str):
+        return value
+
+    def replace(match):
+        name, low, high = match.groups()
+        if name == 'today':
+            return date.today().isoformat()
+        if name == 'random':
+            return str(random.randint(int(low), int(high)))
+        return pool.pick(name)
+    return PLACEHOLDER.sub(replace, value)
+
+
+def _url(task, fill):
+    args = [PLACEHOLDER.sub(fill, str(arg)) for arg in task.get('args', [])]
+    path = reverse(task['url'], args=args)
+    query = {key: PLACEHOLDER.sub(fill, str(value)) for key, value in task.get('query', {}).items()}
+    return f'{path}?{urlencode(query)}' if query else path
+
+
+class Stats:
+    """Latensi & status per nama URL (thread-safe)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.statuses = {}
+        self.skipped = {}
+
+    def skip(self, key):
+        """Tugas tidak dikirim karena placeholder tanpa data (bukan error server)"""
+        with self.lock:
+            self.skipped[key] = self.skipped.get(key, 0) + 1
+
+    def record(self, key, seconds, ok, status):
+        with self.lock:
+            self.latencies.setdefault(key, []).append(seconds)
+            self.errors[key] = self.errors.get(key, 0) + (0 if ok else 1)
+            statuses = self.statuses.setdefault(key, {})
+            statuses[status] = statuses.get(status, 0) + 1
+
+    def summary(self, elapsed):
+        rows = []
+        for key in sorted(set(self.latencies) | set(self.skipped)):
+            latencies = np.array(self.latencies.get(key, [0.0])) * 1000
+            requests = len(self.latencies.get(key, []))
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            rows.append({
+                'name': key,
+                'requests': requests,
+                'skipped': self.skipped.get(key, 0),
+                'errors': self.errors.get(key, 0),
+                'error_rate': self.errors.get(key, 0) / requests if requests else 0,
+                'rps': requests / elapsed,
+                'p50_ms': p50,
+                'p95_ms': p95,
+                'p99_ms': p99,
+                'max_ms': latencies.max(),
+                'statuses': {
+                    str(status): count for status, count in sorted(self.statuses.get(key, {}).items(), key=str)
+                },
+            })
+        return rows
+
+
+class VirtualUser:
+    """Satu klien: koneksi keep-alive, cookie, dan loop tugas berbobot untuk satu role"""
+
+    def __init__(self, base_url, user, tasks, stats, pool, think_time, timeout, password=None):
+        parts = urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.scheme = parts.scheme or 'http'
+        self.host = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.user = user
+        self.tasks = tasks
+        self.weights = [task.get('weight', 1) for task in tasks]
+        self.stats = stats
+        self.pool = pool
+        self.think_time = think_time
+        self.timeout = timeout
+        self.password = password
+        self.cookies = SimpleCookie()
+        self.connection = None
+
+    def request(self, method, path, data=None):
+        """Return (status, body). Redirect tidak diikuti (302 = sukses untuk POST form)"""
+        headers = {'Cookie': '; '.join(f'{key}={morsel.value}' for key, morsel in self.cookies.items())}
+        body = None
+        if data is not None:
+            body = urlencode(data)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            if 'csrftoken' in self.cookies:
+                headers['X-CSRFToken'] = self.cookies['csrftoken'].value
+            # CSRF di HTTPS mensyaratkan Referer dari origin yang sama
+            headers['Referer'] = f'{self.scheme}://{self.host}{self.prefix}{path}'
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = self.connection_class(self.host, timeout=self.timeout)
+            try:
+                self.connection.request(method, self.prefix + path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                content = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # Koneksi keep-alive ditutup server: sambung ulang sekali
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+        for header in response.headers.get_all('Set-Cookie') or []:
+            self.cookies.load(header)
+        return response.status, content
+
+    def timed(self, key, method, path, data=None, expect=None):
+        started = time.perf_counter()
+        try:
+            status, content = self.request(method, path, data)
+        except (OSError, http.client.HTTPException):
+            status, content = 'error', b''
+        ok = status in (expect or DEFAULT_EXPECT[method])
+        self.stats.record(key, time.perf_counter() - started, ok, status)
+        return status, content
+
+    def login(self):
+        if self.password is None:
+            # Session dibuat langsung di backend session bersama (server lokal, DB yang sama)
+            session = SessionStore()
+            session.update({
+                'user_id': self.user.pk, 'username': self.user.username,
+                'role': self.user.role, 'name': self.user.name,
+            })
+            session.save()
+            self.cookies['sessionid'] = session.session_key
+            return True
+        path = reverse('user_login')
+        status, content = self.timed('GET user_login', 'GET', path)
+        fields = _FormFields()
+        fields.feed(content.decode('utf-8', 'replace'))
+        data = {**fields.fields, 'username': self.user.username, 'password': self.password}
+        status, _ = self.timed('POST user_login', 'POST', path, data)
+        return status == 302
+
+    def run_task(self, task):
+        method = task.get('method', 'GET').upper()
+        fill = lambda match: _fill(match.group(0), self.pool)
+        path = _url(task, fill)
+        key = task.get('label') or task['url']
+        data = None
+        if method == 'POST':
+            data = {name: _fill(value, self.pool) for name, value in task.get('data', {}).items()}
+            if task.get('form'):
+                status, content = self.timed(f'GET {key}', 'GET', path, expect=task.get('form_expect'))
+                if status != 200:
+                    return
+                fields = _FormFields()
+                fields.feed(content.decode('utf-8', 'replace'))
+                data = {**fields.fields, **data}
+        self.timed(f'{method} {key}', method, path, data, task.get('expect'))
+
+    def run(self, deadline):
+        try:
+            if not self.login():
+                return
+            while time.monotonic() < deadline:
+                task = random.choices(self.tasks, weights=self.weights)[0]
+                try:
+                    self.run_task(task)
+                except ScenarioError:
+                    # Placeholder tanpa data (mis. belum ada permintaan pending): dilewati
+                    self.stats.skip(f'{task.get("method", "GET").upper()} {task.get("label") or task["url"]}')
+                time.sleep(random.uniform(*self.think_time))
+        finally:
+            if self.connection is not None:
+                self.connection.close()
+            # Thread memakai koneksi DB sendiri untuk session & placeholder
+            connections.close_all()
+
+
+def run_scenario(scenario, base_url, duration=None, users=None, password=None, timeout=30):
+    """
+    Jalankan skenario. `users` menimpa jumlah virtual user per role.
+    Return (baris ringkasan per URL, detik berjalan, jumlah virtual user).
+    """
+    duration = duration or scenario.get('duration_seconds', 60)
+    counts = {**scenario.get('users', {}), **(users or {})}
+    ramp_up = scenario.get('ramp_up_seconds', 0)
+    think_time = scenario.get('think_time_seconds', [0.5, 2.0])
+
+    stats = Stats()
+    pool = DataPool()
+    virtual_users = []
+    for role, count in counts.items():
+        tasks = scenario.get('tasks', {}).get(role)
+        if not count:
+            continue
+        if not tasks:
+            raise ScenarioError(f'Tidak ada tugas untuk role {role}.')
+        accounts = list(User.objects.filter(role=role, is_active=True).order_by('user_id'))
+        if not accounts:
+            raise ScenarioError(f'Tidak ada user aktif dengan role {role}.')
+        for index in range(count):
+            virtual_users.append(VirtualUser(
+                base_url, accounts[index % len(accounts)], tasks, stats, pool, think_time, timeout, password,
+            ))
+    if not virtual_users:
+        raise ScenarioError('Skenario tidak memiliki virtual user.')
+
+    random.shuffle(virtual_users)
+    started = time.monotonic()
+    deadline = started + duration
+    threads = []
+    for index, virtual_user in enumerate(virtual_users):
+        # Virtual user dimulai bertahap selama ramp-up
+        delay = ramp_up * index / len(virtual_users)
+        thread = threading.Timer(delay, virtual_user.run, args=[deadline])
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    return stats.summary(elapsed), elapsed, len(virtual_users)
@@ -0,0 +1,279 @@
+"""
+Pelacakan lot/batch & alokasi FEFO (first expired, first out).
+
+Setiap barang masuk yang diterima menjadi satu StockLot (nomor lot, tanggal
+kedaluwarsa, sisa). Barang keluar yang dikeluarkan (termasuk dari persetujuan
+permintaan) dialokasikan ke lot di lokasinya mulai dari kedaluwarsa terdekat;
+lot tanpa tanggal kedaluwarsa diambil terakhir. Transfer memindahkan sisa lot
+dengan urutan yang sama ke lokasi tujuan.
+
+Alokasi dibuat agar tetap cepat walau ada ribuan lot terbuka per barang:
+- Kandidat dibaca tanpa lock lewat index parsial (barang, lokasi, kedaluwarsa)
+  per potongan kecil, berhenti begitu sisa lot cukup menutup kebutuhan.
+- Hanya lot yang benar-benar terpakai yang dikunci (urut pk agar tidak
+  deadlock), lalu sisanya dicek ulang; jika lot sudah diambil transaksi lain,
+  kandidat berikutnya dibaca ulang.
+
+Pemakaian lot = total LotAllocation-nya (barang keluar & transfer), sehingga
+sisa lot selalu = jumlah diterima - total alokasi (minimal 0) dan tidak pernah
+melebihi jumlah barang masuknya, walau barang masuk diedit/dibatalkan.
+
+Stok yang tidak tercatat di lot (saldo sebelum fitur lot, koreksi
+rekonsiliasi) tidak punya lot: kekurangan lot dibiarkan tidak teralokasi,
+saldo ItemStock tetap sumber kebenaran jumlah stok.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import LotAllocation, StockLot
+
+CANDIDATE_CHUNK = 20
+
+
+def _fefo_candidates(item_id, location_id):
+    """
+    (lot_id, sisa) lot terbuka sesuai urutan FEFO, dibaca per potongan (keyset).
+    Dua tahap agar kedua urutan memakai index: lot berkedaluwarsa dulu, lalu lot tanpa kedaluwarsa.
+    """
+    open_lots = StockLot.objects.filter(item_id=item_id, location_id=location_id, quantity_remaining__gt=0)
+
+    after = Q()
+    while True:
+        chunk = list(
+            open_lots.filter(after, expiry_date__isnull=False)
+            .order_by('expiry_date', 'lot_id')
+            .values_list('lot_id', 'expiry_date', 'quantity_remaining')[:CANDIDATE_CHUNK]
+        )
+        for lot_id, _, remaining in chunk:
+            yield lot_id, remaining
+        if len(chunk) < CANDIDATE_CHUNK:
+            break
+        lot_id, expiry_date, _ = chunk[-1]
+        after = Q(expiry_date__gt=expiry_date) | Q(expiry_date=expiry_date, lot_id__gt=lot_id)
+
+    after = Q()
+    while True:
+        chunk = list(
+            open_lots.filter(after, expiry_date__isnull=True)
+            .order_by('lot_id')
+            .values_list('lot_id', 'quantity_remaining')[:CANDIDATE_CHUNK]
+        )
+        yield from chunk
+        if len(chunk) < CANDIDATE_CHUNK:
+            break
+        after = Q(lot_id__gt=chunk[-1][0])
+
+
+def take_from_lots(item_id, location_id, quantity):
+    """
+    Kurangi sisa lot (barang, lokasi) sebanyak `quantity` dengan urutan FEFO.
+    Dipanggil di dalam transaksi DB. Return [(lot, jumlah diambil)] urut FEFO;
+    totalnya bisa kurang dari `quantity` jika stok tidak tercakup lot.
+    """
+    taken = []
+    need = quantity
+    while need > 0:
+        picked = []
+        covered = 0
+        for lot_id, remaining in _fefo_candidates(item_id, location_id):
+            picked.append(lot_id)
+            covered += remaining
+            if covered >= need:
+                break
+        if not picked:
+            break
+
+        locked = {
+            lot.pk: lot
+            for lot in StockLot.objects.select_for_update().filter(
+                pk__in=picked, quantity_remaining__gt=0
+            ).order_by('pk')
+        }
+        now = timezone.now()
+        for lot_id in picked:
+            lot = locked.get(lot_id)
+            if lot is None or not need:
+                continue
+            quantity_taken = min(lot.quantity_remaining, need)
+            StockLot.objects.filter(pk=lot_id).update(
+                quantity_remaining=F('quantity_remaining') - quantity_taken, updated_at=now
+            )
+            lot.quantity_remaining -= quantity_taken
+            taken.append((lot, quantity_taken))
+            need -= quantity_taken
+    return taken
+
+
+def _allocated(lot_id):
+    """Total alokasi (pemakaian) satu lot"""
+    return LotAllocation.objects.filter(lot_id=lot_id).aggregate(total=Sum('quantity'))['total'] or 0
+
+
+def _refresh_remaining(lot_ids):
+    """
+    Hitung ulang sisa lot dari total alokasinya (lot dikunci urut pk): sisa tidak
+    pernah melebihi jumlah yang diterima, termasuk lot yang barang masuknya dibatalkan.
+    """
+    lot_ids = list(
+        StockLot.objects.select_for_update().filter(pk__in=lot_ids).order_by('pk').values_list('pk', flat=True)
+    )
+    allocated = LotAllocation.objects.filter(lot_id=OuterRef('pk')).order_by().values('lot_id').annotate(
+        total=Sum('quantity')
+    ).values('total')
+    StockLot.objects.filter(pk__in=lot_ids).update(
+        quantity_remaining=Greatest(F('quantity_received') - Coalesce(Subquery(allocated), 0), 0),
+        updated_at=timezone.now(),
+    )
+
+
+def _create_allocations(outgoing, taken):
+    return LotAllocation.objects.bulk_create([
+        LotAllocation(lot=lot, outgoing=outgoing, quantity=quantity) for lot, quantity in taken
+    ])
+
+
+def allocate_outgoing(outgoing):
+    """Alokasikan barang keluar yang sudah dikeluarkan ke lot (FEFO). Return list LotAllocation"""
+    if outgoing.status != 'released' or outgoing.location_id is None:
+        return []
+    return _create_allocations(
+        outgoing, take_from_lots(outgoing.item_id, outgoing.location_id, outgoing.quantity)
+    )
+
+
+def release_outgoing(outgoing):
+    """Batalkan alokasi lot barang keluar (sisa lot dihitung ulang)"""
+    allocations = LotAllocation.objects.filter(outgoing=outgoing)
+    lot_ids = set(allocations.values_list('lot_id', flat=True))
+    if lot_ids:
+        allocations.delete()
+        _refresh_remaining(lot_ids)
+
+
+def _lot_effect(outgoing):
+    if outgoing.status != 'released':
+        return None
+    return outgoing.item_id, outgoing.location_id, outgoing.quantity
+
+
+def sync_outgoing_allocations(outgoing, old=None):
+    """Samakan alokasi lot dengan barang keluar setelah dibuat/diedit (`old` = baris sebelum edit)"""
+    if old is not None:
+        if _lot_effect(old) == _lot_effect(outgoing):
+            return
+        release_outgoing(outgoing)
+    allocate_outgoing(outgoing)
+
+
+def _move_allocations(lot, excess):
+    """
+    Pindahkan `excess` unit alokasi barang keluar dari lot ke lot lain (FEFO), alokasi
+    terbaru dulu. Lot asal harus sudah bersisa 0 agar tidak terpilih lagi. Pemakaian oleh
+    transfer/barang keluar yang sudah diarsip tidak dipindah (barangnya sudah berpindah).
+    """
+    allocations = lot.allocations.filter(outgoing__isnull=False).select_related('outgoing')
+    for allocation in allocations.order_by('-allocation_id'):
+        if excess <= 0:
+            break
+        moved = min(allocation.quantity, excess)
+        if moved == allocation.quantity:
+            allocation.delete()
+        else:
+            allocation.quantity -= moved
+            allocation.save(update_fields=['quantity'])
+        outgoing = allocation.outgoing
+        _create_allocations(outgoing, take_from_lots(outgoing.item_id, outgoing.location_id, moved))
+        excess -= moved
+
+
+def sync_incoming_lot(incoming):
+    """
+    Buat/perbarui lot barang masuk. Jika jumlahnya dikurangi/dibatalkan di bawah yang
+    sudah dialokasikan, kelebihan alokasi barang keluar dipindah ke lot lain (FEFO).
+    Lot barang masuk yang tidak lagi diterima dan tidak punya alokasi dihapus.
+    """
+    lot = StockLot.objects.select_for_update().filter(incoming=incoming).first()
+    quantity = incoming.quantity if incoming.status == 'received' else 0
+    if lot is None:
+        if quantity:
+            StockLot.objects.create(
+                item_id=incoming.item_id,
+                location_id=incoming.location_id,
+                incoming=incoming,
+                lot_number=incoming.lot_number or incoming.transaction_number,
+                expiry_date=incoming.expiry_date,
+                received_date=incoming.transaction_date,
+                quantity_received=quantity,
+                quantity_remaining=quantity,
+            )
+        return
+
+    allocated = _allocated(lot.pk)
+    lot.item_id = incoming.item_id
+    lot.location_id = incoming.location_id
+    lot.lot_number = incoming.lot_number or incoming.transaction_number
+    lot.expiry_date = incoming.expiry_date
+    lot.received_date = incoming.transaction_date
+    lot.quantity_received = quantity
+    lot.quantity_remaining = max(quantity - allocated, 0)
+    lot.save()
+
+    if allocated > quantity:
+        _move_allocations(lot, allocated - quantity)
+        allocated = _allocated(lot.pk)
+    if not quantity and not allocated:
+        lot.delete()
+
+
+def create_incoming_lots(transactions):
+    """Lot untuk barang masuk yang dibuat lewat bulk_create (scan station); satu query"""
+    StockLot.objects.bulk_create([
+        StockLot(
+            item_id=trans.item_id,
+            location_id=trans.location_id,
+            incoming=trans,
+            lot_number=trans.lot_number or trans.transaction_number,
+            expiry_date=trans.expiry_date,
+            received_date=trans.transaction_date,
+            quantity_received=trans.quantity,
+            quantity_remaining=trans.quantity,
+        )
+        for trans in transactions
+        if trans.status == 'received'
+    ])
+
+
+def transfer_lots(transfer):
+    """Pindahkan sisa lot (FEFO) dari lokasi asal ke lokasi tujuan; lot dipecah per lokasi"""
+    taken = take_from_lots(transfer.item_id, transfer.from_location_id, transfer.quantity)
+    LotAllocation.objects.bulk_create([
+        LotAllocation(lot=lot, transfer=transfer, quantity=quantity) for lot, quantity in taken
+    ])
+    StockLot.objects.bulk_create([
+        StockLot(
+            item_id=transfer.item_id,
+            location_id=transfer.to_location_id,
+            lot_number=lot.lot_number,
+            expiry_date=lot.expiry_date,
+            received_date=lot.received_date,
+            quantity_received=quantity,
+            quantity_remaining=quantity,
+        )
+        for lot, quantity in taken
+    ])
+
+
+def expiry_warning_days():
+    """Default jangkauan laporan lot yang segera kedaluwarsa (hari)"""
+    return getattr(settings, 'INVENTORY_LOT_EXPIRY_WARNING_DAYS', 30)
+
+
+def expiring_lots(days, queryset=None, today=None):
+    """Lot bersisa yang kedaluwarsa dalam `days` hari, termasuk yang sudah lewat (memakai index parsial)"""
+    today = today or timezone.localdate()
+    queryset = StockLot.objects.all() if queryset is None else queryset
+    return queryset.filter(quantity_remaining__gt=0, expiry_date__lte=today + timedelta(days=days))
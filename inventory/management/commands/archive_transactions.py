@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventory.archival import archive_transactions
+from inventory.snapshots import nearest_snapshot_date
+
+# Forecasting & grafik dashboard membaca histori aktif sampai 1 tahun ke belakang
+MIN_ARCHIVE_DAYS = 366
+
+
+class Command(BaseCommand):
+    help = (
+        'Pindahkan transaksi masuk/keluar yang sudah final dan lebih tua dari horizon '
+        'ke tabel arsip, per batch. Saldo dibawa ke Items.archived_balance.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=getattr(settings, 'INVENTORY_ARCHIVE_AFTER_DAYS', 730),
+                            help='Umur minimal transaksi yang diarsip (hari)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Jumlah baris per transaksi DB')
+
+    def handle(self, *args, **options):
+        if options['days'] < MIN_ARCHIVE_DAYS:
+            raise CommandError(f'--days minimal {MIN_ARCHIVE_DAYS}.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size harus lebih dari 0.')
+
+        horizon = timezone.localdate() - timedelta(days=options['days'])
+
+        # Batas arsip dibulatkan ke snapshot stok agar query stok per tanggal tetap
+        # bisa memakai snapshot + transaksi aktif untuk periode sesudahnya
+        cutoff = nearest_snapshot_date(horizon)
+        if cutoff is None:
+            raise CommandError(
+                f'Belum ada snapshot stok sebelum {horizon}. '
+                'Jalankan capture_stock_snapshots --backfill terlebih dahulu.'
+            )
+
+        self.stdout.write(f'Mengarsip transaksi s.d. {cutoff}...')
+        result = archive_transactions(
+            cutoff,
+            batch_size=options['batch_size'],
+            progress=lambda model, total: self.stdout.write(f'  {model.__name__}: {total}'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{name}: {count} diarsip' for name, count in result.items())
+        ))
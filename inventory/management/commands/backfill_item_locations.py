@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from inventory.models import (
+    ArchivedIncomingTransaction, ArchivedOutgoingTransaction, IncomingTransaction, Items, ItemStock,
+    Location, OutgoingTransaction,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Isi lokasi default pada transaksi lama yang belum memiliki lokasi dan samakan total saldo '
+        'per lokasi (ItemStock) dengan stok barang; selisihnya dibukukan di lokasi default.'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            location = Location.get_default()
+
+            transactions = 0
+            for model in [IncomingTransaction, OutgoingTransaction]:
+                transactions += model.objects.filter(location__isnull=True).update(location=location)
+            for model in [ArchivedIncomingTransaction, ArchivedOutgoingTransaction]:
+                transactions += model.objects.filter(location_id__isnull=True).update(location_id=location.pk)
+
+            located = dict(
+                ItemStock.objects.order_by().values('item_id').annotate(
+                    total=Sum('quantity')
+                ).values_list('item_id', 'total')
+            )
+            items = 0
+            for item in Items.objects.only('items_id', 'current_stock').iterator():
+                difference = item.current_stock - located.get(item.pk, 0)
+                if difference:
+                    ItemStock.add(item, location, difference)
+                    items += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{transactions} transaksi diberi lokasi {location.name}; saldo {items} barang disesuaikan.'
+        ))
@@ -0,0 +1,134 @@
+import inspect
+import statistics
+import time
+
+from asgiref.sync import async_to_sync
+from django import forms as django_forms
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.template import engines
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from inventory import forms
+from inventory.models import Items, User
+
+# (nama, url name, role yang boleh membuka, butuh barang)
+PAGES = [
+    ('dashboard', 'dashboard', 'direktur', False),
+    ('report_list', 'direktur_laporan', 'direktur', False),
+    ('item_detail', 'item_detail', 'pegawai_gudang', True),
+]
+
+FILTER_TEMPLATE = '{% load crispy_forms_tags %}{{ form|crispy }}'
+TAG_TEMPLATE = '{% load crispy_forms_tags %}{% crispy form %}'
+
+
+async def _await(coroutine):
+    return await coroutine
+
+
+class Command(BaseCommand):
+    help = (
+        'Ukur waktu render form (init, |crispy, {% crispy %}) dan halaman berat '
+        '(dashboard, laporan, detail barang) dengan data di database saat ini.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Jumlah pengulangan per pengukuran')
+        parser.add_argument('--username', help='User untuk semua halaman (default: user aktif pertama dengan role halaman)')
+        parser.add_argument('--item-id', type=int, help='Barang untuk halaman detail (default: barang aktif pertama)')
+        parser.add_argument('--skip-forms', action='store_true', help='Hanya ukur halaman')
+        parser.add_argument('--skip-pages', action='store_true', help='Hanya ukur form')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations harus lebih dari 0.')
+        self.iterations = options['iterations']
+
+        if not options['skip_forms']:
+            self.benchmark_forms()
+        if not options['skip_pages']:
+            self.benchmark_pages(options['username'], options['item_id'])
+
+    def measure(self, func):
+        """Median (ms) dari `iterations` kali pemanggilan, setelah satu kali pemanasan"""
+        func()
+        timings = []
+        for _ in range(self.iterations):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def benchmark_forms(self):
+        engine = engines['django']
+        filter_template = engine.from_string(FILTER_TEMPLATE)
+        tag_template = engine.from_string(TAG_TEMPLATE)
+
+        self.stdout.write(f'{"Form":<28}{"init":>10}{"|crispy":>12}{"{% crispy %}":>14}')
+        for name, form_class in inspect.getmembers(forms, inspect.isclass):
+            if not issubclass(form_class, django_forms.BaseForm) or form_class.__module__ != forms.__name__:
+                continue
+            form = form_class()
+            init = self.measure(form_class)
+            as_filter = self.measure(lambda: filter_template.render({'form': form_class()}))
+            if hasattr(form, 'helper'):
+                as_tag = f'{self.measure(lambda: tag_template.render({"form": form_class()})):.2f}'
+            else:
+                as_tag = '-'
+            self.stdout.write(f'{name:<28}{init:>10.3f}{as_filter:>12.2f}{as_tag:>14}')
+
+    def benchmark_pages(self, username, item_id):
+        item = Items.objects.filter(pk=item_id).first() if item_id else Items.objects.filter(is_active=True).first()
+        factory = RequestFactory()
+        sessions = {}
+
+        self.stdout.write('')
+        self.stdout.write(f'{"Halaman":<16}{"user":<14}{"view":>10}{"render":>10}{"total":>10}{"query":>8}')
+        for name, url_name, role, needs_item in PAGES:
+            users = User.objects.filter(is_active=True)
+            user = users.filter(username=username).first() if username else users.filter(role=role).first()
+            if user is None:
+                self.stdout.write(f'{name:<16}dilewati (tidak ada user aktif {username or role})')
+                continue
+            if needs_item and item is None:
+                self.stdout.write(f'{name:<16}dilewati (belum ada barang)')
+                continue
+            if user.pk not in sessions:
+                session = SessionStore()
+                session.update({'user_id': user.pk, 'role': user.role, 'name': user.name})
+                session.save()
+                sessions[user.pk] = session
+            session = sessions[user.pk]
+            path = reverse(url_name, args=[item.pk] if needs_item else [])
+            match = resolve(path)
+
+            def request_page(render=True):
+                request = factory.get(path)
+                request.session = session
+                request._messages = FallbackStorage(request)
+                response = match.func(request, *match.args, **match.kwargs)
+                if inspect.iscoroutine(response):
+                    response = async_to_sync(_await)(response)
+                if render and hasattr(response, 'render') and not response.is_rendered:
+                    response.render()
+                return response
+
+            status = request_page().status_code
+            if status != 200:
+                self.stdout.write(f'{name:<16}dilewati (status {status} untuk {user.username})')
+                continue
+            with CaptureQueriesContext(connection) as queries:
+                request_page()
+            view = self.measure(lambda: request_page(render=False))
+            total = self.measure(request_page)
+            # View async me-render sendiri: waktu render sudah termasuk di kolom view
+            deferred = hasattr(request_page(render=False), 'render')
+            render = f'{max(total - view, 0):.2f}' if deferred else '-'
+            self.stdout.write(
+                f'{name:<16}{user.username:<14}{view:>10.2f}{render:>10}{total:>10.2f}{len(queries):>8}'
+            )
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventory.models import StockSnapshot
+from inventory.snapshots import capture_snapshot, first_transaction_date, month_end, month_ends_between
+
+
+class Command(BaseCommand):
+    help = (
+        'Simpan snapshot saldo stok akhir bulan per barang. Tanpa argumen menyimpan '
+        'akhir bulan lalu; jadwalkan tiap awal bulan (mis. cron tanggal 1).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Tanggal snapshot tertentu (YYYY-MM-DD)')
+        parser.add_argument('--backfill', action='store_true',
+                            help='Isi snapshot akhir bulan yang belum ada sejak transaksi pertama')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Hitung ulang semua snapshot akhir bulan sejak transaksi pertama')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        last_month_end = today.replace(day=1) - timedelta(days=1)
+
+        if options['date']:
+            try:
+                dates = [datetime.strptime(options['date'], '%Y-%m-%d').date()]
+            except ValueError:
+                raise CommandError('Format --date harus YYYY-MM-DD.')
+            if dates[0] >= today:
+                raise CommandError('Snapshot hanya untuk tanggal yang sudah lewat.')
+        elif options['backfill'] or options['rebuild']:
+            first = first_transaction_date()
+            if first is None:
+                self.stdout.write('Belum ada transaksi stok.')
+                return
+            dates = month_ends_between(first, last_month_end)
+            if options['backfill']:
+                existing = set(StockSnapshot.objects.filter(
+                    snapshot_date__in=dates
+                ).values_list('snapshot_date', flat=True).distinct())
+                dates = [d for d in dates if d not in existing]
+        else:
+            dates = [month_end(last_month_end)]
+
+        # Urut naik: setiap snapshot dibangun dari snapshot sebelumnya
+        for snapshot_date in sorted(dates):
+            saved = capture_snapshot(snapshot_date)
+            self.stdout.write(f'{snapshot_date}: {saved} barang')
+
+        self.stdout.write(self.style.SUCCESS(f'{len(dates)} snapshot disimpan.'))
@@ -0,0 +1,72 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import outbox
+from inventory.models import OutboxEntry
+
+
+class Command(BaseCommand):
+    help = (
+        'Baca change feed outbox sejak checkpoint konsumen dan tulis sebagai JSON Lines. '
+        'Checkpoint dikonfirmasi per batch setelah batch selesai ditulis; entri yang sudah '
+        'dibaca semua konsumen dipadatkan.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consumer', help='Nama konsumen (checkpoint disimpan per nama)')
+        parser.add_argument('--output', help='File tujuan (ditambahkan di akhir; default: stdout)')
+        parser.add_argument('--topic', action='append',
+                            choices=[value for value, _ in OutboxEntry.TOPIC_CHOICES],
+                            help='Hanya topik ini (boleh diulang; default: semua)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help=f'Jumlah entri per batch (maks. {outbox.MAX_FETCH_LIMIT})')
+        parser.add_argument('--follow', action='store_true',
+                            help='Terus berjalan dan poll entri baru')
+        parser.add_argument('--poll-seconds', type=float, default=5,
+                            help='Jeda poll saat --follow dan tidak ada entri baru')
+        parser.add_argument('--compact', action='store_true',
+                            help='Hanya padatkan outbox (entri terkonfirmasi / lewat masa simpan)')
+        parser.add_argument('--remove', action='store_true',
+                            help='Hapus checkpoint --consumer agar tidak lagi menahan pemadatan')
+
+    def handle(self, *args, **options):
+        if options['compact']:
+            self.stdout.write(self.style.SUCCESS(f'{outbox.compact()} entri outbox dihapus.'))
+            return
+        if not options['consumer']:
+            raise CommandError('--consumer wajib diisi.')
+        if options['remove']:
+            if not outbox.remove_consumer(options['consumer']):
+                raise CommandError(f'Konsumen {options["consumer"]} tidak terdaftar.')
+            self.stdout.write(self.style.SUCCESS(f'Konsumen {options["consumer"]} dihapus.'))
+            return
+        if not 0 < options['batch_size'] <= outbox.MAX_FETCH_LIMIT:
+            raise CommandError(f'--batch-size harus 1-{outbox.MAX_FETCH_LIMIT}.')
+
+        consumer = options['consumer']
+        output = open(options['output'], 'a') if options['output'] else self.stdout
+        cursor = outbox.consumer_position(consumer, register=True)
+        total = 0
+        try:
+            while True:
+                entries, next_cursor, has_more = outbox.fetch(cursor, options['batch_size'], options['topic'])
+                for entry in entries:
+                    output.write(json.dumps(outbox.serialize(entry)) + '\n')
+                output.flush()
+                if next_cursor > cursor:
+                    cursor = outbox.acknowledge(consumer, next_cursor)
+                    total += len(entries)
+                if has_more:
+                    continue
+                if not options['follow']:
+                    break
+                time.sleep(options['poll_seconds'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if output is not self.stdout:
+                output.close()
+
+        self.stderr.write(f'{consumer}: {total} entri dibaca, posisi {cursor}.')
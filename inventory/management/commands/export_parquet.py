@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.analytics_export import DATASETS, export_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        'Export barang, supplier, transaksi masuk/keluar (termasuk arsip), dan permintaan '
+        'ke Parquet per bulan. Run berikutnya hanya menulis ulang partisi yang berubah '
+        'sejak watermark updated_at.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output',
+                            default=getattr(settings, 'INVENTORY_ANALYTICS_EXPORT_DIR', settings.BASE_DIR / 'analytics'),
+                            help='Direktori tujuan export')
+        parser.add_argument('--dataset', action='append', choices=list(DATASETS),
+                            help='Dataset yang diexport (boleh diulang; default: semua)')
+        parser.add_argument('--full', action='store_true',
+                            help='Tulis ulang seluruh dataset (juga membuang baris yang sudah dihapus)')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Jumlah baris per record batch')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size harus lebih dari 0.')
+
+        self.stdout.write(f'Export ke {options["output"]}...')
+        for name in options['dataset'] or DATASETS:
+            result = export_dataset(name, options['output'], full=options['full'], batch_size=options['batch_size'])
+            self.stdout.write(
+                f'  {name}: export {result["mode"]}, {result["rows"]} baris, '
+                f'{result["partitions"]} partisi ditulis'
+            )
+        self.stdout.write(self.style.SUCCESS('Export selesai.'))
@@ -0,0 +1,83 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.loadtest import ScenarioError, available_scenarios, load_scenario, run_scenario
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test HTTP per role terhadap server yang sedang berjalan (mis. runserver/gunicorn lokal '
+        'dengan database yang sama). Laporan: throughput, latensi p50/p95/p99 dan error per URL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', nargs='?', default='hari_kerja',
+                            help=f'Nama skenario ({", ".join(available_scenarios())}) atau path file JSON')
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='URL server yang diuji')
+        parser.add_argument('--duration', type=int, help='Durasi dalam detik (default: dari skenario)')
+        parser.add_argument('--users', nargs='+', metavar='ROLE=N', default=[],
+                            help='Ganti jumlah virtual user per role, mis. pegawai_gudang=20')
+        parser.add_argument('--password',
+                            help='Login lewat form /login/ dengan password ini untuk semua user '
+                                 '(default: session dibuat langsung di database)')
+        parser.add_argument('--timeout', type=float, default=30, help='Timeout per request (detik)')
+        parser.add_argument('--json', dest='json_output', help='Simpan ringkasan ke file JSON')
+
+    def handle(self, *args, **options):
+        users = {}
+        for value in options['users']:
+            role, _, count = value.partition('=')
+            if not count.isdigit():
+                raise CommandError(f'Format --users tidak valid: {value} (gunakan ROLE=N).')
+            users[role] = int(count)
+        if options['duration'] is not None and options['duration'] < 1:
+            raise CommandError('--duration harus lebih dari 0.')
+
+        try:
+            scenario = load_scenario(options['scenario'])
+            self.stdout.write(f'Skenario {options["scenario"]}: {scenario.get("description", "")}')
+            rows, elapsed, virtual_users = run_scenario(
+                scenario, options['base_url'], options['duration'], users,
+                options['password'], options['timeout'],
+            )
+        except ScenarioError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write('')
+        self.stdout.write(
+            f'{"URL":<40}{"req":>7}{"rps":>8}{"p50":>9}{"p95":>9}{"p99":>9}{"max":>9}{"error":>8}  status'
+        )
+        for row in rows:
+            statuses = ' '.join(f'{status}:{count}' for status, count in row['statuses'].items())
+            if row['skipped']:
+                statuses = f'{statuses} dilewati:{row["skipped"]}'.strip()
+            self.stdout.write(
+                f'{row["name"]:<40}{row["requests"]:>7}{row["rps"]:>8.2f}{row["p50_ms"]:>9.1f}'
+                f'{row["p95_ms"]:>9.1f}{row["p99_ms"]:>9.1f}{row["max_ms"]:>9.1f}'
+                f'{row["error_rate"]:>8.1%}  {statuses}'
+            )
+
+        total = sum(row['requests'] for row in rows)
+        errors = sum(row['errors'] for row in rows)
+        skipped = sum(row['skipped'] for row in rows)
+        summary = (
+            f'{virtual_users} virtual user, {elapsed:.1f} detik: {total} request '
+            f'({total / elapsed:.2f}/detik), error {errors} ({errors / total if total else 0:.1%}), '
+            f'{skipped} tugas dilewati (tidak ada data). Latensi dalam ms.'
+        )
+        self.stdout.write('')
+        self.stdout.write(self.style.ERROR(summary) if errors else self.style.SUCCESS(summary))
+
+        if options['json_output']:
+            with open(options['json_output'], 'w') as output:
+                json.dump({
+                    'scenario': options['scenario'],
+                    'base_url': options['base_url'],
+                    'virtual_users': virtual_users,
+                    'elapsed_seconds': elapsed,
+                    'requests': total,
+                    'errors': errors,
+                    'skipped': skipped,
+                    'urls': rows,
+                }, output, indent=2, default=float)
@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventory.archival import purge_item
+from inventory.models import Items, StockAlert
+
+
+class Command(BaseCommand):
+    help = (
+        'Hapus permanen barang yang sudah dihapus (nonaktif) melewati masa tenggang, '
+        'beserta histori transaksinya, per batch. Jadwalkan di luar jam kerja.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-days', type=int,
+                            default=getattr(settings, 'INVENTORY_PURGE_RETIRED_AFTER_DAYS', 30),
+                            help='Masa tenggang sejak barang dihapus (hari)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Jumlah baris per transaksi DB')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Hanya tampilkan barang yang akan dihapus')
+
+    def handle(self, *args, **options):
+        if options['grace_days'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--grace-days tidak boleh negatif dan --batch-size harus lebih dari 0.')
+
+        threshold = timezone.now() - timedelta(days=options['grace_days'])
+        items = list(Items.objects.filter(
+            is_active=False,
+            retired_at__isnull=False,
+            retired_at__lte=threshold,
+        ).order_by('retired_at').values_list('items_id', 'code'))
+
+        purged = 0
+        for item_id, code in items:
+            if options['dry_run']:
+                self.stdout.write(f'{code} akan dihapus')
+                continue
+            if purge_item(item_id, batch_size=options['batch_size']):
+                purged += 1
+                self.stdout.write(f'{code} dihapus')
+
+        if purged:
+            cache.delete(StockAlert.OPEN_COUNT_CACHE_KEY)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(items)} barang' + (' akan dihapus.' if options['dry_run'] else f', {purged} dihapus permanen.')
+        ))
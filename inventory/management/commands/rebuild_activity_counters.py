@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from inventory.activity import rebuild_item_counters, rebuild_supplier_counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Hitung ulang counter aktivitas barang (total/terakhir masuk & keluar) dan supplier '
+        '(total pengiriman, total item, pengiriman terakhir) dari histori transaksi, termasuk arsip.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Jumlah baris per bulk update')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size harus lebih dari 0.')
+
+        with transaction.atomic():
+            items = rebuild_item_counters(batch_size=options['batch_size'])
+            suppliers = rebuild_supplier_counters(batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Counter aktivitas dihitung ulang: {items} barang, {suppliers} supplier.'
+        ))
@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from inventory.reconciliation import find_discrepancies, id_ranges, repair_range
+
+
+class Command(BaseCommand):
+    help = (
+        'Bandingkan stok barang dengan histori transaksi (masuk received - keluar released). '
+        'Tanpa --repair hanya melaporkan selisih.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Jumlah rentang items_id per chunk')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Jumlah chunk yang diproses paralel')
+        parser.add_argument('--start-id', type=int, help='items_id awal (inklusif)')
+        parser.add_argument('--end-id', type=int, help='items_id akhir (eksklusif)')
+        parser.add_argument('--repair', action='store_true',
+                            help='Perbaiki stok yang selisih dan catat StockAdjustment')
+        parser.add_argument('--reason', default='', help='Alasan yang dicatat pada StockAdjustment')
+        parser.add_argument('--limit', type=int, default=50,
+                            help='Jumlah baris selisih yang ditampilkan')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--chunk-size dan --workers harus lebih dari 0.')
+
+        ranges = id_ranges(options['chunk_size'], options['start_id'], options['end_id'])
+        if not ranges:
+            self.stdout.write('Tidak ada barang untuk direkonsiliasi.')
+            return
+
+        if options['repair']:
+            task = lambda bounds: repair_range(*bounds, reason=options['reason'])
+        else:
+            task = lambda bounds: find_discrepancies(*bounds)
+
+        def run(bounds):
+            # Setiap thread memakai koneksi DB sendiri; tutup setelah selesai
+            try:
+                return task(bounds)
+            finally:
+                connections.close_all()
+
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                results = list(executor.map(run, ranges))
+        else:
+            results = [task(bounds) for bounds in ranges]
+
+        rows = [row for chunk in results for row in chunk]
+
+        if options['repair']:
+            for adjustment in rows[:options['limit']]:
+                self.stdout.write(
+                    f'{adjustment.item.code}: {adjustment.previous_stock} -> {adjustment.new_stock} '
+                    f'({adjustment.difference:+d})'
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f'{len(rows)} barang diperbaiki dari {len(ranges)} chunk.'
+            ))
+            return
+
+        for row in rows[:options['limit']]:
+            self.stdout.write(
+                f"{row['code']}: stok {row['current_stock']}, seharusnya {row['expected_stock']} "
+                f"(selisih {row['difference']:+d})"
+            )
+        style = self.style.WARNING if rows else self.style.SUCCESS
+        self.stdout.write(style(
+            f'{len(rows)} barang selisih dari {len(ranges)} chunk.'
+            + (' Jalankan dengan --repair untuk memperbaiki.' if rows else '')
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.idempotency import sweep_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Hapus idempotency key yang sudah kedaluwarsa (INVENTORY_IDEMPOTENCY_KEY_TTL_HOURS).'
+
+    def handle(self, *args, **options):
+        deleted = sweep_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} idempotency key kedaluwarsa dihapus.'))
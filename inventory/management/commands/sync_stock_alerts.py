@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from inventory.models import Items, StockAlert
+
+
+class Command(BaseCommand):
+    help = (
+        'Sinkronkan tabel alert stok dengan status stok saat ini. '
+        'Dipakai sekali untuk backfill data lama atau setelah perubahan stok massal; '
+        'operasi harian sudah ditangani otomatis saat transaksi.'
+    )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        below_threshold = Q(current_stock__lte=0) | Q(current_stock__lte=F('minimum_stock'))
+
+        with transaction.atomic():
+            # Tutup alert yang jenisnya tidak lagi sesuai dengan status stok saat ini
+            open_alerts = StockAlert.objects.filter(status='open')
+            stale = open_alerts.filter(
+                Q(item__is_active=False) |
+                Q(alert_type='out_of_stock', item__current_stock__gt=0) |
+                Q(alert_type='low_stock', item__current_stock__lte=0) |
+                Q(alert_type='low_stock', item__current_stock__gt=F('item__minimum_stock'))
+            )
+            resolved = stale.update(status='resolved', resolved_at=now)
+
+            # Buka alert untuk barang di bawah threshold yang belum punya alert terbuka
+            items = Items.objects.filter(is_active=True).filter(below_threshold).exclude(
+                stock_alerts__status='open'
+            ).only('items_id', 'current_stock', 'minimum_stock')
+
+            new_alerts = [
+                StockAlert(
+                    item=item,
+                    alert_type=item.stock_status,
+                    stock_level=item.current_stock,
+                    minimum_stock=item.minimum_stock,
+                )
+                for item in items.iterator()
+            ]
+            StockAlert.objects.bulk_create(new_alerts, batch_size=1000)
+
+        cache.delete(StockAlert.OPEN_COUNT_CACHE_KEY)
+        self.stdout.write(self.style.SUCCESS(
+            f'Alert baru: {len(new_alerts)}, alert diselesaikan: {resolved}'
+        ))
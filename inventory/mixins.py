@@ -92,6 +92,32 @@ class ProduksiOrGudangMixin(UserPassesTestMixin):
         return redirect('dashboard')
 
 
+class GudangOrDirekturMixin(UserPassesTestMixin):
+    """
+    Mixin for monitoring views shared by Gudang and Direktur (e.g. stock alerts)
+    Admin is EXCLUDED from operational tasks
+    """
+    
+    def test_func(self):
+        user_id = self.request.session.get('user_id')
+        if user_id:
+            try:
+                from .models import User
+                user = User.objects.get(user_id=user_id)
+                # ONLY pegawai_gudang OR direktur - Admin EXCLUDED
+                return user.role in ['pegawai_gudang', 'direktur'] and user.is_active
+            except User.DoesNotExist:
+                return False
+        return False
+    
+    def handle_no_permission(self):
+        messages.error(
+            self.request,
+            'Anda tidak memiliki akses ke halaman ini. Hanya Pegawai Gudang atau Direktur yang diizinkan.'
+        )
+        return redirect('dashboard')
+
+
 class DirekturRequiredMixin(UserPassesTestMixin):
     """
     Mixin to ensure only Direktur can access the view
@@ -116,3 +142,24 @@ class DirekturRequiredMixin(UserPassesTestMixin):
             'Anda tidak memiliki akses ke halaman ini. Hanya Direktur yang diizinkan.'
         )
         return redirect('dashboard')
+
+
+class ActiveUserRequiredMixin(UserPassesTestMixin):
+    """
+    Mixin for views that can be accessed by any logged-in, active user
+    regardless of role (e.g. dashboard data endpoints)
+    """
+    
+    def test_func(self):
+        user_id = self.request.session.get('user_id')
+        if user_id:
+            from .models import User
+            return User.objects.filter(user_id=user_id, is_active=True).exists()
+        return False
+    
+    def handle_no_permission(self):
+        messages.error(
+            self.request,
+            'Silakan login terlebih dahulu.'
+        )
+        return redirect('user_login')
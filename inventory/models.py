@@ -1,5 +1,11 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.functions import Lower
 from django.contrib.auth.hashers import make_password, check_password
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.cache import cache
+from django.utils import timezone
 
 # Create your models here.
 class User(models.Model):
@@ -53,6 +59,65 @@ class Category(models.Model):
 
     def __str__(self):
         return self.name
+def _later_date(field, day):
+    """Ekspresi update: `field` diganti `day` bila masih kosong atau lebih lama"""
+    return models.Case(
+        models.When(models.Q(**{f'{field}__isnull': True}) | models.Q(**{f'{field}__lt': day}), then=models.Value(day)),
+        default=F(field),
+        output_field=models.DateField(),
+    )
+
+
+class ConcurrentEditError(Exception):
+    """Baris sudah diubah pengguna lain sejak form dibuka (versi tidak cocok)"""
+
+    def __init__(self, instance):
+        self.instance = instance
+        super().__init__(f'{instance._meta.verbose_name} #{instance.pk} sudah diubah oleh pengguna lain.')
+
+
+def _claim_version(instance):
+    """
+    Optimistic locking: UPDATE ... SET version = version + 1 WHERE pk = ... AND version = n.
+    0 baris berarti baris sudah diubah sejak dibaca -> ConcurrentEditError.
+    Dipanggil di dalam transaksi DB; baris terkunci hanya sampai commit, bukan selama form dibuka.
+    """
+    updated = type(instance).objects.filter(pk=instance.pk, version=instance.version).update(
+        version=F('version') + 1
+    )
+    if not updated:
+        raise ConcurrentEditError(instance)
+    instance.version += 1
+
+
+def _apply_stock_effect(new, old, counted_status, sign):
+    """
+    Sesuaikan stok dari perubahan transaksi: efek lama (status/jumlah/lokasi sebelum edit)
+    dibatalkan dan efek baru diterapkan; di lokasi yang sama cukup selisihnya.
+    """
+    old_quantity = old.quantity if old is not None and old.status == counted_status else 0
+    new_quantity = new.quantity if new.status == counted_status else 0
+    old_location_id = old.location_id if old is not None else new.location_id
+
+    if old_location_id is None or old_location_id == new.location_id:
+        if new_quantity != old_quantity:
+            new.item.adjust_stock(sign * (new_quantity - old_quantity), new.location)
+        return
+
+    if old_quantity:
+        new.item.adjust_stock(-sign * old_quantity, old.location)
+    if new_quantity:
+        new.item.adjust_stock(sign * new_quantity, new.location)
+
+
+def _activity_changed(old, new, counted_status, extra_fields=()):
+    """True jika edit transaksi mengubah counter aktivitas (status dihitung, jumlah, tanggal, barang, ...)"""
+    if old.status != counted_status and new.status != counted_status:
+        return False
+    fields = ['status', 'quantity', 'transaction_date', 'item_id', *extra_fields]
+    return any(getattr(old, field) != getattr(new, field) for field in fields)
+
+
 class Supplier(models.Model):
     supplier_id = models.AutoField(primary_key=True)
     code = models.CharField(max_length=50, unique=True, verbose_name='Kode Supplier')
@@ -62,6 +127,11 @@ class Supplier(models.Model):
     email = models.EmailField(blank=True, null=True, verbose_name='Email')
     address = models.TextField(blank=True, null=True, verbose_name='Alamat')
     is_active = models.BooleanField(default=True, verbose_name='Status Aktif')
+    # Counter aktivitas (barang masuk berstatus received, termasuk arsip); dijaga oleh
+    # IncomingTransaction.save, dihitung ulang dengan `rebuild_activity_counters`
+    total_deliveries = models.IntegerField(default=0, verbose_name='Total Pengiriman')
+    total_quantity = models.IntegerField(default=0, verbose_name='Total Item Dikirim')
+    last_delivery_date = models.DateField(null=True, blank=True, verbose_name='Pengiriman Terakhir')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -69,10 +139,59 @@ class Supplier(models.Model):
         verbose_name = 'Supplier'
         verbose_name_plural = 'Suppliers'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['last_delivery_date']),
+            models.Index(fields=['total_deliveries']),
+            models.Index(fields=['updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.code} - {self.name}"
+
+    def record_delivery(self, quantity, day, deliveries=1):
+        """Tambah counter pengiriman (update atomik di DB, nilai instance ikut diperbarui)"""
+        Supplier.objects.filter(pk=self.pk).update(
+            total_deliveries=F('total_deliveries') + deliveries,
+            total_quantity=F('total_quantity') + quantity,
+            last_delivery_date=_later_date('last_delivery_date', day),
+        )
+        self.refresh_from_db(fields=['total_deliveries', 'total_quantity', 'last_delivery_date'])
     
+class Location(models.Model):
+    """Area penyimpanan (gudang/rak). Saldo per barang per lokasi ada di ItemStock"""
+    DEFAULT_CODE = 'UTAMA'
+
+    location_id = models.AutoField(primary_key=True)
+    code = models.CharField(max_length=50, unique=True, verbose_name='Kode Lokasi')
+    name = models.CharField(max_length=100, verbose_name='Nama Lokasi')
+    description = models.TextField(blank=True, null=True, verbose_name='Keterangan')
+    is_default = models.BooleanField(default=False, verbose_name='Lokasi Default')
+    is_active = models.BooleanField(default=True, verbose_name='Status Aktif')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Location'
+        verbose_name_plural = 'Locations'
+        ordering = ['-is_default', 'name']
+
+    def __str__(self):
+        return f"{self.code} - {self.name}"
+
+    @classmethod
+    def get_default(cls):
+        """
+        Lokasi untuk transaksi tanpa lokasi (data lama, transaksi otomatis).
+        Dibuat otomatis ('Gudang Utama') jika belum ada.
+        """
+        location = cls.objects.filter(is_default=True).first()
+        if location is None:
+            location, _ = cls.objects.get_or_create(
+                code=cls.DEFAULT_CODE, defaults={'name': 'Gudang Utama', 'is_default': True}
+            )
+        return location
+
+
 class Items(models.Model):
     """Model untuk master barang"""
     UNIT_CHOICES = [
@@ -90,9 +209,21 @@ class Items(models.Model):
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Kategori')
     unit = models.CharField(max_length=20, choices=UNIT_CHOICES, default='pcs', verbose_name='Satuan')
     minimum_stock = models.IntegerField(default=0, verbose_name='Stok Minimum')
+    # Total semua lokasi (cache dari ItemStock, dijaga oleh adjust_stock)
     current_stock = models.IntegerField(default=0, verbose_name='Stok Saat Ini')
     description = models.TextField(blank=True, null=True, verbose_name='Deskripsi')
     is_active = models.BooleanField(default=True, verbose_name='Status Aktif')
+    retired_at = models.DateTimeField(null=True, blank=True, verbose_name='Dihapus Pada')
+    # Diisi saat purge mulai menghapus histori; sejak itu barang tidak bisa diaktifkan kembali
+    purge_started_at = models.DateTimeField(null=True, blank=True, verbose_name='Purge Dimulai')
+    archived_balance = models.IntegerField(default=0, verbose_name='Saldo Transaksi Arsip')
+    # Counter aktivitas (transaksi received/released, termasuk arsip); lihat Supplier
+    last_in_at = models.DateField(null=True, blank=True, verbose_name='Terakhir Masuk')
+    last_out_at = models.DateField(null=True, blank=True, verbose_name='Terakhir Keluar')
+    lifetime_in = models.IntegerField(default=0, verbose_name='Total Masuk')
+    lifetime_out = models.IntegerField(default=0, verbose_name='Total Keluar')
+    # Optimistic locking edit data master (lihat _claim_version)
+    version = models.PositiveIntegerField(default=1, verbose_name='Versi')
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='created_items', verbose_name='Dibuat Oleh')
     updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='updated_items', verbose_name='Diupdate Oleh')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -102,28 +233,71 @@ class Items(models.Model):
         verbose_name = 'Item'
         verbose_name_plural = 'Items'
         ordering = ['-created_at']
+        indexes = [
+            # Autocomplete barang: prefix kode/nama dicari pada nilai huruf kecil (lihat ItemLookupView)
+            models.Index(Lower('code'), name='items_code_lower_idx'),
+            models.Index(Lower('name'), name='items_name_lower_idx'),
+            models.Index(fields=['last_in_at']),
+            models.Index(fields=['last_out_at']),
+            # Export analitik inkremental (lihat inventory/analytics_export.py)
+            models.Index(fields=['updated_at']),
+        ]
+
+    # Kolom yang hanya diubah lewat UPDATE atomik (adjust_stock, counter, arsip, purge);
+    # tidak ditulis ulang oleh save() baris penuh agar nilai lama di form tidak menimpanya
+    ATOMIC_FIELDS = [
+        'current_stock', 'archived_balance', 'last_in_at', 'last_out_at', 'lifetime_in', 'lifetime_out',
+        'purge_started_at',
+    ]
 
     def __str__(self):
         return f"{self.code} - {self.name}"
 
-    @property
-    def stock_status(self):
-        """Return stock status"""
-        if self.current_stock <= 0:
+    def save(self, *args, **kwargs):
+        """Edit baris penuh dicek versinya; update_fields (perubahan kolom tertentu) tidak"""
+        from .outbox import emit_item
+
+        if self._state.adding or kwargs.get('update_fields') is not None:
+            action = 'create' if self._state.adding else 'update'
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                emit_item(self, action)
+            return
+        
+        kwargs['update_fields'] = [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.name not in self.ATOMIC_FIELDS and field.name != 'version'
+        ]
+        with transaction.atomic():
+            _claim_version(self)
+            super().save(*args, **kwargs)
+            emit_item(self, 'update')
+        self.refresh_from_db(fields=self.ATOMIC_FIELDS)
+
+    @staticmethod
+    def compute_stock_status(current_stock, minimum_stock):
+        """Return stock status for the given stock level and threshold"""
+        if current_stock <= 0:
             return 'out_of_stock'
-        elif self.current_stock <= self.minimum_stock:
+        elif current_stock <= minimum_stock:
             return 'low_stock'
         return 'in_stock'
+
+    @property
+    def stock_status(self):
+        """Return stock status"""
+        return self.compute_stock_status(self.current_stock, self.minimum_stock)
+    
+    STOCK_STATUS_DISPLAY = {
+        'in_stock': 'In Stock',
+        'low_stock': 'Low Stock',
+        'out_of_stock': 'Out of Stock'
+    }
     
     @property
     def stock_status_display(self):
         """Return human-readable stock status"""
-        status_map = {
-            'in_stock': 'In Stock',
-            'low_stock': 'Low Stock',
-            'out_of_stock': 'Out of Stock'
-        }
-        return status_map.get(self.stock_status, 'Unknown')
+        return self.STOCK_STATUS_DISPLAY.get(self.stock_status, 'Unknown')
     
     @property
     def stock_status_badge(self):
@@ -150,7 +324,102 @@ class Items(models.Model):
         if self.minimum_stock == 0:
             return 100 if self.current_stock > 0 else 0
         return (self.current_stock / self.minimum_stock) * 100
+
+    def adjust_stock(self, quantity, location=None):
+        """
+        Tambah/kurangi stok (quantity negatif = pengurangan) di satu lokasi.
+        Satu-satunya jalur mutasi stok dari transaksi; sekaligus mendeteksi
+        perpindahan status threshold untuk StockAlert.
+        Saldo lokasi & total barang diubah dengan UPDATE atomik (F), bukan read-modify-write.
+        `updated_at` barang tidak disentuh: kolom itu menandai edit data master (export inkremental).
+
+        Batasan: total `current_stock` tetap diperbarui di baris barang yang sama dalam
+        transaksi ini (alert, outbox & validasi stok membacanya), sehingga barang masuk/keluar
+        untuk satu barang di lokasi berbeda tetap saling menunggu di baris tersebut sampai commit.
+        Yang terbagi per lokasi hanya transfer (tidak mengubah total) dan saldo ItemStock.
+        """
+        ItemStock.add(self, location or Location.get_default(), quantity)
+        Items.objects.filter(pk=self.pk).update(current_stock=F('current_stock') + quantity)
+        self.refresh_from_db(fields=['current_stock'])
+        StockAlert.track(self, self.current_stock - quantity)
+
+    def record_movement(self, direction, quantity, day):
+        """Tambah counter aktivitas barang untuk mutasi baru ('in' / 'out')"""
+        lifetime_field, date_field = ('lifetime_in', 'last_in_at') if direction == 'in' else ('lifetime_out', 'last_out_at')
+        Items.objects.filter(pk=self.pk).update(**{
+            lifetime_field: F(lifetime_field) + quantity,
+            date_field: _later_date(date_field, day),
+        })
+        self.refresh_from_db(fields=[lifetime_field, date_field])
+    
+    def retire(self, user_id=None):
+        """
+        Soft delete: nonaktifkan barang dan tandai untuk dihapus permanen
+        oleh command `purge_retired_items` setelah masa tenggang.
+        """
+        was_active = self.is_active
+        self.is_active = False
+        self.retired_at = timezone.now()
+        if user_id:
+            self.updated_by_id = user_id
+        # Versi ikut naik agar form edit yang masih terbuka tidak mengaktifkan ulang diam-diam
+        self.version = F('version') + 1
+        with transaction.atomic():
+            self.save(update_fields=['is_active', 'retired_at', 'updated_by', 'updated_at', 'version'])
+            self.refresh_from_db(fields=['version'])
+            StockAlert.track(self, self.current_stock, old_active=was_active)
     
+class ItemStock(models.Model):
+    """
+    Saldo barang per lokasi. Mutasi stok mengunci baris (barang, lokasi) ini, sehingga
+    transfer antar lokasi berbeda tidak saling menunggu. Barang masuk/keluar juga
+    mengubah total di Items.current_stock (lihat batasan di Items.adjust_stock).
+    """
+    item_stock_id = models.AutoField(primary_key=True)
+    item = models.ForeignKey(Items, on_delete=models.CASCADE, related_name='location_stocks', verbose_name='Barang')
+    location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name='item_stocks', verbose_name='Lokasi')
+    quantity = models.IntegerField(default=0, verbose_name='Saldo')
+    # 0 = tidak dipantau per lokasi
+    minimum_stock = models.IntegerField(default=0, verbose_name='Stok Minimum Lokasi')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Item Stock'
+        verbose_name_plural = 'Item Stocks'
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'location'], name='unique_item_location'),
+        ]
+        indexes = [
+            models.Index(fields=['location', 'item']),
+        ]
+
+    def __str__(self):
+        return f"{self.item.code} @ {self.location.code}: {self.quantity}"
+
+    @property
+    def is_low(self):
+        return self.minimum_stock > 0 and self.quantity <= self.minimum_stock
+
+    @classmethod
+    def add(cls, item, location, quantity):
+        """Tambah saldo (barang, lokasi); baris dibuat saat mutasi pertama"""
+        updated = cls.objects.filter(item=item, location=location).update(
+            quantity=F('quantity') + quantity,
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    cls.objects.create(item=item, location=location, quantity=quantity)
+            except IntegrityError:
+                # Dibuat bersamaan oleh transaksi lain
+                cls.objects.filter(item=item, location=location).update(quantity=F('quantity') + quantity)
+
+    @classmethod
+    def quantity_at(cls, item, location):
+        return cls.objects.filter(item=item, location=location).values_list('quantity', flat=True).first() or 0
+
+
 class IncomingTransaction(models.Model):
     """Model untuk transaksi barang masuk"""
     STATUS_CHOICES = [
@@ -161,20 +430,29 @@ class IncomingTransaction(models.Model):
 
     incoming_id = models.AutoField(primary_key=True)
     transaction_number = models.CharField(max_length=50, unique=True, verbose_name='Nomor Transaksi')
-    item = models.ForeignKey(Items, on_delete=models.CASCADE, verbose_name='Barang')
+    item = models.ForeignKey(Items, on_delete=models.PROTECT, verbose_name='Barang')
     supplier = models.ForeignKey(Supplier, on_delete=models.SET_NULL, null=True, verbose_name='Supplier')
+    location = models.ForeignKey(Location, on_delete=models.PROTECT, null=True, blank=True, verbose_name='Lokasi')
     quantity = models.IntegerField(verbose_name='Jumlah')
+    # Kosong = nomor transaksi dipakai sebagai nomor lot
+    lot_number = models.CharField(max_length=50, blank=True, default='', verbose_name='Nomor Lot/Batch')
+    expiry_date = models.DateField(null=True, blank=True, verbose_name='Tanggal Kedaluwarsa')
     transaction_date = models.DateField(verbose_name='Tanggal Transaksi')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='received', verbose_name='Status')
     notes = models.TextField(blank=True, null=True, verbose_name='Catatan')
     received_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='incoming_transactions', verbose_name='Diterima Oleh')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1, verbose_name='Versi')
 
     class Meta:
         verbose_name = 'Incoming Transaction'
         verbose_name_plural = 'Incoming Transactions'
         ordering = ['-transaction_date', '-created_at']
+        indexes = [
+            models.Index(fields=['item', 'transaction_date']),
+            models.Index(fields=['updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.transaction_number} - {self.item.name} ({self.quantity})"
@@ -195,31 +473,39 @@ class IncomingTransaction(models.Model):
             
             self.transaction_number = f'IN{today}{str(new_number).zfill(4)}'
         
-        is_new = self.pk is None
-        old_status = None
-        old_quantity = 0
+        if self.location_id is None:
+            self.location = Location.get_default()
         
-        if not is_new:
-            old_transaction = IncomingTransaction.objects.get(pk=self.pk)
-            old_status = old_transaction.status
-            old_quantity = old_transaction.quantity
+        from .lots import sync_incoming_lot
+        from .outbox import emit_record
         
-        super().save(*args, **kwargs)
+        is_new = self.pk is None
+        old_transaction = None
         
-        if self.status == 'received':
+        # Stok & counter aktivitas berubah bersama transaksinya (atau tidak sama sekali)
+        with transaction.atomic():
+            if not is_new:
+                # Versi dicek dulu (UPDATE bersyarat, mengunci baris); baris lama yang dibaca
+                # sesudahnya adalah versi yang dilihat pengguna, jadi selisih stok pasti benar
+                _claim_version(self)
+                old_transaction = IncomingTransaction.objects.get(pk=self.pk)
+            
+            super().save(*args, **kwargs)
+            
+            _apply_stock_effect(self, old_transaction, 'received', 1)
+            sync_incoming_lot(self)
+            emit_record('incoming', self, created=is_new, old_status=old_transaction and old_transaction.status)
+            
             if is_new:
-                self.item.current_stock += self.quantity
-                self.item.save()
-            elif old_status != 'received':
-                self.item.current_stock += self.quantity
-                self.item.save()
-            elif old_quantity != self.quantity:
-                stock_difference = self.quantity - old_quantity
-                self.item.current_stock += stock_difference
-                self.item.save()
-        elif old_status == 'received' and self.status != 'received':
-            self.item.current_stock -= old_quantity
-            self.item.save()
+                if self.status == 'received':
+                    self.item.record_movement('in', self.quantity, self.transaction_date)
+                    if self.supplier_id:
+                        self.supplier.record_delivery(self.quantity, self.transaction_date)
+            elif _activity_changed(old_transaction, self, 'received', ['supplier_id']):
+                # Edit jarang terjadi: hitung ulang counter yang terdampak dari data transaksi
+                from .activity import rebuild_item_counters, rebuild_supplier_counters
+                rebuild_item_counters([old_transaction.item_id, self.item_id])
+                rebuild_supplier_counters([old_transaction.supplier_id, self.supplier_id])
 
 class OutgoingTransaction(models.Model):
     STATUS_CHOICES = [
@@ -238,7 +524,8 @@ class OutgoingTransaction(models.Model):
         related_name='outgoing_transaction',
         verbose_name='Permintaan Terkait'
     )
-    item = models.ForeignKey(Items, on_delete=models.CASCADE, verbose_name='Barang')
+    item = models.ForeignKey(Items, on_delete=models.PROTECT, verbose_name='Barang')
+    location = models.ForeignKey(Location, on_delete=models.PROTECT, null=True, blank=True, verbose_name='Lokasi')
     quantity = models.IntegerField(verbose_name='Jumlah')
     transaction_date = models.DateField(verbose_name='Tanggal Transaksi')
     purpose = models.CharField(max_length=200, verbose_name='Tujuan/Keperluan')
@@ -247,11 +534,16 @@ class OutgoingTransaction(models.Model):
     released_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='outgoing_transactions', verbose_name='Dikeluarkan Oleh')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1, verbose_name='Versi')
 
     class Meta:
         verbose_name = 'Outgoing Transaction'
         verbose_name_plural = 'Outgoing Transactions'
         ordering = ['-transaction_date', '-created_at']
+        indexes = [
+            models.Index(fields=['item', 'transaction_date']),
+            models.Index(fields=['updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.transaction_number} - {self.item.name} ({self.quantity})"
@@ -272,31 +564,169 @@ class OutgoingTransaction(models.Model):
             
             self.transaction_number = f'OUT{today}{str(new_number).zfill(4)}'
         
-        is_new = self.pk is None
-        old_status = None
-        old_quantity = 0
+        if self.location_id is None:
+            self.location = Location.get_default()
         
-        if not is_new:
-            old_transaction = OutgoingTransaction.objects.get(pk=self.pk)
-            old_status = old_transaction.status
-            old_quantity = old_transaction.quantity
+        from .lots import sync_outgoing_allocations
+        from .outbox import emit_record
         
-        super().save(*args, **kwargs)
+        is_new = self.pk is None
+        old_transaction = None
         
-        if self.status == 'released':
+        # Stok & counter aktivitas berubah bersama transaksinya (atau tidak sama sekali)
+        with transaction.atomic():
+            if not is_new:
+                # Versi dicek dulu (UPDATE bersyarat, mengunci baris); baris lama yang dibaca
+                # sesudahnya adalah versi yang dilihat pengguna, jadi selisih stok pasti benar
+                _claim_version(self)
+                old_transaction = OutgoingTransaction.objects.get(pk=self.pk)
+            
+            super().save(*args, **kwargs)
+            
+            _apply_stock_effect(self, old_transaction, 'released', -1)
+            sync_outgoing_allocations(self, old_transaction)
+            emit_record('outgoing', self, created=is_new, old_status=old_transaction and old_transaction.status)
+            
             if is_new:
-                self.item.current_stock -= self.quantity
-                self.item.save()
-            elif old_status != 'released':
-                self.item.current_stock -= self.quantity
-                self.item.save()
-            elif old_quantity != self.quantity:
-                stock_difference = old_quantity - self.quantity
-                self.item.current_stock += stock_difference
-                self.item.save()
-        elif old_status == 'released' and self.status != 'released':
-            self.item.current_stock += old_quantity
-            self.item.save()
+                if self.status == 'released':
+                    self.item.record_movement('out', self.quantity, self.transaction_date)
+            elif _activity_changed(old_transaction, self, 'released'):
+                from .activity import rebuild_item_counters
+                rebuild_item_counters([old_transaction.item_id, self.item_id])
+
+class StockTransfer(models.Model):
+    """Perpindahan stok antar lokasi; total stok barang tidak berubah"""
+    transfer_id = models.AutoField(primary_key=True)
+    transfer_number = models.CharField(max_length=50, unique=True, verbose_name='Nomor Transfer')
+    item = models.ForeignKey(Items, on_delete=models.PROTECT, verbose_name='Barang')
+    from_location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name='transfers_out', verbose_name='Dari Lokasi')
+    to_location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name='transfers_in', verbose_name='Ke Lokasi')
+    quantity = models.IntegerField(verbose_name='Jumlah')
+    transaction_date = models.DateField(verbose_name='Tanggal Transfer')
+    notes = models.TextField(blank=True, null=True, verbose_name='Catatan')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='stock_transfers', verbose_name='Dibuat Oleh')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Stock Transfer'
+        verbose_name_plural = 'Stock Transfers'
+        ordering = ['-transaction_date', '-created_at']
+        indexes = [
+            models.Index(fields=['item', 'transaction_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.transfer_number} - {self.item.name} ({self.quantity})"
+
+    def save(self, *args, **kwargs):
+        """Transfer hanya dibuat, tidak diedit: saldo kedua lokasi berubah dalam satu transaksi DB"""
+        if self.pk is not None:
+            raise ValueError('Transfer stok tidak dapat diubah; buat transfer balik.')
+        
+        if not self.transfer_number:
+            from datetime import datetime
+            today = datetime.now().strftime('%Y%m%d')
+            last_transfer = StockTransfer.objects.filter(
+                transfer_number__startswith=f'TRF{today}'
+            ).order_by('-transfer_number').first()
+            new_number = int(last_transfer.transfer_number[-4:]) + 1 if last_transfer else 1
+            self.transfer_number = f'TRF{today}{str(new_number).zfill(4)}'
+        
+        from .lots import transfer_lots
+        from .outbox import emit_record
+        
+        with transaction.atomic():
+            # Kunci kedua saldo dengan urutan tetap agar dua transfer berlawanan arah tidak deadlock
+            ItemStock.add(self.item, self.to_location, 0)
+            balances = {
+                stock.location_id: stock.quantity
+                for stock in ItemStock.objects.select_for_update().filter(
+                    item=self.item, location_id__in=[self.from_location_id, self.to_location_id]
+                ).order_by('location_id')
+            }
+            available = balances.get(self.from_location_id, 0)
+            if available < self.quantity:
+                raise ValidationError(
+                    f'Stok di {self.from_location.name} tidak mencukupi (tersedia {available}).'
+                )
+            super().save(*args, **kwargs)
+            ItemStock.add(self.item, self.from_location, -self.quantity)
+            ItemStock.add(self.item, self.to_location, self.quantity)
+            transfer_lots(self)
+            emit_record('transfer', self, created=True)
+
+
+class StockLot(models.Model):
+    """
+    Lot/batch barang di satu lokasi, dibuat saat barang masuk diterima (atau dipecah oleh transfer).
+    Barang keluar mengambil dari lot dengan kedaluwarsa terdekat dulu (FEFO, lihat lots.py).
+    """
+    lot_id = models.BigAutoField(primary_key=True)
+    item = models.ForeignKey(Items, on_delete=models.CASCADE, related_name='lots', verbose_name='Barang')
+    location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name='lots', verbose_name='Lokasi')
+    # Kosong untuk lot hasil transfer dan setelah barang masuknya diarsip
+    incoming = models.OneToOneField(
+        IncomingTransaction, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='lot', verbose_name='Barang Masuk'
+    )
+    lot_number = models.CharField(max_length=50, verbose_name='Nomor Lot/Batch')
+    # Kosong = tidak kedaluwarsa (diambil setelah semua lot berkedaluwarsa)
+    expiry_date = models.DateField(null=True, blank=True, verbose_name='Tanggal Kedaluwarsa')
+    received_date = models.DateField(verbose_name='Tanggal Diterima')
+    # Jumlah dari barang masuknya (0 jika dibatalkan); sisa = diterima - total alokasi, minimal 0
+    quantity_received = models.IntegerField(verbose_name='Jumlah Diterima')
+    quantity_remaining = models.IntegerField(verbose_name='Sisa')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Stock Lot'
+        verbose_name_plural = 'Stock Lots'
+        ordering = ['expiry_date', 'lot_id']
+        indexes = [
+            # Urutan FEFO per (barang, lokasi); hanya lot yang masih bersisa sehingga
+            # index tetap kecil walau lot habis menumpuk
+            models.Index(
+                fields=['item', 'location', 'expiry_date', 'lot_id'],
+                condition=models.Q(quantity_remaining__gt=0),
+                name='stocklot_fefo_idx',
+            ),
+            # Laporan lot yang segera kedaluwarsa
+            models.Index(
+                fields=['expiry_date'],
+                condition=models.Q(quantity_remaining__gt=0),
+                name='stocklot_open_expiry_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.lot_number} - {self.item.code} ({self.quantity_remaining})"
+
+
+class LotAllocation(models.Model):
+    """Bagian barang keluar/transfer yang diambil dari satu lot (total alokasi = pemakaian lot)"""
+    allocation_id = models.BigAutoField(primary_key=True)
+    lot = models.ForeignKey(StockLot, on_delete=models.CASCADE, related_name='allocations', verbose_name='Lot')
+    # Kosong setelah barang keluarnya diarsip; riwayat pemakaian lot tetap tersimpan
+    outgoing = models.ForeignKey(
+        OutgoingTransaction, on_delete=models.SET_NULL, null=True,
+        related_name='lot_allocations', verbose_name='Barang Keluar'
+    )
+    transfer = models.ForeignKey(
+        StockTransfer, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='lot_allocations', verbose_name='Transfer'
+    )
+    quantity = models.IntegerField(verbose_name='Jumlah')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Lot Allocation'
+        verbose_name_plural = 'Lot Allocations'
+        ordering = ['allocation_id']
+
+    def __str__(self):
+        return f"{self.lot.lot_number}: {self.quantity}"
+
 
 class RequestItems(models.Model):
     STATUS_CHOICES = [
@@ -308,7 +738,9 @@ class RequestItems(models.Model):
 
     request_id = models.AutoField(primary_key=True)
     request_number = models.CharField(max_length=50, unique=True, verbose_name='Nomor Permintaan')
-    item = models.ForeignKey(Items, on_delete=models.CASCADE, verbose_name='Barang')
+    item = models.ForeignKey(Items, on_delete=models.PROTECT, verbose_name='Barang')
+    # Lokasi pengambilan; kosong = lokasi default
+    location = models.ForeignKey(Location, on_delete=models.PROTECT, null=True, blank=True, verbose_name='Lokasi Pengambilan')
     quantity = models.IntegerField(verbose_name='Jumlah')
     request_date = models.DateField(verbose_name='Tanggal Permintaan')
     needed_date = models.DateField(verbose_name='Tanggal Dibutuhkan')
@@ -326,6 +758,9 @@ class RequestItems(models.Model):
         verbose_name = 'Request Item'
         verbose_name_plural = 'Request Items'
         ordering = ['-request_date', '-created_at']
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.request_number} - {self.item.name} ({self.quantity})"
@@ -347,4 +782,465 @@ class RequestItems(models.Model):
             
             self.request_number = f'REQ{today}{str(new_number).zfill(4)}'
         
-        super().save(*args, **kwargs)
\ No newline at end of file
+        is_new = self.pk is None
+        old_status = None
+        if not is_new:
+            old_status = RequestItems.objects.filter(pk=self.pk).values_list('status', flat=True).first()
+        
+        from .outbox import emit_record
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            emit_record('request', self, created=is_new, old_status=old_status)
+            
+            # Permintaan baru / keputusan approval disiarkan ke halaman yang terbuka
+            if is_new or old_status != self.status:
+                from .live_events import publish_request_change
+                publish_request_change(self, old_status)
+
+
+class StockAlert(models.Model):
+    """Alert ketika stok barang melewati batas minimum (low/out of stock)"""
+    ALERT_TYPE_CHOICES = [
+        ('low_stock', 'Low Stock'),
+        ('out_of_stock', 'Out of Stock'),
+    ]
+
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('resolved', 'Resolved'),
+    ]
+
+    OPEN_COUNT_CACHE_KEY = 'stock_alert_open_count'
+
+    alert_id = models.AutoField(primary_key=True)
+    item = models.ForeignKey(Items, on_delete=models.CASCADE, related_name='stock_alerts', verbose_name='Barang')
+    alert_type = models.CharField(max_length=20, choices=ALERT_TYPE_CHOICES, verbose_name='Jenis Alert')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open', verbose_name='Status')
+    stock_level = models.IntegerField(verbose_name='Stok Saat Alert')
+    minimum_stock = models.IntegerField(verbose_name='Stok Minimum Saat Alert')
+    created_at = models.DateTimeField(auto_now_add=True)
+    resolved_at = models.DateTimeField(null=True, blank=True, verbose_name='Diselesaikan Pada')
+
+    class Meta:
+        verbose_name = 'Stock Alert'
+        verbose_name_plural = 'Stock Alerts'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at']),
+            models.Index(fields=['item', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.item.name} - {self.get_alert_type_display()} ({self.get_status_display()})"
+
+    @classmethod
+    def track(cls, item, old_stock, old_minimum=None, old_active=None):
+        """
+        Bandingkan status stok lama vs baru untuk satu barang.
+        Hanya menulis ke tabel alert jika status threshold berubah,
+        sehingga biaya per transaksi O(barang yang berubah).
+        Barang nonaktif diperlakukan sebagai 'in_stock' (tidak perlu alert).
+        Setiap perubahan juga disiarkan sebagai event live (stream SSE) dan dicatat di outbox.
+        """
+        from .live_events import publish_stock_change
+        from .outbox import emit_stock_change
+
+        if old_minimum is None:
+            old_minimum = item.minimum_stock
+        if old_active is None:
+            old_active = item.is_active
+        publish_stock_change(item, old_stock, old_minimum, old_active)
+        emit_stock_change(item, old_stock, old_minimum, old_active)
+
+        old_status = Items.compute_stock_status(old_stock, old_minimum) if old_active else 'in_stock'
+        new_status = item.stock_status if item.is_active else 'in_stock'
+        if old_status == new_status:
+            return None
+
+        cls.objects.filter(item=item, status='open').update(
+            status='resolved',
+            resolved_at=timezone.now()
+        )
+
+        alert = None
+        if new_status != 'in_stock':
+            alert = cls.objects.create(
+                item=item,
+                alert_type=new_status,
+                stock_level=item.current_stock,
+                minimum_stock=item.minimum_stock
+            )
+
+        cache.delete(cls.OPEN_COUNT_CACHE_KEY)
+        return alert
+
+    @classmethod
+    def open_count(cls):
+        """Jumlah alert terbuka (di-cache untuk badge di sidebar)"""
+        return cache.get_or_set(
+            cls.OPEN_COUNT_CACHE_KEY,
+            lambda: cls.objects.filter(status='open').count(),
+            300
+        )
+
+
+class ReorderSuggestion(models.Model):
+    """Saran reorder point hasil job forecasting harian (satu baris per barang)"""
+    suggestion_id = models.AutoField(primary_key=True)
+    item = models.OneToOneField(Items, on_delete=models.CASCADE, related_name='reorder_suggestion', verbose_name='Barang')
+    avg_daily_demand = models.FloatField(default=0, verbose_name='Rata-rata Pemakaian Harian')
+    demand_std = models.FloatField(default=0, verbose_name='Std. Deviasi Pemakaian Harian')
+    lead_time_demand_std = models.FloatField(default=0, verbose_name='Std. Deviasi Pemakaian Lead Time')
+    safety_stock = models.IntegerField(default=0, verbose_name='Safety Stock')
+    reorder_point = models.IntegerField(default=0, verbose_name='Reorder Point')
+    reorder_quantity = models.IntegerField(default=0, verbose_name='Jumlah Reorder')
+    history_days = models.IntegerField(verbose_name='Histori (hari)')
+    window_days = models.IntegerField(verbose_name='Window Rata-rata (hari)')
+    lead_time_days = models.IntegerField(verbose_name='Lead Time (hari)')
+    service_level = models.FloatField(verbose_name='Service Level')
+    computed_at = models.DateTimeField(verbose_name='Dihitung Pada')
+    applied_at = models.DateTimeField(null=True, blank=True, verbose_name='Diterapkan Pada')
+
+    class Meta:
+        verbose_name = 'Reorder Suggestion'
+        verbose_name_plural = 'Reorder Suggestions'
+        ordering = ['-avg_daily_demand']
+
+    def __str__(self):
+        return f"{self.item.code} - ROP {self.reorder_point}"
+
+
+class DailyItemMovement(models.Model):
+    """
+    Total mutasi per barang per hari (barang masuk diterima & keluar dirilis, termasuk arsip).
+    Dipelihara inkremental oleh job analitik ABC (lihat inventory/abc_analysis.py).
+    """
+    movement_id = models.BigAutoField(primary_key=True)
+    item = models.ForeignKey(Items, on_delete=models.CASCADE, related_name='daily_movements', verbose_name='Barang')
+    day = models.DateField(verbose_name='Tanggal')
+    quantity_in = models.IntegerField(default=0, verbose_name='Masuk')
+    quantity_out = models.IntegerField(default=0, verbose_name='Keluar')
+
+    class Meta:
+        verbose_name = 'Daily Item Movement'
+        verbose_name_plural = 'Daily Item Movements'
+        ordering = ['item', 'day']
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'day'], name='unique_item_day_movement'),
+        ]
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} @ {self.day}: +{self.quantity_in} / -{self.quantity_out}"
+
+
+class ItemAnalytics(models.Model):
+    """Klasifikasi ABC & perputaran stok per barang untuk satu window (hasil job analitik harian)"""
+    ABC_CLASS_CHOICES = [
+        ('A', 'A'),
+        ('B', 'B'),
+        ('C', 'C'),
+    ]
+
+    analytics_id = models.AutoField(primary_key=True)
+    item = models.ForeignKey(Items, on_delete=models.CASCADE, related_name='analytics', verbose_name='Barang')
+    window_days = models.IntegerField(verbose_name='Window (hari)')
+    consumption = models.IntegerField(default=0, verbose_name='Pemakaian')
+    receipts = models.IntegerField(default=0, verbose_name='Penerimaan')
+    consumption_share = models.FloatField(default=0, verbose_name='Porsi Pemakaian')
+    cumulative_share = models.FloatField(default=0, verbose_name='Porsi Kumulatif')
+    abc_class = models.CharField(max_length=1, choices=ABC_CLASS_CHOICES, verbose_name='Kelas ABC')
+    average_stock = models.FloatField(default=0, verbose_name='Rata-rata Stok')
+    # None: rata-rata stok nol (turnover) / tidak ada pemakaian (days of cover) / belum pernah ada mutasi
+    turnover = models.FloatField(null=True, blank=True, verbose_name='Perputaran Stok')
+    days_of_cover = models.FloatField(null=True, blank=True, verbose_name='Days of Cover')
+    days_since_movement = models.IntegerField(null=True, blank=True, verbose_name='Hari Sejak Mutasi Terakhir')
+    is_dead_stock = models.BooleanField(default=False, verbose_name='Dead Stock')
+    computed_at = models.DateTimeField(verbose_name='Dihitung Pada')
+
+    class Meta:
+        verbose_name = 'Item Analytics'
+        verbose_name_plural = 'Item Analytics'
+        ordering = ['window_days', '-consumption']
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'window_days'], name='unique_item_analytics_window'),
+        ]
+        indexes = [
+            models.Index(fields=['window_days', 'abc_class']),
+        ]
+
+    def __str__(self):
+        return f"{self.item.code} ({self.window_days} hari): {self.abc_class}"
+
+
+class CategoryAnalytics(models.Model):
+    """Ringkasan analitik ABC per kategori untuk satu window (category kosong = tanpa kategori)"""
+    category_analytics_id = models.AutoField(primary_key=True)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='analytics', verbose_name='Kategori')
+    window_days = models.IntegerField(verbose_name='Window (hari)')
+    item_count = models.IntegerField(default=0, verbose_name='Jumlah Barang')
+    consumption = models.IntegerField(default=0, verbose_name='Pemakaian')
+    consumption_share = models.FloatField(default=0, verbose_name='Porsi Pemakaian')
+    average_stock = models.FloatField(default=0, verbose_name='Rata-rata Stok')
+    turnover = models.FloatField(null=True, blank=True, verbose_name='Perputaran Stok')
+    class_a_count = models.IntegerField(default=0, verbose_name='Barang Kelas A')
+    class_b_count = models.IntegerField(default=0, verbose_name='Barang Kelas B')
+    class_c_count = models.IntegerField(default=0, verbose_name='Barang Kelas C')
+    dead_stock_count = models.IntegerField(default=0, verbose_name='Dead Stock')
+    computed_at = models.DateTimeField(verbose_name='Dihitung Pada')
+
+    class Meta:
+        verbose_name = 'Category Analytics'
+        verbose_name_plural = 'Category Analytics'
+        ordering = ['window_days', '-consumption']
+
+    def __str__(self):
+        return f"{self.category or 'Tanpa Kategori'} ({self.window_days} hari)"
+
+
+class StockAdjustment(models.Model):
+    """Audit koreksi stok di luar transaksi (mis. hasil rekonsiliasi)"""
+    adjustment_id = models.AutoField(primary_key=True)
+    item = models.ForeignKey(Items, on_delete=models.CASCADE, related_name='stock_adjustments', verbose_name='Barang')
+    previous_stock = models.IntegerField(verbose_name='Stok Sebelum')
+    new_stock = models.IntegerField(verbose_name='Stok Sesudah')
+    difference = models.IntegerField(verbose_name='Selisih')
+    reason = models.CharField(max_length=255, verbose_name='Alasan')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_adjustments', verbose_name='Dibuat Oleh')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Stock Adjustment'
+        verbose_name_plural = 'Stock Adjustments'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.item.code}: {self.previous_stock} -> {self.new_stock}"
+
+
+class StockSnapshot(models.Model):
+    """Saldo stok akhir per barang pada tanggal tutup periode (akhir bulan)"""
+    snapshot_id = models.AutoField(primary_key=True)
+    item = models.ForeignKey(Items, on_delete=models.CASCADE, related_name='stock_snapshots', verbose_name='Barang')
+    snapshot_date = models.DateField(verbose_name='Tanggal Snapshot')
+    quantity = models.IntegerField(verbose_name='Saldo Stok')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Stock Snapshot'
+        verbose_name_plural = 'Stock Snapshots'
+        ordering = ['-snapshot_date']
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'snapshot_date'], name='unique_item_snapshot_date'),
+        ]
+        indexes = [
+            models.Index(fields=['snapshot_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.item.code} @ {self.snapshot_date}: {self.quantity}"
+
+
+class ArchivedIncomingTransaction(models.Model):
+    """
+    Arsip barang masuk lama (dipindah dari IncomingTransaction oleh command `archive_transactions`).
+    Tanpa foreign key agar tabel arsip tidak mengunci/menahan penghapusan data master.
+    """
+    incoming_id = models.IntegerField(primary_key=True)
+    transaction_number = models.CharField(max_length=50, unique=True, verbose_name='Nomor Transaksi')
+    item_id = models.IntegerField(db_index=True, verbose_name='ID Barang')
+    supplier_id = models.IntegerField(null=True, verbose_name='ID Supplier')
+    location_id = models.IntegerField(null=True, verbose_name='ID Lokasi')
+    quantity = models.IntegerField(verbose_name='Jumlah')
+    lot_number = models.CharField(max_length=50, blank=True, default='', verbose_name='Nomor Lot/Batch')
+    expiry_date = models.DateField(null=True, blank=True, verbose_name='Tanggal Kedaluwarsa')
+    transaction_date = models.DateField(verbose_name='Tanggal Transaksi')
+    status = models.CharField(max_length=20, choices=IncomingTransaction.STATUS_CHOICES, verbose_name='Status')
+    notes = models.TextField(blank=True, null=True, verbose_name='Catatan')
+    received_by_id = models.IntegerField(null=True, verbose_name='ID Penerima')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Archived Incoming Transaction'
+        verbose_name_plural = 'Archived Incoming Transactions'
+        ordering = ['-transaction_date']
+        indexes = [
+            models.Index(fields=['item_id', 'transaction_date']),
+            models.Index(fields=['updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.transaction_number} (arsip)"
+
+
+class ArchivedOutgoingTransaction(models.Model):
+    """Arsip barang keluar lama (lihat ArchivedIncomingTransaction)"""
+    outgoing_id = models.IntegerField(primary_key=True)
+    transaction_number = models.CharField(max_length=50, unique=True, verbose_name='Nomor Transaksi')
+    request_item_id = models.IntegerField(null=True, verbose_name='ID Permintaan')
+    item_id = models.IntegerField(db_index=True, verbose_name='ID Barang')
+    location_id = models.IntegerField(null=True, verbose_name='ID Lokasi')
+    quantity = models.IntegerField(verbose_name='Jumlah')
+    transaction_date = models.DateField(verbose_name='Tanggal Transaksi')
+    purpose = models.CharField(max_length=200, verbose_name='Tujuan/Keperluan')
+    status = models.CharField(max_length=20, choices=OutgoingTransaction.STATUS_CHOICES, verbose_name='Status')
+    notes = models.TextField(blank=True, null=True, verbose_name='Catatan')
+    released_by_id = models.IntegerField(null=True, verbose_name='ID Pengeluar')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Archived Outgoing Transaction'
+        verbose_name_plural = 'Archived Outgoing Transactions'
+        ordering = ['-transaction_date']
+        indexes = [
+            models.Index(fields=['item_id', 'transaction_date']),
+            models.Index(fields=['updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.transaction_number} (arsip)"
+
+
+class LiveEvent(models.Model):
+    """
+    Log event live (perubahan stok, permintaan baru/diputuskan) untuk stream SSE.
+    Worker lain membaca tabel ini (polling) sehingga event tetap sampai
+    walaupun aplikasi dijalankan dengan beberapa proses.
+    """
+    EVENT_TYPE_CHOICES = [
+        ('stock', 'Perubahan Stok'),
+        ('request', 'Permintaan Barang'),
+    ]
+
+    event_id = models.BigAutoField(primary_key=True)
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPE_CHOICES, verbose_name='Jenis Event')
+    payload = models.JSONField(verbose_name='Data')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Live Event'
+        verbose_name_plural = 'Live Events'
+        ordering = ['event_id']
+
+    def __str__(self):
+        return f"#{self.event_id} {self.event_type}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Kunci idempotensi dari klien untuk POST yang membuat data (transaksi, permintaan, approval).
+    Kiriman ulang dengan kunci yang sama mendapat respons asli tanpa dieksekusi ulang.
+    response_status kosong = kiriman pertama masih diproses.
+    """
+    idempotency_key_id = models.BigAutoField(primary_key=True)
+    key = models.CharField(max_length=64, unique=True, verbose_name='Kunci')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, related_name='idempotency_keys', verbose_name='User')
+    scope = models.CharField(max_length=100, verbose_name='Endpoint')
+    object_id = models.IntegerField(null=True, blank=True, verbose_name='ID Data')
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name='Status Respons')
+    response_location = models.CharField(max_length=500, blank=True, verbose_name='Redirect')
+    response_content_type = models.CharField(max_length=100, blank=True)
+    response_body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True, verbose_name='Kedaluwarsa')
+
+    class Meta:
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+
+    def __str__(self):
+        return f"{self.scope}: {self.key}"
+
+
+class AuditLog(models.Model):
+    """
+    Jejak audit perubahan field data master & transaksi (lihat inventory/audit.py).
+    changes berisi diff ringkas {field: [nilai lama, nilai baru]}; foreign key dicatat sebagai id.
+    """
+    ACTION_CHOICES = [
+        ('create', 'Tambah'),
+        ('update', 'Ubah'),
+        ('delete', 'Hapus'),
+    ]
+
+    audit_id = models.BigAutoField(primary_key=True)
+    object_type = models.CharField(max_length=50, verbose_name='Jenis Data')
+    object_id = models.IntegerField(verbose_name='ID Data')
+    object_repr = models.CharField(max_length=200, blank=True, verbose_name='Data')
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, verbose_name='Aksi')
+    changes = models.JSONField(encoder=DjangoJSONEncoder, verbose_name='Perubahan')
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='audit_logs', verbose_name='User')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Audit Log'
+        verbose_name_plural = 'Audit Logs'
+        ordering = ['-audit_id']
+        indexes = [
+            models.Index(fields=['object_type', 'object_id', '-audit_id']),
+            models.Index(fields=['user', '-audit_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.object_type} #{self.object_id} {self.action}"
+
+
+class OutboxEntry(models.Model):
+    """
+    Change feed untuk integrasi (lihat inventory/outbox.py). Ditulis dalam transaksi DB
+    yang sama dengan perubahannya, sehingga entri ada jika dan hanya jika perubahan di-commit.
+    """
+    TOPIC_CHOICES = [
+        ('item', 'Barang'),
+        ('stock', 'Stok Barang'),
+        ('incoming', 'Barang Masuk'),
+        ('outgoing', 'Barang Keluar'),
+        ('transfer', 'Transfer Stok'),
+        ('request', 'Permintaan Barang'),
+    ]
+
+    ACTION_CHOICES = [
+        ('create', 'Tambah'),
+        ('update', 'Ubah'),
+        ('status', 'Ubah Status'),
+        ('change', 'Perubahan Stok'),
+        ('delete', 'Hapus'),
+    ]
+
+    entry_id = models.BigAutoField(primary_key=True)
+    topic = models.CharField(max_length=20, choices=TOPIC_CHOICES, verbose_name='Topik')
+    object_id = models.IntegerField(verbose_name='ID Data')
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, verbose_name='Aksi')
+    payload = models.JSONField(encoder=DjangoJSONEncoder, verbose_name='Data')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Outbox Entry'
+        verbose_name_plural = 'Outbox Entries'
+        ordering = ['entry_id']
+
+    def __str__(self):
+        return f"#{self.entry_id} {self.topic} {self.action}"
+
+
+class OutboxConsumer(models.Model):
+    """Checkpoint konsumen change feed: entri s.d. `position` sudah diproses"""
+    consumer_id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=100, unique=True, verbose_name='Nama Konsumen')
+    position = models.BigIntegerField(default=0, verbose_name='Posisi')
+    acknowledged_at = models.DateTimeField(auto_now=True, verbose_name='Terakhir Dikonfirmasi')
+
+    class Meta:
+        verbose_name = 'Outbox Consumer'
+        verbose_name_plural = 'Outbox Consumers'
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
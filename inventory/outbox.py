@@ -0,0 +1,187 @@
+"""
+Transactional outbox: change feed perubahan barang, stok, transaksi, dan permintaan.
+
+- Kode yang mengubah data memanggil `emit_*` di dalam transaksi DB yang sama,
+  sehingga entri outbox ikut commit/rollback bersama perubahannya.
+- Konsumen membaca entri setelah cursor (`fetch`, endpoint feed, atau command
+  `consume_outbox`) lalu mengonfirmasi posisi terakhir per batch (`acknowledge`).
+  Biaya satu poll sebanding dengan jumlah perubahan, bukan ukuran tabel.
+- Entri yang sudah dikonfirmasi semua konsumen dihapus (`compact`).
+
+Urutan id tidak sama dengan urutan commit: transaksi yang lebih lama bisa commit
+dengan id lebih kecil setelah id yang lebih besar terbaca. Karena itu `fetch`
+berhenti sebelum celah id yang masih baru (lihat `gap_wait_seconds`), agar
+cursor konsumen tidak melompati entri yang belum commit.
+
+Batasan: umur celah dihitung dari `created_at` (waktu INSERT, bukan waktu commit).
+Entri dari transaksi yang masih terbuka lebih lama dari `gap_wait_seconds` setelah
+INSERT-nya (bulk apply, batch scan besar, purge) bisa terlewati permanen oleh
+konsumen yang sudah maju. Setel INVENTORY_OUTBOX_GAP_WAIT_SECONDS di atas durasi
+transaksi penulis terlama.
+
+Konsumen terdaftar (OutboxConsumer) menahan pemadatan di posisinya. Konsumen hanya
+didaftarkan saat acknowledge atau oleh command `consume_outbox`; membaca feed tidak
+mendaftarkan apa pun. Konsumen yang tidak dipakai lagi dihapus dengan
+`consume_outbox --consumer nama --remove`.
+
+Pengarsipan transaksi tidak dicatat (isi data tidak berubah). Saldo per lokasi
+tidak punya entri sendiri: lokasi & jumlah ada di payload transaksi/transfer.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import Items, OutboxConsumer, OutboxEntry
+
+MAX_FETCH_LIMIT = 1000
+
+
+def gap_wait_seconds():
+    return getattr(settings, 'INVENTORY_OUTBOX_GAP_WAIT_SECONDS', 10)
+
+
+def _row(instance, excluded=()):
+    return {
+        field.attname: field.value_from_object(instance)
+        for field in instance._meta.concrete_fields
+        if field.name not in excluded
+        # Kolom yang diubah dengan ekspresi F() belum punya nilai
+        and not hasattr(field.value_from_object(instance), 'resolve_expression')
+    }
+
+
+def _entry(topic, instance, action, payload):
+    return OutboxEntry(topic=topic, object_id=instance.pk, action=action, payload=payload)
+
+
+def emit_item(item, action):
+    """Data master barang (stok ikut topik 'stock')"""
+    _entry('item', item, action, _row(item, set(Items.ATOMIC_FIELDS) | {'version'})).save()
+
+
+def emit_stock_change(item, old_stock, old_minimum, old_active):
+    """Perubahan stok / threshold / status aktif satu barang"""
+    if (old_stock, old_minimum, old_active) == (item.current_stock, item.minimum_stock, item.is_active):
+        return
+    _entry('stock', item, 'change', {
+        'item_id': item.pk,
+        'code': item.code,
+        'current_stock': item.current_stock,
+        'old_stock': old_stock,
+        'minimum_stock': item.minimum_stock,
+        'is_active': item.is_active,
+        'stock_status': item.stock_status if item.is_active else None,
+    }).save()
+
+
+def _action(created, old_status, status):
+    if created:
+        return 'create'
+    return 'status' if old_status != status else 'update'
+
+
+def emit_record(topic, instance, created=False, old_status=None):
+    """Transaksi / transfer / permintaan yang dibuat atau diubah lewat save()"""
+    status = getattr(instance, 'status', None)
+    payload = _row(instance, {'version'})
+    if not created and old_status != status:
+        payload['old_status'] = old_status
+    _entry(topic, instance, _action(created, old_status, status), payload).save()
+
+
+def emit_created(topic, instances):
+    """Data yang dibuat dengan bulk_create (satu INSERT outbox untuk semua)"""
+    OutboxEntry.objects.bulk_create([
+        _entry(topic, instance, 'create', _row(instance, {'version'})) for instance in instances
+    ])
+
+
+def emit_item_deleted(item_id):
+    """Barang dihapus permanen (purge) beserta seluruh histori transaksinya"""
+    OutboxEntry.objects.create(topic='item', object_id=item_id, action='delete', payload={'items_id': item_id})
+
+
+def serialize(entry):
+    return {
+        'id': entry.entry_id,
+        'topic': entry.topic,
+        'object_id': entry.object_id,
+        'action': entry.action,
+        'data': entry.payload,
+        'created_at': entry.created_at.isoformat(),
+    }
+
+
+def fetch(after, limit=100, topics=None):
+    """
+    Entri setelah `after` dalam urutan id. Return (entri, cursor, masih_ada).
+    Cursor = id terakhir yang aman dilewati (termasuk entri topik lain yang
+    disaring), dipakai sebagai `after` berikutnya / posisi acknowledge.
+    """
+    limit = max(1, min(limit, MAX_FETCH_LIMIT))
+    scanned = list(OutboxEntry.objects.filter(entry_id__gt=after).order_by('entry_id')[:limit])
+    settled_before = timezone.now() - timedelta(seconds=gap_wait_seconds())
+
+    entries = []
+    cursor = after
+    for entry in scanned:
+        # Celah id yang masih baru bisa berupa transaksi yang belum commit: tunggu poll berikutnya
+        if entry.entry_id != cursor + 1 and entry.created_at > settled_before:
+            return entries, cursor, False
+        cursor = entry.entry_id
+        if not topics or entry.topic in topics:
+            entries.append(entry)
+    return entries, cursor, len(scanned) == limit
+
+
+def consumer_position(name, register=False):
+    """
+    Checkpoint konsumen (0 jika belum terdaftar). `register=True` mendaftarkan konsumen
+    baru agar entri yang belum dibacanya tidak dipadatkan.
+    """
+    if register:
+        consumer, _ = OutboxConsumer.objects.get_or_create(name=name)
+        return consumer.position
+    return OutboxConsumer.objects.filter(name=name).values_list('position', flat=True).first() or 0
+
+
+def remove_consumer(name):
+    """Hapus konsumen yang tidak dipakai lagi agar tidak menahan pemadatan. Return True jika ada"""
+    deleted, _ = OutboxConsumer.objects.filter(name=name).delete()
+    if deleted:
+        compact()
+    return bool(deleted)
+
+
+def acknowledge(name, position):
+    """
+    Simpan checkpoint konsumen (hanya maju, maksimal entri terakhir).
+    Jika konsumen ini yang paling tertinggal, entri yang sudah diproses semua
+    konsumen langsung dipadatkan. Return posisi tersimpan.
+    """
+    latest = OutboxEntry.objects.order_by('-entry_id').values_list('entry_id', flat=True).first() or 0
+    with transaction.atomic():
+        consumer, _ = OutboxConsumer.objects.select_for_update().get_or_create(name=name)
+        previous = consumer.position
+        if min(position, latest) > previous:
+            consumer.position = min(position, latest)
+            consumer.save(update_fields=['position', 'acknowledged_at'])
+    # Batas pemadatan hanya naik saat konsumen paling tertinggal maju
+    if consumer.position > previous and previous <= _slowest_position():
+        compact()
+    return consumer.position
+
+
+def _slowest_position():
+    return OutboxConsumer.objects.aggregate(position=Min('position'))['position'] or 0
+
+
+def compact():
+    """Hapus entri yang sudah dikonfirmasi semua konsumen atau melewati masa simpan"""
+    deleted, _ = OutboxEntry.objects.filter(entry_id__lte=_slowest_position()).delete()
+    days = getattr(settings, 'INVENTORY_OUTBOX_RETENTION_DAYS', 30)
+    expired, _ = OutboxEntry.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted + expired
@@ -0,0 +1,210 @@
+"""
+Layout PDF laporan transaksi (barang masuk/keluar) dengan jumlah baris per halaman tetap.
+
+Karena setiap halaman memuat jumlah baris yang pasti, laporan besar bisa dibagi
+per rentang halaman ke beberapa proses (ProcessPoolExecutor) lalu digabung
+tanpa mengubah nomor halaman maupun header tabel.
+
+Modul ini sengaja tidak mengimpor Django: worker hanya menerima `spec` (dict)
+dan baris berupa tuple string, bukan instance model.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from math import ceil
+
+from pypdf import PdfReader, PdfWriter
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+# Baris data per halaman (A4 landscape, tinggi baris ~22pt, header tabel ~26pt);
+# halaman pertama lebih sedikit karena memuat judul & info
+FIRST_PAGE_ROWS = 14
+ROWS_PER_PAGE = 21
+# Minimal halaman per worker (di bawah ini overhead proses lebih besar dari manfaatnya)
+MIN_PAGES_PER_CHUNK = 20
+
+
+def truncate(text, length):
+    """Potong teks sel tabel (satu baris, agar tinggi baris tetap)"""
+    if not text:
+        return '-'
+    text = ' '.join(str(text).split())
+    return text[:length] + '...' if len(text) > length else text
+
+
+def page_count(row_count):
+    if row_count <= FIRST_PAGE_ROWS:
+        return 1
+    return 1 + ceil((row_count - FIRST_PAGE_ROWS) / ROWS_PER_PAGE)
+
+
+def rows_before_page(page):
+    """Jumlah baris data sebelum halaman `page` (1-based)"""
+    if page <= 1:
+        return 0
+    return FIRST_PAGE_ROWS + (page - 2) * ROWS_PER_PAGE
+
+
+def _header_elements(spec, styles):
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        textColor=colors.HexColor('#2c5aa0'),
+        spaceAfter=12,
+        alignment=TA_CENTER,
+        fontName='Helvetica-Bold'
+    )
+    subtitle_style = ParagraphStyle(
+        'CustomSubtitle',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=colors.grey,
+        spaceAfter=20,
+        alignment=TA_CENTER
+    )
+
+    info_table = Table(spec['info'], colWidths=[3*cm, 6*cm, 3*cm, 6*cm])
+    info_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e9ecef')),
+        ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#e9ecef')),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ]))
+
+    return [
+        Paragraph(spec['title'], title_style),
+        Paragraph("Sistem Informasi Manajemen Inventaris Gudang - PT Delimajaya", subtitle_style),
+        info_table,
+        Spacer(1, 0.5*cm),
+    ]
+
+
+def _page_table(spec, rows, first_row_number):
+    """Tabel satu halaman: header kolom + baris data bernomor urut global"""
+    table_data = [spec['header']]
+    table_data.extend(
+        (str(number), *row) for number, row in enumerate(rows, first_row_number)
+    )
+    table = Table(table_data, colWidths=spec['col_widths'])
+    table.setStyle(TableStyle([
+        # Header style
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5aa0')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 9),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('TOPPADDING', (0, 0), (-1, 0), 8),
+
+        # Data rows style
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # No
+        *[('ALIGN', (col, 1), (col, -1), 'RIGHT') for col in spec.get('right_columns', ())],  # Angka
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 1), (-1, -1), 5),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 5),
+
+        # Alternating row colors (berdasarkan nomor urut global)
+        *[
+            ('BACKGROUND', (0, i), (-1, i), colors.HexColor('#f8f9fa'))
+            for i in range(1, len(table_data))
+            if (first_row_number + i - 1) % 2 == 0
+        ]
+    ]))
+    return table
+
+
+def render_pages(spec, rows, first_page, total_pages):
+    """
+    Render halaman `first_page` dst. untuk `rows` (sudah dipotong sesuai batas halaman).
+    Return bytes PDF.
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=landscape(A4),
+        rightMargin=1*cm,
+        leftMargin=1*cm,
+        topMargin=1.5*cm,
+        bottomMargin=1.5*cm
+    )
+
+    def draw_footer(canvas, document):
+        page = first_page + canvas.getPageNumber() - 1
+        canvas.saveState()
+        canvas.setFont('Helvetica', 8)
+        canvas.setFillColor(colors.grey)
+        canvas.drawString(document.leftMargin, 0.8*cm, f"Dicetak pada: {spec['printed_at']}")
+        canvas.drawRightString(
+            document.pagesize[0] - document.rightMargin, 0.8*cm,
+            f"Halaman {page} dari {total_pages}"
+        )
+        canvas.restoreState()
+
+    elements = []
+    if first_page == 1:
+        elements.extend(_header_elements(spec, getSampleStyleSheet()))
+
+    offset = rows_before_page(first_page)
+    page = first_page
+    position = 0
+    while True:
+        capacity = FIRST_PAGE_ROWS if page == 1 else ROWS_PER_PAGE
+        page_rows = rows[position:position + capacity]
+        elements.append(_page_table(spec, page_rows, offset + position + 1))
+        position += len(page_rows)
+        page += 1
+        if position >= len(rows):
+            break
+        elements.append(PageBreak())
+
+    doc.build(elements, onFirstPage=draw_footer, onLaterPages=draw_footer)
+    return buffer.getvalue()
+
+
+def _render_chunk(args):
+    return render_pages(*args)
+
+
+def render_report(spec, rows, workers=1, min_parallel_rows=5000):
+    """
+    Render laporan lengkap. Untuk data besar, halaman dibagi ke `workers` proses
+    (potongan halaman berurutan) lalu hasilnya digabung dengan pypdf.
+    """
+    total_pages = page_count(len(rows))
+    pages_per_chunk = max(MIN_PAGES_PER_CHUNK, ceil(total_pages / max(workers, 1)))
+
+    if workers <= 1 or len(rows) < min_parallel_rows or total_pages <= pages_per_chunk:
+        return render_pages(spec, rows, 1, total_pages)
+
+    tasks = []
+    for first_page in range(1, total_pages + 1, pages_per_chunk):
+        start = rows_before_page(first_page)
+        end = rows_before_page(first_page + pages_per_chunk)
+        tasks.append((spec, rows[start:end], first_page, total_pages))
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+        parts = list(executor.map(_render_chunk, tasks))
+
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(PdfReader(BytesIO(part)))
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
@@ -6,9 +6,10 @@ from django.contrib import messages
 from django.db.models import Q, F
 from django.db import transaction
 from datetime import datetime, date
-from .models import RequestItems, Items, User, OutgoingTransaction
+from .models import RequestItems, User, OutgoingTransaction, ItemStock, Location
 from .forms import RequestItemForm, ApproveRequestForm
 from .mixins import ProduksiRequiredMixin, GudangRequiredMixin, ProduksiOrGudangMixin
+from .idempotency import IdempotentPostMixin
 from django.contrib.auth.mixins import UserPassesTestMixin
 
 class RequestItemListView(ProduksiOrGudangMixin, ListView):
@@ -66,19 +67,13 @@ class RequestItemListView(ProduksiOrGudangMixin, ListView):
         
         return context
 
-class RequestItemCreateView(ProduksiRequiredMixin, CreateView):
+class RequestItemCreateView(ProduksiRequiredMixin, IdempotentPostMixin, CreateView):
     """Create new request item - only accessible by produksi"""
     model = RequestItems
     form_class = RequestItemForm
     template_name = 'inventory/production/request_form.html'
     success_url = reverse_lazy('request_list')
     
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        # Add stock info for all items
-        context['items_with_stock'] = Items.objects.filter(is_active=True).select_related('category')
-        return context
-    
     def form_valid(self, form):
         # Set requested_by to current user
         user_id = self.request.session.get('user_id')
@@ -133,7 +128,7 @@ class RequestItemDetailView(ProduksiOrGudangMixin, DetailView):
         
         return context
 
-class RequestItemApproveView(GudangRequiredMixin, UpdateView):
+class RequestItemApproveView(GudangRequiredMixin, IdempotentPostMixin, UpdateView):
     """Approve or reject request item (Admin/Gudang only)"""
     model = RequestItems
     form_class = ApproveRequestForm
@@ -161,16 +156,20 @@ class RequestItemApproveView(GudangRequiredMixin, UpdateView):
             if new_status == 'approved':
                 item = request_obj.item
                 requested_qty = request_obj.quantity
+                location = request_obj.location or Location.get_default()
+                available = ItemStock.quantity_at(item, location)
                 
-                # Check if stock is sufficient
-                if item.current_stock < requested_qty:
-                    messages.error(
-                        self.request,
-                        f'Stok tidak mencukupi! Stok tersedia: {item.current_stock} {item.get_unit_display()}, '
+                # Check if stock is sufficient (di lokasi pengambilan).
+                # Ditolak sebagai form tidak valid (bukan redirect) agar respons gagal tidak
+                # disimpan di idempotency key dan kiriman ulang dijalankan lagi
+                if available < requested_qty:
+                    form.add_error(
+                        None,
+                        f'Stok di {location.name} tidak mencukupi! Stok tersedia: {available} {item.get_unit_display()}, '
                         f'diminta: {requested_qty} {item.get_unit_display()}. '
                         f'Permintaan tidak dapat disetujui.'
                     )
-                    return redirect('request_detail', request_id=request_obj.request_id)
+                    return self.form_invalid(form)
                 
                 # Save the request first
                 response = super().form_valid(form)
@@ -195,6 +194,7 @@ class RequestItemApproveView(GudangRequiredMixin, UpdateView):
                     transaction_number=transaction_number,
                     request_item=request_obj,
                     item=item,
+                    location=location,
                     quantity=requested_qty,
                     transaction_date=today,
                     purpose=f'Permintaan: {request_obj.request_number} - {request_obj.purpose}',
@@ -227,14 +227,17 @@ class RequestItemApproveView(GudangRequiredMixin, UpdateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         request_obj = self.get_object()
+        location = request_obj.location or Location.get_default()
+        current = ItemStock.quantity_at(request_obj.item, location)
         
-        # Add stock info
+        # Add stock info (saldo di lokasi pengambilan)
         context['stock_info'] = {
-            'current': request_obj.item.current_stock,
+            'current': current,
+            'location': location,
             'requested': request_obj.quantity,
             'unit': request_obj.item.get_unit_display(),
-            'deficit': max(0, request_obj.quantity - request_obj.item.current_stock),
-            'available': request_obj.item.current_stock >= request_obj.quantity
+            'deficit': max(0, request_obj.quantity - current),
+            'available': current >= request_obj.quantity
         }
         
         return context
@@ -0,0 +1,129 @@
+"""
+Rekonsiliasi stok: bandingkan `Items.current_stock` dengan stok yang seharusnya
+menurut histori transaksi (saldo arsip + incoming `received` - outgoing `released`).
+
+Perhitungan dilakukan per rentang items_id (chunk) dengan satu query agregat
+per chunk, sehingga beberapa chunk bisa dijalankan paralel.
+"""
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import (
+    IncomingTransaction, Items, ItemStock, Location, OutgoingTransaction, StockAdjustment, StockAlert,
+)
+
+
+def _quantity_subquery(queryset):
+    """Subquery SUM(quantity) per item, 0 jika tidak ada transaksi"""
+    totals = queryset.filter(item_id=OuterRef('pk')).order_by().values('item_id').annotate(
+        total=Sum('quantity')
+    ).values('total')
+    return Coalesce(Subquery(totals, output_field=IntegerField()), Value(0))
+
+
+def expected_stock_queryset(start_id=None, end_id=None):
+    """
+    Queryset Items beranotasi `expected_stock` untuk rentang items_id [start_id, end_id).
+    """
+    items = Items.objects.order_by('items_id')
+    if start_id is not None:
+        items = items.filter(items_id__gte=start_id)
+    if end_id is not None:
+        items = items.filter(items_id__lt=end_id)
+
+    return items.annotate(
+        expected_stock=(
+            F('archived_balance') +
+            _quantity_subquery(IncomingTransaction.objects.filter(status='received')) -
+            _quantity_subquery(OutgoingTransaction.objects.filter(status='released'))
+        )
+    )
+
+
+def find_discrepancies(start_id=None, end_id=None):
+    """Return list dict barang yang stoknya tidak sama dengan histori transaksi"""
+    rows = expected_stock_queryset(start_id, end_id).values(
+        'items_id', 'code', 'name', 'current_stock', 'expected_stock'
+    )
+    return [
+        {**row, 'difference': row['current_stock'] - row['expected_stock']}
+        for row in rows.iterator()
+        if row['current_stock'] != row['expected_stock']
+    ]
+
+
+def id_ranges(chunk_size, start_id=None, end_id=None):
+    """Bagi rentang items_id menjadi chunk [start, end) berukuran `chunk_size`"""
+    items = Items.objects.all()
+    if start_id is not None:
+        items = items.filter(items_id__gte=start_id)
+    if end_id is not None:
+        items = items.filter(items_id__lt=end_id)
+
+    bounds = items.values_list('items_id', flat=True).order_by('items_id')
+    first = bounds.first()
+    last = bounds.last()
+    if first is None:
+        return []
+
+    return [
+        (low, min(low + chunk_size, last + 1))
+        for low in range(first, last + 1, chunk_size)
+    ]
+
+
+def repair_range(start_id, end_id, user_id=None, reason=''):
+    """
+    Perbaiki drift stok di satu chunk.
+    Dihitung ulang di dalam transaksi dengan baris barang terkunci agar
+    transaksi stok yang berjalan bersamaan tidak tertimpa.
+    Return list StockAdjustment yang dibuat.
+    """
+    with transaction.atomic():
+        locked = list(
+            Items.objects.select_for_update().filter(
+                items_id__gte=start_id, items_id__lt=end_id
+            ).values_list('items_id', flat=True)
+        )
+        if not locked:
+            return []
+
+        items = list(expected_stock_queryset(start_id, end_id).only(
+            'items_id', 'code', 'current_stock', 'minimum_stock', 'is_active'
+        ))
+        drifted = [item for item in items if item.current_stock != item.expected_stock]
+
+        adjustments = []
+        old_stocks = {}
+        for item in drifted:
+            old_stocks[item.pk] = item.current_stock
+            adjustments.append(StockAdjustment(
+                item=item,
+                previous_stock=item.current_stock,
+                new_stock=item.expected_stock,
+                difference=item.expected_stock - item.current_stock,
+                reason=reason or 'Rekonsiliasi stok otomatis',
+                created_by_id=user_id,
+            ))
+            item.current_stock = item.expected_stock
+
+        # updated_at tidak disentuh (sama seperti adjust_stock): hanya edit data master yang menggesernya
+        Items.objects.bulk_update(drifted, ['current_stock'], batch_size=500)
+        # Total saldo lokasi disamakan dengan stok yang benar; selisihnya dibukukan di lokasi default
+        located = dict(
+            ItemStock.objects.filter(item__in=drifted).order_by().values('item_id').annotate(
+                total=Sum('quantity')
+            ).values_list('item_id', 'total')
+        )
+        default_location = Location.get_default() if drifted else None
+        for item in drifted:
+            difference = item.expected_stock - located.get(item.pk, 0)
+            if difference:
+                ItemStock.add(item, default_location, difference)
+        StockAdjustment.objects.bulk_create(adjustments, batch_size=500)
+
+        for item in drifted:
+            StockAlert.track(item, old_stocks[item.pk])
+
+    return adjustments
@@ -0,0 +1,454 @@
+"""
+Definisi laporan deklaratif + engine untuk tampilan HTML, export PDF, dan CSV.
+
+Setiap laporan mendeklarasikan model, field pencarian, field tanggal, urutan,
+kolom (beserta format & lebar di PDF), dan ringkasan. Engine menjalankan satu
+query `.values()` per kombinasi filter, menghitung ringkasan dari baris yang
+sama di Python, dan menyimpan hasilnya di cache sehingga tab HTML dan export
+tidak mengulang query.
+"""
+import csv
+import hashlib
+import os
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import HttpResponse
+from django.utils import timezone
+from reportlab.lib.units import cm
+
+from .abc_analysis import analysis_windows
+from .lots import expiring_lots, expiry_warning_days
+from .models import IncomingTransaction, ItemAnalytics, Items, OutgoingTransaction, RequestItems, StockLot
+from .pdf_reports import render_report, truncate
+from .snapshots import stock_as_of_queryset
+
+CACHE_TIMEOUT = 60
+
+
+class Column:
+    """Satu kolom laporan: field `.values()`, label, format tampilan, dan lebar di PDF"""
+
+    def __init__(self, field, label, pdf_width, choices=None, date_format=None, max_length=None, numeric=False):
+        self.field = field
+        self.label = label
+        self.pdf_width = pdf_width
+        self.choices = choices
+        self.date_format = date_format
+        self.max_length = max_length
+        self.numeric = numeric
+
+    def display(self, row):
+        value = row[self.field]
+        if value is None or value == '':
+            return '-'
+        if self.choices is not None:
+            return str(self.choices.get(value, value))
+        if self.date_format:
+            return value.strftime(self.date_format)
+        return str(value)
+
+
+class Report:
+    """Basis laporan. Subclass cukup mendeklarasikan atribut & `summarize`"""
+    slug = None
+    title = ''
+    export_name = ''
+    model = None
+    search_fields = []
+    date_field = None
+    ordering = []
+    columns = []
+    # Field tambahan yang hanya dipakai tabel HTML (tidak ikut export)
+    extra_fields = []
+
+    def __init__(self, search='', date_from=None, date_to=None, as_of=None, window=None):
+        self.search = search
+        self.date_from = date_from
+        self.date_to = date_to
+        self.as_of = as_of
+        self.window = window
+
+    # -- Query -------------------------------------------------------------
+
+    def filtered_queryset(self):
+        """Queryset dengan filter pencarian & tanggal (tanpa anotasi/urutan)"""
+        queryset = self.model.objects.all()
+        if self.search:
+            condition = Q()
+            for field in self.search_fields:
+                condition |= Q(**{f'{field}__icontains': self.search})
+            queryset = queryset.filter(condition)
+        if self.date_field and self.date_from:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': self.date_from})
+        if self.date_field and self.date_to:
+            queryset = queryset.filter(**{f'{self.date_field}__lte': self.date_to})
+        return queryset
+
+    def get_queryset(self):
+        return self.filtered_queryset().order_by(*self.ordering)
+
+    def fields(self):
+        fields = [column.field for column in self.columns] + self.extra_fields
+        return list(dict.fromkeys(fields))
+
+    def fetch(self):
+        """Satu query data; baris berupa dict"""
+        rows = list(self.get_queryset().values(*self.fields()))
+        self.prepare_rows(rows)
+        # Label pilihan (satuan, status) untuk tabel HTML, mis. `item__unit_display`
+        choice_columns = [column for column in self.columns if column.choices is not None]
+        for row in rows:
+            for column in choice_columns:
+                row[f'{column.field}_display'] = column.display(row)
+        return rows
+
+    def prepare_rows(self, rows):
+        """Hook untuk kolom turunan (dihitung di Python dari baris yang sama)"""
+
+    def summarize(self, rows):
+        return {'total': len(rows)}
+
+    # -- Cache -------------------------------------------------------------
+
+    def cache_key(self, kind='result'):
+        raw_key = f'{self.search}|{self.date_from}|{self.date_to}|{self.as_of}|{self.window}'
+        return f'report:{self.slug}:{kind}:' + hashlib.md5(raw_key.encode()).hexdigest()
+
+    def result(self):
+        """{'rows', 'summary'} untuk filter ini (di-cache per kombinasi filter)"""
+        result = cache.get(self.cache_key())
+        if result is None:
+            rows = self.fetch()
+            result = {'rows': rows, 'summary': self.summarize(rows)}
+            # Hasil raksasa tidak disimpan agar cache tidak membengkak
+            if len(rows) <= getattr(settings, 'INVENTORY_REPORT_CACHE_MAX_ROWS', 20000):
+                cache.set(self.cache_key(), result, CACHE_TIMEOUT)
+        return result
+
+    def count(self):
+        """Jumlah baris (untuk badge tab): dari hasil ter-cache bila ada, jika tidak COUNT(*)"""
+        result = cache.get(self.cache_key())
+        if result is not None:
+            return len(result['rows'])
+        return cache.get_or_set(self.cache_key('count'), lambda: self.filtered_queryset().count(), CACHE_TIMEOUT)
+
+    # -- Export ------------------------------------------------------------
+
+    def period_label(self):
+        return f"{self.date_from or 'Semua'} s/d {self.date_to or 'Sekarang'}"
+
+    def summary_label(self, summary):
+        return 'Total Data:', f"{summary['total']:,}"
+
+    def render_pdf(self, printed_by):
+        result = self.result()
+        now = datetime.now()
+        summary_label, summary_value = self.summary_label(result['summary'])
+        spec = {
+            'title': self.title,
+            'info': [
+                ['Dicetak oleh:', printed_by, 'Tanggal Cetak:', now.strftime('%d/%m/%Y %H:%M')],
+                ['Periode:', self.period_label(), 'Total Data:', str(len(result['rows']))],
+                ['Filter Pencarian:', self.search or '-', summary_label, summary_value],
+            ],
+            'header': ['No'] + [column.label for column in self.columns],
+            'col_widths': [1*cm] + [column.pdf_width for column in self.columns],
+            'right_columns': [index for index, column in enumerate(self.columns, 1) if column.numeric],
+            'printed_at': now.strftime('%d %B %Y, %H:%M:%S'),
+        }
+        rows = [
+            tuple(
+                truncate(column.display(row), column.max_length) if column.max_length else column.display(row)
+                for column in self.columns
+            )
+            for row in result['rows']
+        ]
+        return render_report(
+            spec,
+            rows,
+            workers=getattr(settings, 'INVENTORY_PDF_WORKERS', None) or os.cpu_count() or 1,
+            min_parallel_rows=getattr(settings, 'INVENTORY_PDF_PARALLEL_MIN_ROWS', 5000),
+        )
+
+    def filename(self, extension):
+        return f"laporan_{self.export_name}_{datetime.now().strftime('%Y%m%d')}.{extension}"
+
+    def pdf_response(self, printed_by):
+        response = HttpResponse(self.render_pdf(printed_by), content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{self.filename("pdf")}"'
+        return response
+
+    def csv_response(self):
+        response = HttpResponse(content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{self.filename("csv")}"'
+        # BOM agar Excel membaca UTF-8 dengan benar
+        response.write('\ufeff')
+        writer = csv.writer(response)
+        writer.writerow([column.label for column in self.columns])
+        for row in self.result()['rows']:
+            writer.writerow([column.display(row) for column in self.columns])
+        return response
+
+
+class StockReport(Report):
+    slug = 'stok'
+    export_name = 'stok_barang'
+    title = 'LAPORAN STOK BARANG'
+    model = Items
+    search_fields = ['name', 'code', 'category__name']
+    ordering = ['-current_stock', 'items_id']
+    columns = [
+        Column('code', 'Kode Barang', 3*cm),
+        Column('name', 'Nama Barang', 7*cm, max_length=45),
+        Column('category__name', 'Kategori', 4*cm, max_length=25),
+        Column('unit', 'Satuan', 2.5*cm, choices=dict(Items.UNIT_CHOICES)),
+        Column('current_stock', 'Stok', 2.5*cm, numeric=True),
+        Column('minimum_stock', 'Stok Minimum', 2.5*cm, numeric=True),
+        Column('stock_status', 'Status Stok', 3*cm, choices=Items.STOCK_STATUS_DISPLAY),
+    ]
+    extra_fields = ['items_id']
+
+    def filtered_queryset(self):
+        return super().filtered_queryset().filter(is_active=True)
+
+    def get_queryset(self):
+        if self.as_of:
+            # Saldo historis: snapshot terdekat + mutasi sesudahnya
+            return stock_as_of_queryset(self.as_of, self.filtered_queryset()).order_by('-stock_as_of', 'items_id')
+        return super().get_queryset()
+
+    def fields(self):
+        fields = [field for field in super().fields() if field != 'stock_status']
+        if self.as_of:
+            fields = [field for field in fields if field != 'current_stock'] + ['stock_as_of']
+        return fields
+
+    def prepare_rows(self, rows):
+        for row in rows:
+            if self.as_of:
+                row['current_stock'] = row.pop('stock_as_of')
+            row['stock_status'] = Items.compute_stock_status(row['current_stock'], row['minimum_stock'])
+
+    def summarize(self, rows):
+        statuses = [row['stock_status'] for row in rows]
+        return {
+            'total': len(rows),
+            'total_stock': sum(row['current_stock'] for row in rows),
+            'in_stock_count': statuses.count('in_stock'),
+            'low_stock_count': statuses.count('low_stock'),
+            'out_of_stock_count': statuses.count('out_of_stock'),
+        }
+
+    def period_label(self):
+        return f"Per {self.as_of:%d/%m/%Y}" if self.as_of else 'Stok saat ini'
+
+    def summary_label(self, summary):
+        return 'Total Stok:', f"{summary['total_stock']:,}"
+
+
+class IncomingReport(Report):
+    slug = 'masuk'
+    export_name = 'barang_masuk'
+    title = 'LAPORAN BARANG MASUK'
+    model = IncomingTransaction
+    search_fields = ['item__name', 'supplier__name', 'notes']
+    date_field = 'transaction_date'
+    ordering = ['-transaction_date', '-incoming_id']
+    columns = [
+        Column('transaction_number', 'No. Transaksi', 3*cm),
+        Column('transaction_date', 'Tanggal', 2.2*cm, date_format='%d/%m/%Y'),
+        Column('item__code', 'Kode Barang', 2.2*cm),
+        Column('item__name', 'Nama Barang', 4*cm, max_length=30),
+        Column('supplier__name', 'Supplier', 3.5*cm, max_length=20),
+        Column('quantity', 'Quantity', 1.8*cm, numeric=True),
+        Column('item__unit', 'Satuan', 1.8*cm, choices=dict(Items.UNIT_CHOICES)),
+        Column('status', 'Status', 2*cm, choices=dict(IncomingTransaction.STATUS_CHOICES)),
+        Column('received_by__name', 'Diterima Oleh', 2.5*cm, max_length=15),
+    ]
+    extra_fields = ['notes']
+
+    def summarize(self, rows):
+        return {
+            'total': len(rows),
+            'total_quantity': sum(row['quantity'] for row in rows),
+        }
+
+    def summary_label(self, summary):
+        return 'Total Quantity:', f"{summary['total_quantity']:,}"
+
+
+class OutgoingReport(IncomingReport):
+    slug = 'keluar'
+    export_name = 'barang_keluar'
+    title = 'LAPORAN BARANG KELUAR'
+    model = OutgoingTransaction
+    search_fields = ['item__name', 'purpose', 'notes']
+    ordering = ['-transaction_date', '-outgoing_id']
+    columns = [
+        Column('transaction_number', 'No. Transaksi', 3*cm),
+        Column('transaction_date', 'Tanggal', 2.2*cm, date_format='%d/%m/%Y'),
+        Column('item__code', 'Kode Barang', 2.2*cm),
+        Column('item__name', 'Nama Barang', 4*cm, max_length=30),
+        Column('purpose', 'Tujuan/Keperluan', 4*cm, max_length=25),
+        Column('quantity', 'Quantity', 1.8*cm, numeric=True),
+        Column('item__unit', 'Satuan', 1.8*cm, choices=dict(Items.UNIT_CHOICES)),
+        Column('status', 'Status', 2*cm, choices=dict(OutgoingTransaction.STATUS_CHOICES)),
+        Column('released_by__name', 'Dikeluarkan Oleh', 2.5*cm, max_length=15),
+    ]
+
+
+class RequestReport(Report):
+    slug = 'permintaan'
+    export_name = 'permintaan_barang'
+    title = 'LAPORAN PERMINTAAN BARANG'
+    model = RequestItems
+    search_fields = ['request_number', 'item__name', 'purpose']
+    date_field = 'request_date'
+    ordering = ['-request_date', '-request_id']
+    columns = [
+        Column('request_number', 'No. Permintaan', 3*cm),
+        Column('request_date', 'Tanggal', 2.2*cm, date_format='%d/%m/%Y'),
+        Column('item__code', 'Kode Barang', 2.2*cm),
+        Column('item__name', 'Nama Barang', 4*cm, max_length=30),
+        Column('quantity', 'Jumlah', 1.8*cm, numeric=True),
+        Column('item__unit', 'Satuan', 1.8*cm, choices=dict(Items.UNIT_CHOICES)),
+        Column('purpose', 'Keperluan', 4*cm, max_length=25),
+        Column('requested_by__name', 'Diminta Oleh', 2.5*cm, max_length=15),
+        Column('status', 'Status', 2*cm, choices=dict(RequestItems.STATUS_CHOICES)),
+        Column('approved_by__name', 'Disetujui Oleh', 2.5*cm, max_length=15),
+    ]
+
+    def summarize(self, rows):
+        statuses = [row['status'] for row in rows]
+        return {
+            'total': len(rows),
+            'pending': statuses.count('pending'),
+            'approved': statuses.count('approved'),
+            'rejected': statuses.count('rejected'),
+        }
+
+    def summary_label(self, summary):
+        return 'Pending:', f"{summary['pending']:,} (Disetujui {summary['approved']:,}, Ditolak {summary['rejected']:,})"
+
+
+class AbcReport(Report):
+    slug = 'abc'
+    export_name = 'analisis_abc'
+    title = 'ANALISIS ABC & PERPUTARAN STOK'
+    model = ItemAnalytics
+    search_fields = ['item__name', 'item__code', 'item__category__name']
+    ordering = ['-consumption', 'item_id']
+    columns = [
+        Column('item__code', 'Kode Barang', 2.4*cm),
+        Column('item__name', 'Nama Barang', 5*cm, max_length=35),
+        Column('item__category__name', 'Kategori', 3*cm, max_length=20),
+        Column('abc_class', 'Kelas', 1.4*cm),
+        Column('consumption', 'Pemakaian', 2.2*cm, numeric=True),
+        Column('share_percent', 'Porsi (%)', 2*cm, numeric=True),
+        Column('item__current_stock', 'Stok', 1.8*cm, numeric=True),
+        Column('turnover', 'Perputaran', 2.2*cm, numeric=True),
+        Column('days_of_cover', 'Days of Cover', 2.4*cm, numeric=True),
+        Column('days_since_movement', 'Hari Tanpa Mutasi', 2.8*cm, numeric=True),
+    ]
+    extra_fields = ['item_id', 'item__unit', 'consumption_share', 'is_dead_stock', 'computed_at']
+
+    def __init__(self, **filters):
+        super().__init__(**filters)
+        windows = analysis_windows()
+        if self.window not in windows:
+            self.window = windows[len(windows) // 2]
+
+    def filtered_queryset(self):
+        return super().filtered_queryset().filter(window_days=self.window, item__is_active=True)
+
+    def fields(self):
+        return [field for field in super().fields() if field != 'share_percent']
+
+    def prepare_rows(self, rows):
+        for row in rows:
+            row['share_percent'] = round(row['consumption_share'] * 100, 1)
+            if row['turnover'] is not None:
+                row['turnover'] = round(row['turnover'], 2)
+            if row['days_of_cover'] is not None:
+                row['days_of_cover'] = round(row['days_of_cover'])
+
+    def summarize(self, rows):
+        classes = [row['abc_class'] for row in rows]
+        return {
+            'total': len(rows),
+            'total_consumption': sum(row['consumption'] for row in rows),
+            'class_a_count': classes.count('A'),
+            'class_b_count': classes.count('B'),
+            'class_c_count': classes.count('C'),
+            'dead_stock_count': sum(row['is_dead_stock'] for row in rows),
+            'computed_at': max((row['computed_at'] for row in rows), default=None),
+        }
+
+    def period_label(self):
+        return f'{self.window} hari terakhir'
+
+    def summary_label(self, summary):
+        return 'Kelas A / B / C:', (
+            f"{summary['class_a_count']:,} / {summary['class_b_count']:,} / {summary['class_c_count']:,} "
+            f"(dead stock {summary['dead_stock_count']:,})"
+        )
+
+
+class ExpiringLotReport(Report):
+    slug = 'kedaluwarsa'
+    export_name = 'lot_kedaluwarsa'
+    title = 'LAPORAN LOT SEGERA KEDALUWARSA'
+    model = StockLot
+    search_fields = ['lot_number', 'item__name', 'item__code', 'location__name']
+    ordering = ['expiry_date', 'lot_id']
+    columns = [
+        Column('lot_number', 'No. Lot', 3.2*cm),
+        Column('item__code', 'Kode Barang', 2.4*cm),
+        Column('item__name', 'Nama Barang', 5.5*cm, max_length=38),
+        Column('location__name', 'Lokasi', 3*cm, max_length=20),
+        Column('received_date', 'Diterima', 2.2*cm, date_format='%d/%m/%Y'),
+        Column('expiry_date', 'Kedaluwarsa', 2.4*cm, date_format='%d/%m/%Y'),
+        Column('days_left', 'Sisa Hari', 2*cm, numeric=True),
+        Column('quantity_remaining', 'Sisa', 1.8*cm, numeric=True),
+        Column('item__unit', 'Satuan', 1.8*cm, choices=dict(Items.UNIT_CHOICES)),
+    ]
+    extra_fields = ['lot_id', 'item_id']
+
+    def __init__(self, **filters):
+        super().__init__(**filters)
+        # Window = jangkauan hari ke depan; kosong = default setting
+        if not self.window:
+            self.window = expiry_warning_days()
+
+    def filtered_queryset(self):
+        return expiring_lots(self.window, super().filtered_queryset().filter(item__is_active=True))
+
+    def fields(self):
+        return [field for field in super().fields() if field != 'days_left']
+
+    def prepare_rows(self, rows):
+        today = timezone.localdate()
+        for row in rows:
+            row['days_left'] = (row['expiry_date'] - today).days
+
+    def summarize(self, rows):
+        return {
+            'total': len(rows),
+            'total_quantity': sum(row['quantity_remaining'] for row in rows),
+            'expired_count': sum(row['days_left'] < 0 for row in rows),
+        }
+
+    def period_label(self):
+        return f'Kedaluwarsa dalam {self.window} hari'
+
+    def summary_label(self, summary):
+        return 'Sudah Kedaluwarsa:', f"{summary['expired_count']:,} lot (total sisa {summary['total_quantity']:,})"
+
+
+REPORTS = {
+    report.slug: report
+    for report in [StockReport, IncomingReport, OutgoingReport, RequestReport, AbcReport, ExpiringLotReport]
+}
@@ -0,0 +1,140 @@
+"""
+Scan station: barang masuk/keluar dari scanner barcode dalam satu batch.
+
+Hasil scan disimpan di browser selama sesi, lalu dikirim sekaligus. Server:
+- menggabungkan baris per kode barang (scan berulang = tambah jumlah),
+- mengambil semua barang dengan satu query `code IN (...)`,
+- untuk barang keluar, mengunci saldo lokasi semua barang dalam satu query,
+- membuat satu transaksi per barang (bulk_create) dan menerapkan stok serta
+  counter aktivitas sekali per barang, semuanya dalam satu transaksi DB,
+- barang masuk menjadi lot tanpa kedaluwarsa, barang keluar dialokasikan ke lot (FEFO).
+
+Batch ditolak seluruhnya jika ada kode yang tidak dikenal atau stok tidak
+cukup, sehingga tidak ada batch yang tersimpan sebagian.
+"""
+from collections import OrderedDict
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import audit, lots, outbox
+from .models import IncomingTransaction, Items, ItemStock, Location, OutgoingTransaction
+
+DIRECTIONS = {
+    # arah: (model, prefix nomor, status yang mempengaruhi stok, tanda mutasi)
+    'in': (IncomingTransaction, 'IN', 'received', 1),
+    'out': (OutgoingTransaction, 'OUT', 'released', -1),
+}
+
+
+def max_lines():
+    return getattr(settings, 'INVENTORY_SCAN_BATCH_MAX_LINES', 500)
+
+
+def merge_lines(lines):
+    """
+    Gabungkan baris scan per kode: {kode: jumlah} dengan urutan scan pertama.
+    ValidationError jika format baris tidak valid.
+    """
+    if not isinstance(lines, list) or not lines:
+        raise ValidationError('Belum ada barang yang di-scan.')
+    if len(lines) > max_lines():
+        raise ValidationError(f'Maksimal {max_lines()} baris per batch.')
+
+    quantities = OrderedDict()
+    for line in lines:
+        if not isinstance(line, dict):
+            raise ValidationError('Format baris scan tidak valid.')
+        code = str(line.get('code') or '').strip()
+        quantity = line.get('quantity', 1)
+        if not code:
+            raise ValidationError('Kode barang kosong.')
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity <= 0:
+            raise ValidationError(f'Jumlah untuk {code} harus bilangan bulat lebih dari 0.')
+        quantities[code] = quantities.get(code, 0) + quantity
+    return quantities
+
+
+def _next_numbers(model, prefix, count):
+    """`count` nomor transaksi berurutan untuk hari ini (format sama dengan save())"""
+    today = datetime.now().strftime('%Y%m%d')
+    last = model.objects.filter(
+        transaction_number__startswith=f'{prefix}{today}'
+    ).order_by('-transaction_number').values_list('transaction_number', flat=True).first()
+    start = int(last[-4:]) + 1 if last else 1
+    return [f'{prefix}{today}{str(number).zfill(4)}' for number in range(start, start + count)]
+
+
+def commit_batch(direction, lines, transaction_date, user_id=None, location=None,
+                 supplier=None, purpose='', notes=''):
+    """
+    Simpan satu batch scan. Return list transaksi yang dibuat (satu per barang).
+    ValidationError (berisi semua pesan) jika batch tidak valid; tidak ada yang tersimpan.
+    """
+    model, prefix, status, sign = DIRECTIONS[direction]
+    quantities = merge_lines(lines)
+    location = location or Location.get_default()
+
+    if direction == 'out' and not purpose:
+        raise ValidationError('Tujuan/keperluan wajib diisi untuk barang keluar.')
+
+    # Satu query untuk semua kode yang di-scan (kolom code unik = ber-index)
+    items = {item.code: item for item in Items.objects.filter(code__in=quantities, is_active=True)}
+    unknown = [code for code in quantities if code not in items]
+    if unknown:
+        raise ValidationError([f'Kode barang tidak dikenal/nonaktif: {code}' for code in unknown])
+
+    with transaction.atomic():
+        if direction == 'out':
+            # Kunci saldo lokasi semua barang sekaligus, lalu cek kecukupan stok
+            balances = dict(
+                ItemStock.objects.select_for_update().filter(
+                    location=location, item__in=items.values()
+                ).order_by('item_id').values_list('item_id', 'quantity')
+            )
+            shortages = [
+                f'Stok {items[code].code} di {location.name} tidak mencukupi '
+                f'(tersedia {balances.get(items[code].pk, 0)}, di-scan {quantity}).'
+                for code, quantity in quantities.items()
+                if balances.get(items[code].pk, 0) < quantity
+            ]
+            if shortages:
+                raise ValidationError(shortages)
+
+        numbers = _next_numbers(model, prefix, len(quantities))
+        user_field = 'received_by_id' if direction == 'in' else 'released_by_id'
+        extra = {'supplier': supplier} if direction == 'in' else {'purpose': purpose}
+        transactions = model.objects.bulk_create([
+            model(
+                transaction_number=number,
+                item=items[code],
+                location=location,
+                quantity=quantity,
+                transaction_date=transaction_date,
+                status=status,
+                notes=notes or None,
+                **{user_field: user_id},
+                **extra,
+            )
+            for number, (code, quantity) in zip(numbers, quantities.items())
+        ])
+
+        # bulk_create tidak memanggil save(): stok, counter & audit diterapkan sekali per barang
+        for code, quantity in quantities.items():
+            item = items[code]
+            item.adjust_stock(sign * quantity, location)
+            item.record_movement(direction, quantity, transaction_date)
+        if direction == 'in':
+            lots.create_incoming_lots(transactions)
+        else:
+            for trans in transactions:
+                lots.allocate_outgoing(trans)
+        for trans in transactions:
+            audit.record_created(trans, user_id=user_id)
+        outbox.emit_created('incoming' if direction == 'in' else 'outgoing', transactions)
+        if supplier is not None:
+            supplier.record_delivery(sum(quantities.values()), transaction_date, deliveries=len(quantities))
+
+    return transactions
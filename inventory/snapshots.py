@@ -0,0 +1,149 @@
+"""
+Snapshot stok akhir periode & query stok per tanggal (point-in-time).
+
+Stok per tanggal D = saldo snapshot terdekat sebelum/sama dengan D
++ barang masuk `received` - barang keluar `released` sesudah snapshot s.d. D.
+Dengan snapshot bulanan, mutasi yang dijumlahkan paling banyak ~1 bulan,
+berapapun panjang histori transaksinya.
+
+Transaksi yang sudah diarsip ikut dihitung bila rentang mutasi menyentuhnya.
+
+Catatan: snapshot dibekukan saat dibuat. Transaksi yang diinput mundur
+(tanggal sebelum snapshot) perlu diikuti `capture_stock_snapshots --rebuild`.
+"""
+import calendar
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import IntegerField, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import (
+    ArchivedIncomingTransaction, ArchivedOutgoingTransaction, IncomingTransaction, Items,
+    OutgoingTransaction, StockSnapshot,
+)
+
+
+def month_end(day):
+    """Return tanggal terakhir di bulan `day`"""
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def month_ends_between(start, end):
+    """Return daftar akhir bulan dari bulan `start` sampai `end` (inklusif)"""
+    result = []
+    current = month_end(start)
+    while current <= end:
+        result.append(current)
+        current = month_end(current + timedelta(days=1))
+    return result
+
+
+def nearest_snapshot_date(day, inclusive=True):
+    """Return tanggal snapshot terakhir sebelum (atau sama dengan) `day`; None jika belum ada"""
+    lookup = 'snapshot_date__lte' if inclusive else 'snapshot_date__lt'
+    return StockSnapshot.objects.filter(**{lookup: day}).aggregate(
+        latest=Max('snapshot_date')
+    )['latest']
+
+
+def latest_archived_date():
+    """Return tanggal transaksi terbaru yang sudah diarsip (None jika arsip kosong)"""
+    dates = [
+        ArchivedIncomingTransaction.objects.aggregate(latest=Max('transaction_date'))['latest'],
+        ArchivedOutgoingTransaction.objects.aggregate(latest=Max('transaction_date'))['latest'],
+    ]
+    dates = [d for d in dates if d is not None]
+    return max(dates) if dates else None
+
+
+def _movement_subquery(queryset, after, until):
+    """SUM(quantity) per item untuk transaksi dengan after < tanggal <= until"""
+    queryset = queryset.filter(item_id=OuterRef('pk'), transaction_date__lte=until)
+    if after is not None:
+        queryset = queryset.filter(transaction_date__gt=after)
+    totals = queryset.order_by().values('item_id').annotate(total=Sum('quantity')).values('total')
+    return Coalesce(Subquery(totals, output_field=IntegerField()), Value(0))
+
+
+def _annotate_balance(queryset, day, base_date):
+    """Anotasi saldo = snapshot `base_date` + mutasi (base_date, day]"""
+    if base_date is not None:
+        base = Coalesce(
+            Subquery(
+                StockSnapshot.objects.filter(
+                    item_id=OuterRef('pk'), snapshot_date=base_date
+                ).values('quantity')[:1],
+                output_field=IntegerField()
+            ),
+            Value(0)
+        )
+    else:
+        base = Value(0)
+
+    balance = (
+        base +
+        _movement_subquery(IncomingTransaction.objects.filter(status='received'), base_date, day) -
+        _movement_subquery(OutgoingTransaction.objects.filter(status='released'), base_date, day)
+    )
+
+    # Mutasi sesudah snapshot dasar bisa saja sudah dipindah ke tabel arsip
+    archived_until = latest_archived_date()
+    if archived_until is not None and (base_date is None or base_date < archived_until):
+        balance = (
+            balance +
+            _movement_subquery(ArchivedIncomingTransaction.objects.filter(status='received'), base_date, day) -
+            _movement_subquery(ArchivedOutgoingTransaction.objects.filter(status='released'), base_date, day)
+        )
+
+    return queryset.annotate(stock_as_of=balance)
+
+
+def stock_as_of_queryset(day, queryset=None):
+    """
+    Anotasi `stock_as_of` (saldo stok pada akhir tanggal `day`) ke queryset Items.
+    Satu query; subquery mutasi hanya menyentuh transaksi sejak snapshot terdekat.
+    """
+    if queryset is None:
+        queryset = Items.objects.all()
+    return _annotate_balance(queryset, day, nearest_snapshot_date(day))
+
+
+def capture_snapshot(snapshot_date, batch_size=2000):
+    """
+    Simpan saldo akhir semua barang pada `snapshot_date` (menimpa snapshot lama di tanggal itu).
+    Dihitung dari snapshot sebelumnya + mutasi sesudahnya, bukan dari snapshot tanggal yang sama.
+    Saldo nol tidak disimpan; barang tanpa baris snapshot dianggap bersaldo 0.
+    Return jumlah baris snapshot yang disimpan.
+    """
+    base_date = nearest_snapshot_date(snapshot_date, inclusive=False)
+    rows = _annotate_balance(Items.objects.all(), snapshot_date, base_date).order_by().values_list(
+        'items_id', 'stock_as_of'
+    )
+    snapshots = [
+        StockSnapshot(item_id=item_id, snapshot_date=snapshot_date, quantity=quantity)
+        for item_id, quantity in rows
+        if quantity
+    ]
+
+    with transaction.atomic():
+        # Hapus dulu agar barang yang saldonya kini nol tidak menyisakan baris lama
+        StockSnapshot.objects.filter(snapshot_date=snapshot_date).delete()
+        StockSnapshot.objects.bulk_create(snapshots, batch_size=batch_size)
+
+    return len(snapshots)
+
+
+def first_transaction_date():
+    """Return tanggal transaksi stok paling awal (None jika belum ada transaksi)"""
+    dates = [
+        model.objects.filter(status=status).aggregate(first=Min('transaction_date'))['first']
+        for model, status in [
+            (IncomingTransaction, 'received'),
+            (OutgoingTransaction, 'released'),
+            (ArchivedIncomingTransaction, 'received'),
+            (ArchivedOutgoingTransaction, 'released'),
+        ]
+    ]
+    dates = [d for d in dates if d is not None]
+    return min(dates) if dates else None
@@ -0,0 +1,41 @@
+/*
+ * Pemuat widget dashboard.
+ *
+ * Setiap elemen `[data-dashboard-widget]` berisi placeholder; isinya diambil
+ * dari `data-url` (endpoint dashboard_widget) secara paralel lalu diganti
+ * dengan fragmen HTML dari server. Setelah widget terpasang, event
+ * `dashboard:widget` dikirim pada `document` dengan detail
+ * {name, element} agar script halaman bisa memasang grafik dsb.
+ * Widget yang gagal dimuat menampilkan tombol coba lagi.
+ */
+(function () {
+    function loadWidget(container) {
+        fetch(container.dataset.url, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                return response.text();
+            })
+            .then(function (html) {
+                container.innerHTML = html;
+                document.dispatchEvent(new CustomEvent('dashboard:widget', {
+                    detail: { name: container.dataset.dashboardWidget, element: container }
+                }));
+            })
+            .catch(function (error) {
+                console.error(`Gagal memuat widget ${container.dataset.dashboardWidget}:`, error);
+                container.innerHTML = '<div class="card border-0 shadow-sm h-100"><div class="card-body text-center text-muted">'
+                    + '<i class="bi bi-exclamation-triangle me-1"></i>Gagal memuat widget '
+                    + '<button type="button" class="btn btn-sm btn-outline-secondary ms-2">'
+                    + '<i class="bi bi-arrow-clockwise"></i> Coba Lagi</button></div></div>';
+                container.querySelector('button').addEventListener('click', function () {
+                    loadWidget(container);
+                });
+            });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('[data-dashboard-widget]').forEach(loadWidget);
+    });
+})();
@@ -0,0 +1,147 @@
+/*
+ * Autocomplete barang untuk ItemLookupWidget.
+ *
+ * Setiap pemilihan barang memicu event `item-lookup:select` pada elemen
+ * .item-lookup dengan detail data barang (atau null saat dikosongkan),
+ * sehingga halaman bisa menampilkan info stok tanpa memuat seluruh katalog.
+ */
+(function () {
+    const DEBOUNCE_MS = 200;
+
+    function escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text;
+        return div.innerHTML;
+    }
+
+    function stockBadge(item) {
+        if (item.stock_status === 'out_of_stock') {
+            return '<span class="badge bg-danger">Habis</span>';
+        }
+        if (item.stock_status === 'low_stock') {
+            return '<span class="badge bg-warning text-dark">Menipis</span>';
+        }
+        return '<span class="badge bg-success">Normal</span>';
+    }
+
+    function initLookup(container) {
+        const valueInput = container.querySelector('.item-lookup-value');
+        const textInput = container.querySelector('.item-lookup-input');
+        const resultsBox = container.querySelector('.item-lookup-results');
+        const infoText = container.querySelector('.item-lookup-info');
+        const url = container.dataset.lookupUrl;
+        const limit = container.dataset.limit || 10;
+
+        let results = [];
+        let activeIndex = -1;
+        let timer = null;
+        let controller = null;
+
+        function hideResults() {
+            resultsBox.classList.add('d-none');
+            activeIndex = -1;
+        }
+
+        function select(item) {
+            valueInput.value = item ? item.id : '';
+            textInput.value = item ? item.label : '';
+            infoText.textContent = item ? `Stok: ${item.current_stock} ${item.unit_display}` : '';
+            hideResults();
+            container.dispatchEvent(new CustomEvent('item-lookup:select', { detail: item, bubbles: true }));
+        }
+
+        function render() {
+            if (!results.length) {
+                resultsBox.innerHTML = '<div class="list-group-item text-muted small">Barang tidak ditemukan</div>';
+            } else {
+                resultsBox.innerHTML = results.map((item, index) => `
+                    <button type="button" class="list-group-item list-group-item-action d-flex justify-content-between align-items-center${index === activeIndex ? ' active' : ''}" data-index="${index}">
+                        <span><strong>${escapeHtml(item.code)}</strong> - ${escapeHtml(item.name)}</span>
+                        <span class="small">${item.current_stock} ${escapeHtml(item.unit_display)} ${stockBadge(item)}</span>
+                    </button>
+                `).join('');
+            }
+            resultsBox.classList.remove('d-none');
+        }
+
+        function search(query) {
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+
+            const params = new URLSearchParams({ q: query, limit: limit });
+            fetch(`${url}?${params}`, { signal: controller.signal, headers: { 'Accept': 'application/json' } })
+                .then(response => response.ok ? response.json() : Promise.reject(response.status))
+                .then(data => {
+                    results = data.results;
+                    activeIndex = results.length ? 0 : -1;
+                    render();
+                })
+                .catch(error => {
+                    if (error.name !== 'AbortError') {
+                        console.error('Gagal memuat data barang:', error);
+                    }
+                });
+        }
+
+        textInput.addEventListener('input', function () {
+            // Teks diubah: pilihan lama tidak berlaku lagi sampai barang dipilih ulang
+            if (valueInput.value) {
+                valueInput.value = '';
+                infoText.textContent = '';
+                container.dispatchEvent(new CustomEvent('item-lookup:select', { detail: null, bubbles: true }));
+            }
+            clearTimeout(timer);
+            const query = this.value.trim();
+            if (!query) {
+                hideResults();
+                return;
+            }
+            timer = setTimeout(() => search(query), DEBOUNCE_MS);
+        });
+
+        textInput.addEventListener('keydown', function (event) {
+            if (resultsBox.classList.contains('d-none') || !results.length) {
+                return;
+            }
+            if (event.key === 'ArrowDown') {
+                event.preventDefault();
+                activeIndex = (activeIndex + 1) % results.length;
+                render();
+            } else if (event.key === 'ArrowUp') {
+                event.preventDefault();
+                activeIndex = (activeIndex - 1 + results.length) % results.length;
+                render();
+            } else if (event.key === 'Enter') {
+                event.preventDefault();
+                select(results[activeIndex]);
+            } else if (event.key === 'Escape') {
+                hideResults();
+            }
+        });
+
+        resultsBox.addEventListener('mousedown', function (event) {
+            const button = event.target.closest('[data-index]');
+            if (button) {
+                event.preventDefault();
+                select(results[parseInt(button.dataset.index)]);
+            }
+        });
+
+        textInput.addEventListener('blur', hideResults);
+
+        // Render ulang form (mis. error validasi): umumkan barang yang sudah terpilih
+        // (ditunda agar listener halaman yang dipasang saat DOMContentLoaded sudah terdaftar)
+        if (container.dataset.selected) {
+            const selected = JSON.parse(container.dataset.selected);
+            setTimeout(() => {
+                container.dispatchEvent(new CustomEvent('item-lookup:select', { detail: selected, bubbles: true }));
+            }, 0);
+        }
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('.item-lookup').forEach(initLookup);
+    });
+})();
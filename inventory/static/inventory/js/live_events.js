@@ -0,0 +1,28 @@
+/*
+ * Koneksi Server-Sent Events ke endpoint live_events.
+ *
+ * Setiap event dari server diteruskan sebagai CustomEvent pada `document`:
+ * `live:stock` (perubahan stok barang) dan `live:request` (permintaan baru /
+ * perubahan status), dengan detail = data event. Browser otomatis menyambung
+ * ulang (Last-Event-ID) saat koneksi ditutup server.
+ *
+ * Pemakaian: <script src=".../live_events.js" data-url="{% url 'live_events' %}"></script>
+ */
+(function () {
+    const url = document.currentScript.dataset.url;
+    if (!url || !window.EventSource) {
+        return;
+    }
+
+    const source = new EventSource(url);
+
+    ['stock', 'request'].forEach(function (type) {
+        source.addEventListener(type, function (message) {
+            document.dispatchEvent(new CustomEvent(`live:${type}`, { detail: JSON.parse(message.data) }));
+        });
+    });
+
+    window.addEventListener('beforeunload', function () {
+        source.close();
+    });
+})();
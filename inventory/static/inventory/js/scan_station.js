@@ -0,0 +1,256 @@
+/*
+ * Scan station: hasil scan dikumpulkan di browser lalu dikirim sekali sebagai batch.
+ *
+ * Kode yang sudah pernah di-scan di sesi ini tidak di-lookup ulang (cukup tambah
+ * jumlah), sehingga kecepatan input hanya dibatasi scanner. Batch disimpan di
+ * sessionStorage agar tidak hilang saat halaman tidak sengaja dimuat ulang.
+ *
+ * Setiap batch dikirim dengan header Idempotency-Key yang sama sampai berhasil
+ * atau isinya berubah, sehingga kirim ulang setelah koneksi putus tidak
+ * membuat transaksi ganda.
+ */
+(function () {
+    const STORAGE_KEY = 'simigd-scan-batch';
+
+    function escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text;
+        return div.innerHTML;
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        const station = document.getElementById('scan-station');
+        if (!station) {
+            return;
+        }
+        const lookupUrl = station.dataset.lookupUrl;
+        const submitUrl = station.dataset.submitUrl;
+        const maxLines = parseInt(station.dataset.maxLines) || 500;
+        const csrfToken = station.querySelector('[name=csrfmiddlewaretoken]').value;
+
+        const scanInput = document.getElementById('scan-input');
+        const linesBody = document.getElementById('scan-lines');
+        const feedback = document.getElementById('scan-feedback');
+        const summary = document.getElementById('scan-summary');
+        const locationSelect = document.getElementById('scan-location');
+        const submitButton = document.getElementById('scan-submit');
+
+        // kode -> {item, quantity}; Map menjaga urutan scan pertama
+        let lines = new Map();
+        let batchKey = null;
+
+        function direction() {
+            return station.querySelector('[name=direction]:checked').value;
+        }
+
+        function showFeedback(kind, messages) {
+            feedback.className = `alert alert-${kind}`;
+            feedback.innerHTML = [].concat(messages).map(escapeHtml).join('<br>');
+        }
+
+        function save() {
+            sessionStorage.setItem(STORAGE_KEY, JSON.stringify({
+                direction: direction(),
+                location: locationSelect.value,
+                lines: Array.from(lines.entries()),
+                key: batchKey,
+            }));
+        }
+
+        function restore() {
+            const stored = JSON.parse(sessionStorage.getItem(STORAGE_KEY) || 'null');
+            if (!stored) {
+                return;
+            }
+            const radio = station.querySelector(`[name=direction][value="${stored.direction}"]`);
+            if (radio) {
+                radio.checked = true;
+            }
+            if (stored.location) {
+                locationSelect.value = stored.location;
+            }
+            lines = new Map(stored.lines);
+            batchKey = stored.key || null;
+        }
+
+        function newKey() {
+            if (window.crypto && crypto.randomUUID) {
+                return crypto.randomUUID();
+            }
+            return Array.from({ length: 32 }, () => Math.floor(Math.random() * 16).toString(16)).join('');
+        }
+
+        // Isi batch berubah: kiriman berikutnya adalah batch baru
+        function changed() {
+            batchKey = null;
+            render();
+        }
+
+        function render() {
+            let units = 0;
+            const rows = [];
+            lines.forEach(function (line, code) {
+                units += line.quantity;
+                const stock = line.item.location_stock !== undefined ? line.item.location_stock : line.item.current_stock;
+                const short = direction() === 'out' && line.quantity > stock;
+                rows.push(`
+                    <tr class="${short ? 'table-danger' : ''}">
+                        <td><strong>${escapeHtml(code)}</strong></td>
+                        <td>${escapeHtml(line.item.name)}</td>
+                        <td class="text-end">${stock} ${escapeHtml(line.item.unit_display)}</td>
+                        <td><input type="number" min="1" class="form-control form-control-sm scan-quantity" data-code="${escapeHtml(code)}" value="${line.quantity}"></td>
+                        <td class="text-end"><button type="button" class="btn btn-sm btn-outline-danger scan-remove" data-code="${escapeHtml(code)}"><i class="bi bi-trash"></i></button></td>
+                    </tr>
+                `);
+            });
+            linesBody.innerHTML = rows.length
+                ? rows.reverse().join('')
+                : '<tr class="scan-empty"><td colspan="5" class="text-center text-muted">Belum ada barang yang di-scan.</td></tr>';
+            summary.textContent = `${lines.size} barang / ${units} unit`;
+            station.querySelectorAll('[data-direction]').forEach(function (element) {
+                element.classList.toggle('d-none', element.dataset.direction !== direction());
+            });
+            save();
+        }
+
+        function parseScan(value) {
+            const match = value.match(/^(\d+)\*(.+)$/);
+            return match ? { code: match[2].trim(), quantity: parseInt(match[1]) } : { code: value, quantity: 1 };
+        }
+
+        function addScan(value) {
+            const scan = parseScan(value);
+            if (!scan.code || scan.quantity <= 0) {
+                return;
+            }
+            const existing = lines.get(scan.code);
+            if (existing) {
+                existing.quantity += scan.quantity;
+                showFeedback('success', `${scan.code}: ${existing.quantity}`);
+                changed();
+                return;
+            }
+            if (lines.size >= maxLines) {
+                showFeedback('warning', `Maksimal ${maxLines} barang per batch. Simpan batch ini terlebih dahulu.`);
+                return;
+            }
+            const params = new URLSearchParams({ code: scan.code, location: locationSelect.value });
+            fetch(`${lookupUrl}?${params}`, { headers: { 'Accept': 'application/json' } })
+                .then(response => response.json().then(data => ({ ok: response.ok, data: data })))
+                .then(function (result) {
+                    if (!result.ok) {
+                        showFeedback('danger', result.data.error || `Kode ${scan.code} tidak ditemukan.`);
+                        return;
+                    }
+                    // Scan lain untuk kode yang sama bisa selesai lebih dulu
+                    const line = lines.get(scan.code);
+                    if (line) {
+                        line.quantity += scan.quantity;
+                    } else {
+                        lines.set(scan.code, { item: result.data.item, quantity: scan.quantity });
+                    }
+                    showFeedback('success', `${scan.code} - ${result.data.item.name}`);
+                    changed();
+                })
+                .catch(function () {
+                    showFeedback('danger', 'Gagal menghubungi server. Coba scan ulang.');
+                });
+        }
+
+        scanInput.addEventListener('keydown', function (event) {
+            if (event.key !== 'Enter') {
+                return;
+            }
+            event.preventDefault();
+            const value = this.value.trim();
+            this.value = '';
+            if (value) {
+                addScan(value);
+            }
+        });
+
+        linesBody.addEventListener('change', function (event) {
+            if (event.target.classList.contains('scan-quantity')) {
+                const line = lines.get(event.target.dataset.code);
+                const quantity = parseInt(event.target.value);
+                if (line && quantity > 0) {
+                    line.quantity = quantity;
+                }
+                changed();
+            }
+        });
+
+        linesBody.addEventListener('click', function (event) {
+            const button = event.target.closest('.scan-remove');
+            if (button) {
+                lines.delete(button.dataset.code);
+                changed();
+                scanInput.focus();
+            }
+        });
+
+        station.querySelectorAll('[name=direction]').forEach(function (radio) {
+            radio.addEventListener('change', changed);
+        });
+
+        locationSelect.addEventListener('change', function () {
+            // Saldo lokasi di tabel tidak lagi berlaku; cek final tetap di server
+            lines.forEach(line => delete line.item.location_stock);
+            changed();
+        });
+
+        document.getElementById('scan-clear').addEventListener('click', function () {
+            if (lines.size && !confirm('Kosongkan semua hasil scan?')) {
+                return;
+            }
+            lines.clear();
+            feedback.className = 'alert d-none';
+            changed();
+            scanInput.focus();
+        });
+
+        submitButton.addEventListener('click', function () {
+            if (!lines.size) {
+                showFeedback('warning', 'Belum ada barang yang di-scan.');
+                return;
+            }
+            submitButton.disabled = true;
+            batchKey = batchKey || newKey();
+            save();
+            fetch(submitUrl, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', 'X-CSRFToken': csrfToken, 'Idempotency-Key': batchKey },
+                body: JSON.stringify({
+                    direction: direction(),
+                    location: locationSelect.value,
+                    supplier: document.getElementById('scan-supplier').value,
+                    purpose: document.getElementById('scan-purpose').value,
+                    notes: document.getElementById('scan-notes').value,
+                    transaction_date: document.getElementById('scan-date').value,
+                    lines: Array.from(lines, ([code, line]) => ({ code: code, quantity: line.quantity })),
+                }),
+            })
+                .then(response => response.json().then(data => ({ ok: response.ok, data: data })))
+                .then(function (result) {
+                    if (!result.ok) {
+                        showFeedback('danger', result.data.errors || ['Batch gagal disimpan.']);
+                        return;
+                    }
+                    const numbers = result.data.transactions.map(trans => trans.number);
+                    showFeedback('success', `${numbers.length} transaksi tersimpan: ${numbers.join(', ')}`);
+                    lines.clear();
+                    changed();
+                })
+                .catch(function () {
+                    showFeedback('danger', 'Gagal menghubungi server. Hasil scan tetap tersimpan, coba kirim ulang.');
+                })
+                .finally(function () {
+                    submitButton.disabled = false;
+                    scanInput.focus();
+                });
+        });
+
+        restore();
+        render();
+    });
+})();
@@ -0,0 +1,231 @@
+"""
+Kartu stok per barang: mutasi masuk/keluar (termasuk arsip) dalam satu urutan
+dengan saldo berjalan.
+
+Mutasi digabung di SQL (UNION ALL dari keempat tabel transaksi) lalu saldo
+berjalan dihitung dengan window function `SUM(delta) OVER (ORDER BY ...)`.
+Window tidak dihitung dari awal histori: titik awalnya adalah snapshot stok
+terdekat sebelum halaman yang ditampilkan (atau saldo awal 0 bila belum ada
+snapshot), sehingga biaya per halaman hanya mutasi sejak snapshot tersebut.
+
+Halaman memakai keyset pagination (urutan terbaru dulu) dengan kunci
+(tanggal, created_at, jenis, id): tanpa OFFSET, halaman ke-1000 sama cepatnya
+dengan halaman pertama.
+"""
+import csv
+from datetime import date, datetime, timedelta
+
+from django.db import connection
+from django.db.models import BooleanField, CharField, F, OuterRef, Q, Subquery, Value
+from django.http import StreamingHttpResponse
+
+from .models import (
+    ArchivedIncomingTransaction, ArchivedOutgoingTransaction, IncomingTransaction,
+    OutgoingTransaction, StockSnapshot, Supplier, User,
+)
+from .snapshots import nearest_snapshot_date
+
+PAGE_SIZE = 50
+
+# Kolom hasil UNION (urutan sama untuk semua sumber)
+MOVEMENT_FIELDS = ['kind', 'row_id', 'movement_date', 'created', 'delta', 'number', 'party', 'user_name', 'archived']
+
+
+def _name_of(model, field):
+    """Subquery nama dari tabel arsip (tanpa foreign key)"""
+    return Subquery(model.objects.filter(pk=OuterRef(field)).values('name')[:1])
+
+
+def _sources(item_id):
+    """(kind, queryset beranotasi) untuk setiap tabel mutasi barang ini"""
+    incoming = {
+        'kind': Value('in', output_field=CharField()),
+        'row_id': F('incoming_id'),
+        'movement_date': F('transaction_date'),
+        'created': F('created_at'),
+        'delta': F('quantity'),
+        'number': F('transaction_number'),
+    }
+    outgoing = {
+        'kind': Value('out', output_field=CharField()),
+        'row_id': F('outgoing_id'),
+        'movement_date': F('transaction_date'),
+        'created': F('created_at'),
+        'delta': -F('quantity'),
+        'number': F('transaction_number'),
+        'party': F('purpose'),
+    }
+    return [
+        ('in', IncomingTransaction.objects.filter(item_id=item_id, status='received').annotate(
+            **incoming,
+            party=F('supplier__name'),
+            user_name=F('received_by__name'),
+            archived=Value(False, output_field=BooleanField()),
+        )),
+        ('in', ArchivedIncomingTransaction.objects.filter(item_id=item_id, status='received').annotate(
+            **incoming,
+            party=_name_of(Supplier, 'supplier_id'),
+            user_name=_name_of(User, 'received_by_id'),
+            archived=Value(True, output_field=BooleanField()),
+        )),
+        ('out', OutgoingTransaction.objects.filter(item_id=item_id, status='released').annotate(
+            **outgoing,
+            user_name=F('released_by__name'),
+            archived=Value(False, output_field=BooleanField()),
+        )),
+        ('out', ArchivedOutgoingTransaction.objects.filter(item_id=item_id, status='released').annotate(
+            **outgoing,
+            user_name=_name_of(User, 'released_by_id'),
+            archived=Value(True, output_field=BooleanField()),
+        )),
+    ]
+
+
+def _key_filter(kind, key, inclusive):
+    """
+    Kondisi (tanggal, created, jenis, id) < key (atau <= bila inclusive) untuk satu sumber.
+    Jenis konstan per sumber, jadi perbandingan jenis diselesaikan di Python.
+    """
+    day, created, key_kind, row_id = key
+    condition = Q(movement_date__lt=day) | Q(movement_date=day, created__lt=created)
+    if kind < key_kind:
+        condition |= Q(movement_date=day, created=created)
+    elif kind == key_kind:
+        lookup = 'row_id__lte' if inclusive else 'row_id__lt'
+        condition |= Q(movement_date=day, created=created, **{lookup: row_id})
+    return condition
+
+
+def movements(item_id, after_date=None, until=None, inclusive=True):
+    """
+    UNION ALL mutasi barang (field `MOVEMENT_FIELDS`).
+    `after_date`: hanya tanggal > after_date; `until`: hanya kunci sebelum (atau sama dengan) `until`.
+    """
+    parts = []
+    for kind, queryset in _sources(item_id):
+        if after_date is not None:
+            queryset = queryset.filter(transaction_date__gt=after_date)
+        if until is not None:
+            queryset = queryset.filter(_key_filter(kind, until, inclusive))
+        parts.append(queryset.order_by().values(*MOVEMENT_FIELDS))
+    return parts[0].union(*parts[1:], all=True)
+
+
+def _running_balances(item_id, after_date, until, opening):
+    """
+    Saldo berjalan (window function) untuk mutasi sesudah `after_date` s.d. kunci `until`.
+    Return {(kind, row_id): saldo}.
+    """
+    sql, params = movements(item_id, after_date, until).query.sql_with_params()
+    window_sql = (
+        'SELECT m.kind, m.row_id, SUM(m.delta) OVER ('
+        'ORDER BY m.movement_date, m.created, m.kind, m.row_id '
+        'ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) '
+        f'FROM ({sql}) m'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(window_sql, params)
+        return {(kind, row_id): opening + running for kind, row_id, running in cursor.fetchall()}
+
+
+def opening_balance(item_id, before):
+    """(tanggal snapshot, saldo) terdekat sebelum tanggal `before`; (None, 0) jika belum ada snapshot"""
+    anchor = nearest_snapshot_date(before - timedelta(days=1))
+    if anchor is None:
+        return None, 0
+    quantity = StockSnapshot.objects.filter(item_id=item_id, snapshot_date=anchor).values_list(
+        'quantity', flat=True
+    ).first()
+    # Saldo nol tidak disimpan sebagai baris snapshot
+    return anchor, quantity or 0
+
+
+def movement_key(row):
+    return (row['movement_date'], row['created'], row['kind'], row['row_id'])
+
+
+def encode_cursor(row):
+    return f"{row['movement_date'].isoformat()}|{row['created'].isoformat()}|{row['kind']}|{row['row_id']}"
+
+
+def decode_cursor(value):
+    """Kunci keyset dari query string; None jika kosong/tidak valid"""
+    try:
+        day, created, kind, row_id = value.split('|')
+        return date.fromisoformat(day), datetime.fromisoformat(created), kind, int(row_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def stock_card_page(item_id, before=None, page_size=PAGE_SIZE):
+    """
+    Satu halaman kartu stok (terbaru dulu) sebelum kunci `before`.
+    Return dict: rows (dengan `balance`), next_cursor, anchor_date.
+    """
+    query = movements(item_id, until=before, inclusive=False).order_by(
+        '-movement_date', '-created', '-kind', '-row_id'
+    )
+    rows = list(query[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if not rows:
+        return {'rows': [], 'next_cursor': None, 'anchor_date': None}
+
+    # Saldo dihitung dari snapshot sebelum baris tertua di halaman ini
+    anchor_date, opening = opening_balance(item_id, rows[-1]['movement_date'])
+    balances = _running_balances(item_id, anchor_date, movement_key(rows[0]), opening)
+    for row in rows:
+        row['balance'] = balances[(row['kind'], row['row_id'])]
+
+    return {
+        'rows': rows,
+        'next_cursor': encode_cursor(rows[-1]) if has_more else None,
+        'anchor_date': anchor_date,
+    }
+
+
+class _Echo:
+    """File-like untuk csv.writer pada StreamingHttpResponse"""
+
+    def write(self, value):
+        return value
+
+
+def stock_card_csv_response(item):
+    """
+    Seluruh kartu stok (terlama dulu) sebagai CSV streaming.
+    Satu query window dari awal histori; baris dibaca bertahap dari cursor.
+    """
+    sql, params = movements(item.pk).query.sql_with_params()
+    columns = ', '.join(f'm.{field}' for field in MOVEMENT_FIELDS)
+    window_sql = (
+        f'SELECT {columns}, SUM(m.delta) OVER ('
+        'ORDER BY m.movement_date, m.created, m.kind, m.row_id '
+        'ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS balance '
+        f'FROM ({sql}) m ORDER BY m.movement_date, m.created, m.kind, m.row_id'
+    )
+    def rows():
+        writer = csv.writer(_Echo())
+        yield '\ufeff'  # BOM agar Excel membaca UTF-8
+        yield writer.writerow(['Tanggal', 'No. Transaksi', 'Keterangan', 'Masuk', 'Keluar', 'Saldo', 'Oleh', 'Arsip'])
+        with connection.cursor() as cursor:
+            cursor.execute(window_sql, params)
+            while True:
+                batch = cursor.fetchmany(2000)
+                if not batch:
+                    break
+                for kind, _, day, _, delta, number, party, user_name, archived, balance in batch:
+                    if isinstance(day, str):
+                        # SQLite mengembalikan tanggal sebagai teks pada query mentah
+                        day = date.fromisoformat(day)
+                    yield writer.writerow([
+                        day.strftime('%d/%m/%Y'), number, party or '-',
+                        delta if kind == 'in' else '', -delta if kind == 'out' else '',
+                        balance, user_name or '-', 'Ya' if archived else '',
+                    ])
+
+    response = StreamingHttpResponse(rows(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = (
+        f'attachment; filename="kartu_stok_{item.code}_{datetime.now().strftime("%Y%m%d")}.csv"'
+    )
+    return response
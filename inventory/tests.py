@@ -1,3 +1,776 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django import forms
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+import pyarrow.parquet as pq
+
+from . import outbox
+from .abc_analysis import compute_item_analytics
+from .analytics_export import export_dataset
+from .archival import archive_transactions, claim_for_purge, purge_item
+from .dashboard import DASHBOARD_WIDGETS
+from .forms import CachedHelperMixin, ItemForm
+from .live_events import events_after
+from .models import (
+    ArchivedIncomingTransaction, AuditLog, DailyItemMovement, IdempotencyKey, IncomingTransaction, ItemAnalytics, Items,
+    ItemStock, LiveEvent, Location, OutboxConsumer, OutboxEntry, OutgoingTransaction, ReorderSuggestion, RequestItems, StockLot, StockTransfer, Supplier, User,
+)
+from .reconciliation import expected_stock_queryset
+
+
+class LotAllocationTests(TestCase):
+    """Alokasi lot FEFO & konsistensi sisa lot terhadap saldo ItemStock"""
+
+    def setUp(self):
+        self.user = User.objects.create(name='Gudang', username='gudang', password='12345678', role='pegawai_gudang')
+        self.supplier = Supplier.objects.create(name='Supplier', code='SUP')
+        self.item = Items.objects.create(code='BRG001', name='Barang', unit='kg')
+        self.location = Location.get_default()
+        self.today = date.today()
+
+    def receive(self, quantity, lot_number, expiry_days=None):
+        return IncomingTransaction.objects.create(
+            item=self.item, supplier=self.supplier, quantity=quantity, lot_number=lot_number,
+            expiry_date=self.today + timedelta(days=expiry_days) if expiry_days is not None else None,
+            transaction_date=self.today, status='received', received_by=self.user,
+        )
+
+    def release(self, quantity, location=None):
+        return OutgoingTransaction.objects.create(
+            item=self.item, location=location, quantity=quantity, transaction_date=self.today,
+            status='released', purpose='Produksi', released_by=self.user,
+        )
+
+    def remaining(self, lot_number, location=None):
+        return StockLot.objects.get(lot_number=lot_number, location=location or self.location).quantity_remaining
+
+    def allocations(self, outgoing):
+        return [(allocation.lot.lot_number, allocation.quantity) for allocation in outgoing.lot_allocations.select_related('lot')]
+
+    def assertLotsMatchStock(self):
+        lots = StockLot.objects.filter(item=self.item).aggregate(total=Sum('quantity_remaining'))['total'] or 0
+        stock = ItemStock.objects.filter(item=self.item).aggregate(total=Sum('quantity'))['total'] or 0
+        self.assertEqual(lots, stock)
+
+    def test_fefo_order_with_undated_lots_last(self):
+        self.receive(10, 'LA', expiry_days=40)
+        self.receive(10, 'LN')
+        self.receive(10, 'LB', expiry_days=5)
+
+        outgoing = self.release(25)
+
+        self.assertEqual(self.allocations(outgoing), [('LB', 10), ('LA', 10), ('LN', 5)])
+        self.assertEqual(self.remaining('LN'), 5)
+        self.assertLotsMatchStock()
+
+    def test_edit_and_cancel_outgoing_reallocates(self):
+        self.receive(10, 'LA', expiry_days=40)
+        self.receive(10, 'LB', expiry_days=5)
+        outgoing = self.release(15)
+
+        outgoing.quantity = 4
+        outgoing.save()
+        self.assertEqual(self.allocations(outgoing), [('LB', 4)])
+        self.assertEqual((self.remaining('LA'), self.remaining('LB')), (10, 6))
+
+        outgoing.status = 'cancelled'
+        outgoing.save()
+        self.assertEqual(self.allocations(outgoing), [])
+        self.assertEqual((self.remaining('LA'), self.remaining('LB')), (10, 10))
+        self.assertLotsMatchStock()
+
+    def test_shrunk_incoming_moves_allocations_to_other_lots(self):
+        self.receive(20, 'LA', expiry_days=40)
+        incoming = self.receive(10, 'LB', expiry_days=5)
+        outgoing = self.release(15)
+        self.assertEqual(self.allocations(outgoing), [('LB', 10), ('LA', 5)])
+
+        incoming.quantity = 2
+        incoming.save()
+        self.assertEqual(sorted(self.allocations(outgoing)), [('LA', 5), ('LA', 8), ('LB', 2)])
+        self.assertEqual((self.remaining('LA'), self.remaining('LB')), (7, 0))
+        self.assertLotsMatchStock()
+
+        # Barang keluar dibatalkan: lot LB hanya kembali sebesar barang masuknya
+        outgoing.status = 'cancelled'
+        outgoing.save()
+        self.assertEqual((self.remaining('LA'), self.remaining('LB')), (20, 2))
+        self.assertLotsMatchStock()
+
+    def test_cancelled_incoming_never_regains_quantity(self):
+        self.receive(20, 'LA', expiry_days=40)
+        incoming = self.receive(10, 'LB', expiry_days=5)
+        outgoing = self.release(15)
+
+        incoming.quantity = 2
+        incoming.save()
+        incoming.refresh_from_db()
+        incoming.status = 'cancelled'
+        incoming.save()
+        self.assertFalse(StockLot.objects.filter(lot_number='LB').exists())
+        self.assertEqual(self.allocations(outgoing), [('LA', 5), ('LA', 8), ('LA', 2)])
+        self.assertLotsMatchStock()
+
+        # Edit lalu batalkan barang keluar: lot yang dibatalkan tidak mendapat sisa "hantu"
+        outgoing.quantity = 3
+        outgoing.save()
+        outgoing.status = 'cancelled'
+        outgoing.save()
+        self.assertEqual(self.remaining('LA'), 20)
+        self.assertLotsMatchStock()
+
+    def test_shortfall_without_other_lots_is_left_unallocated(self):
+        incoming = self.receive(10, 'LA', expiry_days=5)
+        outgoing = self.release(8)
+
+        incoming.quantity = 3
+        incoming.save()
+        self.assertEqual(self.allocations(outgoing), [('LA', 3)])
+        self.assertEqual(self.remaining('LA'), 0)
+
+        outgoing.status = 'cancelled'
+        outgoing.save()
+        self.assertEqual(self.remaining('LA'), 3)
+        self.assertLotsMatchStock()
+
+    def test_transfer_moves_lots_and_counts_as_consumption(self):
+        incoming = self.receive(10, 'LA', expiry_days=5)
+        rack = Location.objects.create(code='RAK2', name='Rak 2')
+
+        StockTransfer.objects.create(
+            item=self.item, from_location=self.location, to_location=rack, quantity=6,
+            transaction_date=self.today, created_by=self.user,
+        )
+        self.assertEqual((self.remaining('LA'), self.remaining('LA', rack)), (4, 6))
+
+        # Barang yang sudah ditransfer tetap terpakai walau barang masuknya dikurangi
+        incoming.quantity = 8
+        incoming.save()
+        self.assertEqual(self.remaining('LA'), 2)
+        self.assertLotsMatchStock()
+
+
+class LocationStockTests(TestCase):
+    """Saldo per lokasi & transfer antar lokasi"""
+
+    def setUp(self):
+        self.user = User.objects.create(name='Gudang', username='gudang', password='12345678', role='pegawai_gudang')
+        self.item = Items.objects.create(code='BRG001', name='Barang', unit='kg')
+        self.main = Location.get_default()
+        self.rack = Location.objects.create(code='RAK2', name='Rak 2')
+        self.today = date.today()
+
+    def transfer(self, quantity, source, target):
+        return StockTransfer.objects.create(
+            item=self.item, from_location=source, to_location=target, quantity=quantity,
+            transaction_date=self.today, created_by=self.user,
+        )
+
+    def balances(self):
+        return ItemStock.quantity_at(self.item, self.main), ItemStock.quantity_at(self.item, self.rack)
+
+    def test_transactions_book_at_their_location(self):
+        IncomingTransaction.objects.create(
+            item=self.item, location=self.rack, quantity=10, transaction_date=self.today,
+            status='received', received_by=self.user,
+        )
+        OutgoingTransaction.objects.create(
+            item=self.item, location=self.rack, quantity=4, transaction_date=self.today,
+            status='released', purpose='Produksi', released_by=self.user,
+        )
+        self.item.refresh_from_db()
+        self.assertEqual(self.balances(), (0, 6))
+        self.assertEqual(self.item.current_stock, 6)
+
+    def test_transfer_moves_balance_without_changing_total(self):
+        self.item.adjust_stock(10, self.main)
+
+        self.transfer(7, self.main, self.rack)
+        self.transfer(2, self.rack, self.main)
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.balances(), (5, 5))
+        self.assertEqual(self.item.current_stock, 10)
+
+    def test_transfer_over_source_balance_is_rejected(self):
+        self.item.adjust_stock(10, self.rack)
+
+        with self.assertRaisesMessage(ValidationError, 'tidak mencukupi'):
+            self.transfer(1, self.main, self.rack)
+        self.assertEqual(self.balances(), (0, 10))
+        self.assertFalse(StockTransfer.objects.exists())
+
+    def test_transfer_list_ignores_non_numeric_location(self):
+        self.client.post(reverse('user_login'), {'username': 'gudang', 'password': '12345678'})
+        self.item.adjust_stock(10, self.main)
+        self.transfer(3, self.main, self.rack)
+
+        response = self.client.get(reverse('stock_transfer_list'), {'location': 'abc'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['transfers']), 1)
+        response = self.client.get(reverse('stock_transfer_list'), {'location': self.rack.pk})
+        self.assertEqual(len(response.context['transfers']), 1)
+
+
+class ArchivalTests(TestCase):
+    """Arsip transaksi lama (carry-forward) & purge barang yang di-retire"""
+
+    def setUp(self):
+        self.user = User.objects.create(name='Gudang', username='gudang', password='12345678', role='pegawai_gudang')
+        self.supplier = Supplier.objects.create(name='Supplier', code='SUP')
+        self.item = Items.objects.create(code='BRG001', name='Barang', unit='kg')
+        self.other = Items.objects.create(code='BRG002', name='Barang Lain', unit='kg')
+        self.today = date.today()
+
+    def receive(self, item, quantity, days_ago=0):
+        return IncomingTransaction.objects.create(
+            item=item, supplier=self.supplier, quantity=quantity, status='received', received_by=self.user,
+            transaction_date=self.today - timedelta(days=days_ago),
+        )
+
+    def test_archive_moves_old_rows_and_keeps_expected_stock(self):
+        self.receive(self.item, 10, days_ago=400)
+        self.receive(self.item, 5)
+        OutgoingTransaction.objects.create(
+            item=self.item, quantity=3, status='released', purpose='Produksi', released_by=self.user,
+            transaction_date=self.today - timedelta(days=400),
+        )
+
+        result = archive_transactions(self.today - timedelta(days=365), batch_size=1)
+
+        self.assertEqual(result, {'IncomingTransaction': 1, 'OutgoingTransaction': 1})
+        self.assertEqual(ArchivedIncomingTransaction.objects.get().quantity, 10)
+        self.assertEqual(expected_stock_queryset().get(pk=self.item.pk).expected_stock, 12)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.archived_balance, self.item.current_stock), (7, 12))
+
+    def test_purge_deletes_history_and_recomputes_supplier_counters(self):
+        self.receive(self.item, 10, days_ago=400)
+        archive_transactions(self.today - timedelta(days=365))
+        self.receive(self.item, 4)
+        self.receive(self.other, 6)
+        self.item.refresh_from_db()
+        self.item.retire()
+
+        self.assertTrue(purge_item(self.item.pk, batch_size=1))
+
+        self.assertFalse(Items.objects.filter(pk=self.item.pk).exists())
+        self.assertFalse(IncomingTransaction.objects.filter(item_id=self.item.pk).exists())
+        self.assertFalse(ArchivedIncomingTransaction.objects.exists())
+        self.supplier.refresh_from_db()
+        self.assertEqual((self.supplier.total_deliveries, self.supplier.total_quantity), (1, 6))
+
+    def test_reactivated_item_is_not_purged(self):
+        self.receive(self.item, 4)
+        self.item.refresh_from_db()
+        self.item.retire()
+        Items.objects.filter(pk=self.item.pk).update(is_active=True, retired_at=None)
+
+        self.assertFalse(purge_item(self.item.pk))
+        self.assertEqual(IncomingTransaction.objects.filter(item=self.item).count(), 1)
+
+    def test_claimed_item_cannot_be_reactivated(self):
+        self.item.retire()
+        claim_for_purge(self.item.pk)
+        item = Items.objects.get(pk=self.item.pk)
+
+        form = ItemForm(instance=item, data={
+            'code': item.code, 'name': item.name, 'unit': item.unit, 'minimum_stock': 0,
+            'is_active': 'on', 'version': item.version,
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('is_active', form.errors)
+
+
+class AbcAnalysisTests(TestCase):
+    """Refresh harian inkremental harus sama dengan bangun ulang penuh (--full)"""
+
+    WINDOWS = [7, 30]
+
+    def setUp(self):
+        self.user = User.objects.create(name='Gudang', username='gudang', password='12345678', role='pegawai_gudang')
+        self.first = Items.objects.create(code='BRG001', name='Barang 1', unit='kg')
+        self.second = Items.objects.create(code='BRG002', name='Barang 2', unit='kg')
+        self.today = date.today()
+        for item in (self.first, self.second):
+            self.receive(item, 50, days_ago=20)
+        self.incoming = self.receive(self.first, 10, days_ago=10)
+        self.outgoing = self.release(self.first, 8, days_ago=4)
+        self.release(self.second, 5, days_ago=2)
+        compute_item_analytics(self.WINDOWS, full=True)
+
+    def receive(self, item, quantity, days_ago):
+        return IncomingTransaction.objects.create(
+            item=item, quantity=quantity, status='received', received_by=self.user,
+            transaction_date=self.today - timedelta(days=days_ago),
+        )
+
+    def release(self, item, quantity, days_ago):
+        return OutgoingTransaction.objects.create(
+            item=item, quantity=quantity, status='released', purpose='Produksi', released_by=self.user,
+            transaction_date=self.today - timedelta(days=days_ago),
+        )
+
+    def snapshot(self):
+        movements = list(DailyItemMovement.objects.order_by('item_id', 'day').values_list(
+            'item_id', 'day', 'quantity_in', 'quantity_out'
+        ))
+        analytics = list(ItemAnalytics.objects.order_by('item_id', 'window_days').values(
+            'item_id', 'window_days', 'consumption', 'receipts', 'abc_class', 'average_stock',
+            'turnover', 'days_of_cover', 'is_dead_stock',
+        ))
+        return movements, analytics
+
+    def assertIncrementalMatchesFull(self):
+        compute_item_analytics(self.WINDOWS)
+        incremental = self.snapshot()
+        compute_item_analytics(self.WINDOWS, full=True)
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_quantity_edit(self):
+        self.outgoing.quantity = 3
+        self.outgoing.save()
+        self.receive(self.second, 4, days_ago=1)
+        self.assertIncrementalMatchesFull()
+
+    def test_date_change(self):
+        self.incoming.transaction_date = self.today - timedelta(days=3)
+        self.incoming.save()
+        self.outgoing.transaction_date = self.today - timedelta(days=15)
+        self.outgoing.save()
+        self.assertIncrementalMatchesFull()
+
+    def test_item_reassignment(self):
+        # Barang lama diketahui dari AuditLog, yang ditulis setelah commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.outgoing.item = self.second
+            self.outgoing.save()
+        self.assertIncrementalMatchesFull()
+        self.assertFalse(DailyItemMovement.objects.filter(
+            item=self.first, day=self.today - timedelta(days=4)
+        ).exists())
+
+
+class AnalyticsExportTests(TestCase):
+    """Export Parquet inkremental: hanya partisi yang berubah ditulis ulang"""
+
+    def setUp(self):
+        self.user = User.objects.create(name='Gudang', username='gudang', password='12345678', role='pegawai_gudang')
+        self.item = Items.objects.create(code='BRG001', name='Barang', unit='kg')
+        self.today = date.today()
+        self.last_month = self.today.replace(day=1) - timedelta(days=1)
+        self.output = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.output, ignore_errors=True)
+
+    def export(self, name):
+        return export_dataset(name, self.output)
+
+    def partition_ids(self, name):
+        return {
+            path.parent.name.removeprefix('month='): pq.read_table(path).column(0).to_pylist()
+            for path in (self.output / name).glob('month=*/data.parquet')
+        }
+
+    def test_stock_movement_does_not_rewrite_items(self):
+        self.assertEqual(self.export('items')['mode'], 'penuh')
+
+        self.item.adjust_stock(5)
+        self.assertEqual(self.export('items'), {'dataset': 'items', 'mode': 'inkremental', 'rows': 0, 'partitions': 0})
+
+        self.item.refresh_from_db()
+        self.item.name = 'Barang Baru'
+        self.item.save()
+        self.assertEqual(self.export('items')['rows'], 1)
+        path = next((self.output / 'items').glob('month=*/data.parquet'))
+        self.assertEqual(pq.read_table(path).column('name').to_pylist(), ['Barang Baru'])
+
+    def test_row_moving_month_leaves_old_partition(self):
+        old = IncomingTransaction.objects.create(
+            item=self.item, quantity=3, status='received', received_by=self.user, transaction_date=self.last_month,
+        )
+        current = IncomingTransaction.objects.create(
+            item=self.item, quantity=4, status='received', received_by=self.user, transaction_date=self.today,
+        )
+        self.export('incoming')
+        self.assertEqual(self.partition_ids('incoming'), {
+            f'{self.last_month:%Y-%m}': [old.pk], f'{self.today:%Y-%m}': [current.pk],
+        })
+
+        old.refresh_from_db()
+        old.transaction_date = self.today
+        old.save()
+        result = self.export('incoming')
+
+        self.assertEqual((result['rows'], result['partitions']), (1, 2))
+        self.assertEqual(self.partition_ids('incoming'), {f'{self.today:%Y-%m}': sorted([old.pk, current.pk])})
+
+
+class OptimisticLockingTests(TestCase):
+    """Form edit wajib membawa versi; tanpa versi diperlakukan sebagai konflik"""
+
+    def setUp(self):
+        User.objects.create(name='Gudang', username='gudang', password='12345678', role='pegawai_gudang')
+        self.client.post(reverse('user_login'), {'username': 'gudang', 'password': '12345678'})
+        self.item = Items.objects.create(code='BRG001', name='Barang', unit='kg')
+        self.data = {'code': 'BRG001', 'name': 'Barang Baru', 'unit': 'kg', 'minimum_stock': 0, 'is_active': 'on'}
+
+    def test_edit_without_version_is_a_conflict(self):
+        response = self.client.post(reverse('item_update', args=[self.item.pk]), self.data)
+        self.assertEqual(response.status_code, 409)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.name, 'Barang')
+
+    def test_edit_with_current_version_saves(self):
+        response = self.client.post(reverse('item_update', args=[self.item.pk]), {**self.data, 'version': 1})
+        self.assertEqual(response.status_code, 302)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.name, 'Barang Baru')
+
+    def test_create_without_version_uses_default(self):
+        response = self.client.post(reverse('item_create'), {**self.data, 'code': 'BRG002'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Items.objects.get(code='BRG002').version, 1)
+
+
+class ReorderRecommendationTests(TestCase):
+    """Menerapkan saran reorder terpilih ke stok minimum"""
+
+    def setUp(self):
+        User.objects.create(name='Gudang', username='gudang', password='12345678', role='pegawai_gudang')
+        self.client.post(reverse('user_login'), {'username': 'gudang', 'password': '12345678'})
+        self.item = Items.objects.create(code='BRG001', name='Barang', unit='kg', minimum_stock=5)
+        self.suggestion = ReorderSuggestion.objects.create(
+            item=self.item, reorder_point=12, history_days=90, window_days=30, lead_time_days=7,
+            service_level=0.95, computed_at=timezone.now(),
+        )
+
+    def test_non_numeric_selection_is_ignored(self):
+        url = reverse('reorder_recommendation_list')
+        response = self.client.post(url, {'selected': ['abc']})
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.minimum_stock, 5)
+
+        self.client.post(url, {'selected': ['abc', str(self.suggestion.pk)]})
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.minimum_stock, 12)
+
+
+class ItemLookupTests(TestCase):
+    """Autocomplete barang: prefix kode/nama tanpa membedakan huruf besar/kecil"""
+
+    def setUp(self):
+        User.objects.create(name='Gudang', username='gudang', password='12345678', role='pegawai_gudang')
+        self.client.post(reverse('user_login'), {'username': 'gudang', 'password': '12345678'})
+        Items.objects.create(code='KBL1', name='Kabel Merah', unit='kg')
+        Items.objects.create(code='XX1', name='kabel biru', unit='kg')
+        Items.objects.create(code='KB', name='Kotak', unit='kg')
+        Items.objects.create(code='KB2', name='Kabel Lama', unit='kg', is_active=False)
+
+    def lookup(self, query):
+        response = self.client.get(reverse('item_lookup'), {'q': query})
+        return [item['code'] for item in response.json()['results']]
+
+    def test_exact_code_then_code_prefix_then_name_prefix(self):
+        self.assertEqual(self.lookup('kb'), ['KB', 'KBL1'])
+        self.assertEqual(self.lookup('KABEL'), ['KBL1', 'XX1'])
+
+    def test_like_wildcards_are_literal(self):
+        self.assertEqual(self.lookup('%'), [])
+        self.assertEqual(self.lookup('_b'), [])
+
+
+class ScanStationTests(TestCase):
+    """Validasi payload batch scan"""
+
+    def setUp(self):
+        User.objects.create(name='Gudang', username='gudang', password='12345678', role='pegawai_gudang')
+        self.client.post(reverse('user_login'), {'username': 'gudang', 'password': '12345678'})
+        Items.objects.create(code='BRG001', name='Barang', unit='kg')
+        self.payload = {
+            'direction': 'in', 'transaction_date': str(date.today()),
+            'lines': [{'code': 'BRG001', 'quantity': 2}],
+        }
+
+    def post(self, **changes):
+        return self.client.post(reverse('scan_station'), {**self.payload, **changes}, content_type='application/json')
+
+    def test_non_numeric_ids_are_rejected(self):
+        for key, message in [('location', 'Lokasi tidak valid.'), ('supplier', 'Supplier tidak valid.')]:
+            for value in ['abc', True, [1], '1.5']:
+                response = self.post(**{key: value})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'errors': [message]})
+        self.assertFalse(IncomingTransaction.objects.exists())
+
+    def test_unknown_or_inactive_ids_are_rejected(self):
+        inactive = Location.objects.create(code='RAK9', name='Rak 9', is_active=False)
+        retired = Supplier.objects.create(name='Lama', code='OLD', is_active=False)
+        cases = [
+            ({'location': 99999}, 'Lokasi tidak valid.'),
+            ({'location': inactive.pk}, 'Lokasi tidak valid.'),
+            ({'supplier': 4242}, 'Supplier tidak valid.'),
+            ({'supplier': retired.pk}, 'Supplier tidak valid.'),
+        ]
+        for changes, message in cases:
+            response = self.post(**changes)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'errors': [message]})
+        self.assertFalse(IncomingTransaction.objects.exists())
+
+    def test_numeric_ids_are_accepted(self):
+        location = Location.get_default()
+        supplier = Supplier.objects.create(name='Supplier', code='SUP')
+        response = self.post(location=str(location.pk), supplier=supplier.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(IncomingTransaction.objects.get().supplier, supplier)
+
+
+class IdempotencyTests(TestCase):
+    """Kiriman ulang dengan idempotency key: replay, salah pakai, sedang diproses, gagal"""
+
+    def setUp(self):
+        User.objects.create(name='Gudang', username='gudang', password='12345678', role='pegawai_gudang')
+        User.objects.create(name='Gudang 2', username='gudang2', password='12345678', role='pegawai_gudang')
+        self.login('gudang')
+        self.item = Items.objects.create(code='BRG001', name='Barang', unit='kg')
+        self.payload = {
+            'direction': 'in', 'transaction_date': str(date.today()),
+            'lines': [{'code': 'BRG001', 'quantity': 2}],
+        }
+
+    def login(self, username):
+        self.client.post(reverse('user_login'), {'username': username, 'password': '12345678'})
+
+    def scan(self, key):
+        return self.client.post(
+            reverse('scan_station'), self.payload, content_type='application/json', headers={'Idempotency-Key': key}
+        )
+
+    def test_retry_replays_stored_response(self):
+        first = self.scan('kunci-0001')
+        second = self.scan('kunci-0001')
+        self.assertEqual((first.status_code, second.status_code), (200, 200))
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(IncomingTransaction.objects.count(), 1)
+
+    def test_key_reused_by_other_user_is_rejected(self):
+        self.scan('kunci-0002')
+        self.login('gudang2')
+        response = self.scan('kunci-0002')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(IncomingTransaction.objects.count(), 1)
+
+    def test_key_in_flight_is_a_conflict(self):
+        IdempotencyKey.objects.create(
+            key='kunci-0003', scope='scan_station', expires_at=timezone.now() + timedelta(hours=1)
+        )
+        response = self.scan('kunci-0003')
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(IncomingTransaction.objects.exists())
+
+    def test_failed_approval_is_not_stored_and_can_be_retried(self):
+        request = RequestItems.objects.create(
+            request_number='REQ0001', item=self.item, quantity=5, request_date=date.today(),
+            needed_date=date.today(), purpose='Produksi',
+        )
+        url = reverse('request_approve', args=[request.pk])
+        data = {'status': 'approved', 'idempotency_key': 'kunci-0004'}
+
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'tidak mencukupi')
+        self.assertFalse(IdempotencyKey.objects.filter(key='kunci-0004').exists())
+
+        self.item.adjust_stock(10)
+        response = self.client.post(url, data)
+        self.assertRedirects(response, reverse('request_list'), fetch_redirect_response=False)
+        request.refresh_from_db()
+        self.assertEqual(request.status, 'approved')
+        self.assertEqual(OutgoingTransaction.objects.get().quantity, 5)
+
+
+class AuditTrailTests(TransactionTestCase):
+    """Audit trail: hanya perubahan yang di-commit, satu INSERT per request, field sensitif tidak dicatat"""
+
+    def setUp(self):
+        self.user = User.objects.create(name='Gudang', username='gudang', password='12345678', role='pegawai_gudang')
+        self.item = Items.objects.create(code='BRG001', name='Barang', unit='kg')
+        AuditLog.objects.all().delete()
+
+    def test_rolled_back_save_is_not_logged(self):
+        item = Items.objects.get(pk=self.item.pk)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            item.name = 'Batal'
+            item.save()
+            raise RuntimeError
+        self.assertFalse(AuditLog.objects.exists())
+
+    def test_request_writes_entries_with_one_insert(self):
+        Items.objects.create(code='BRG002', name='Barang 2', unit='kg')
+        AuditLog.objects.all().delete()
+        self.client.post(reverse('user_login'), {'username': 'gudang', 'password': '12345678'})
+        payload = {
+            'direction': 'in', 'transaction_date': str(date.today()),
+            'lines': [{'code': 'BRG001', 'quantity': 2}, {'code': 'BRG002', 'quantity': 3}],
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('scan_station'), payload, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT INTO "inventory_auditlog"')]
+        self.assertEqual(len(inserts), 1)
+        entries = AuditLog.objects.filter(object_type='incomingtransaction')
+        self.assertEqual(entries.count(), 2)
+        self.assertEqual({entry.user_id for entry in entries}, {self.user.pk})
+
+    def test_password_is_never_logged(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.name = 'Gudang Baru'
+        user.password = 'rahasia-baru'
+        user.save()
+
+        self.assertEqual(AuditLog.objects.get(object_type='user').changes, {'name': ['Gudang', 'Gudang Baru']})
+        User.objects.create(name='Baru', username='baru', password='abcdefgh', role='pegawai_produksi')
+        self.assertTrue(AuditLog.objects.filter(object_type='user', action='create').exists())
+        self.assertFalse(any('password' in entry.changes for entry in AuditLog.objects.all()))
+
+    def test_item_stock_fields_are_never_logged(self):
+        self.item.adjust_stock(5)
+        item = Items.objects.get(pk=self.item.pk)
+        item.name = 'Barang Baru'
+        item.save()
+
+        changes = [entry.changes for entry in AuditLog.objects.filter(object_type='items')]
+        self.assertEqual(changes, [{'name': ['Barang', 'Barang Baru']}])
+        created = Items.objects.create(code='BRG003', name='Barang 3', unit='kg', current_stock=7)
+        entry = AuditLog.objects.get(object_type='items', object_id=created.pk)
+        self.assertFalse(set(entry.changes) & set(Items.ATOMIC_FIELDS))
+
+
+class DashboardWidgetTests(TestCase):
+    """Widget dashboard: loader bersama hanya dijalankan sekali"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(name='Direktur', username='direktur', password='12345678', role='direktur')
+        Items.objects.create(code='BRG001', name='Barang', unit='kg')
+
+    def test_dashboard_shell_renders(self):
+        self.client.post(reverse('user_login'), {'username': 'direktur', 'password': '12345678'})
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'data-dashboard-widget="stock_distribution"')
+
+    def test_stock_summary_is_shared_between_widgets(self):
+        DASHBOARD_WIDGETS['stock'].render(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            DASHBOARD_WIDGETS['stock_distribution'].render(self.user)
+        self.assertFalse([query for query in queries.captured_queries if 'inventory_items' in query['sql']])
+
+
+class CachedHelperTests(TestCase):
+    """FormHelper crispy per class form"""
+
+    def test_form_without_layout_is_improperly_configured(self):
+        class NoLayoutForm(CachedHelperMixin, forms.Form):
+            name = forms.CharField()
+
+        with self.assertRaisesMessage(ImproperlyConfigured, 'NoLayoutForm'):
+            NoLayoutForm().helper
+
+
+class LiveEventPollingTests(TestCase):
+    """Polling event live tidak melompati celah id yang masih baru"""
+
+    def test_cursor_holds_at_recent_gap(self):
+        events = [LiveEvent.objects.create(event_type='stock', payload={'n': number}) for number in range(3)]
+        first, _, last = (event.event_id for event in events)
+        events[1].delete()
+
+        self.assertEqual([event['id'] for event in events_after(first - 1)], [first])
+        LiveEvent.objects.filter(event_id=last).update(created_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual([event['id'] for event in events_after(first)], [last])
+
+
+class OutboxTests(TestCase):
+    """Change feed outbox: fetch, acknowledge, pemadatan & registrasi konsumen"""
+
+    def setUp(self):
+        OutboxEntry.objects.all().delete()
+        self.entries = [
+            OutboxEntry.objects.create(topic=topic, object_id=number, action='create', payload={})
+            for number, topic in enumerate(['item', 'stock', 'item', 'request'], start=1)
+        ]
+        self.ids = [entry.entry_id for entry in self.entries]
+
+    def login(self):
+        User.objects.create(name='Admin', username='admin', password='12345678', role='admin')
+        self.client.post(reverse('user_login'), {'username': 'admin', 'password': '12345678'})
+
+    def test_fetch_pages_and_filters_topics(self):
+        before = self.ids[0] - 1
+        entries, cursor, has_more = outbox.fetch(before, limit=3, topics=['item'])
+        self.assertEqual([entry.entry_id for entry in entries], [self.ids[0], self.ids[2]])
+        self.assertEqual((cursor, has_more), (self.ids[2], True))
+
+        entries, cursor, has_more = outbox.fetch(cursor, limit=3)
+        self.assertEqual([entry.entry_id for entry in entries], [self.ids[3]])
+        self.assertEqual((cursor, has_more), (self.ids[3], False))
+
+    def test_fetch_holds_cursor_at_recent_gap(self):
+        self.entries[1].delete()
+        entries, cursor, _ = outbox.fetch(self.ids[0] - 1)
+        self.assertEqual((len(entries), cursor), (1, self.ids[0]))
+
+        OutboxEntry.objects.filter(entry_id=self.ids[2]).update(created_at=timezone.now() - timedelta(hours=1))
+        entries, cursor, _ = outbox.fetch(cursor)
+        self.assertEqual(cursor, self.ids[3])
+
+    def test_acknowledge_only_moves_forward_and_compacts(self):
+        OutboxConsumer.objects.create(name='lambat', position=self.ids[0])
+
+        self.assertEqual(outbox.acknowledge('erp', self.ids[2]), self.ids[2])
+        self.assertEqual(outbox.acknowledge('erp', self.ids[1]), self.ids[2])
+        self.assertEqual(outbox.acknowledge('erp', self.ids[3] + 100), self.ids[3])
+        # Konsumen paling tertinggal menahan pemadatan
+        self.assertEqual(OutboxEntry.objects.count(), 3)
+
+        outbox.acknowledge('lambat', self.ids[2])
+        self.assertEqual(list(OutboxEntry.objects.values_list('entry_id', flat=True)), [self.ids[3]])
+
+    def test_feed_read_does_not_register_consumer(self):
+        self.login()
+        response = self.client.get(reverse('outbox_feed'), {'consumer': 'salah-ketik'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['entries']), 4)
+        self.assertFalse(OutboxConsumer.objects.exists())
+
+        response = self.client.get(reverse('outbox_feed'), {'consumer': 'x' * 101})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(reverse('outbox_ack'), {'consumer': 'erp', 'cursor': self.ids[1]})
+        self.assertEqual(response.json(), {'consumer': 'erp', 'position': self.ids[1]})
+        self.assertEqual(outbox.consumer_position('erp'), self.ids[1])
+
+    def test_remove_consumer_releases_compaction(self):
+        outbox.consumer_position('lama', register=True)
+        outbox.acknowledge('erp', self.ids[3])
+        self.assertEqual(OutboxEntry.objects.count(), 4)
+
+        call_command('consume_outbox', consumer='lama', remove=True, stdout=StringIO())
+        self.assertFalse(OutboxConsumer.objects.filter(name='lama').exists())
+        self.assertFalse(OutboxEntry.objects.exists())
@@ -1,6 +1,12 @@
 from django.urls import path
 from .views import (
     DashboardView,
+    DashboardChartDataView,
+    DashboardWidgetView,
+    ItemLookupView,
+    LiveEventStreamView,
+    OutboxFeedView,
+    OutboxAckView,
     UserListView,
     UserCreateView,
     UserUpdateView,
@@ -32,6 +38,8 @@ from .inventory_views import (
     ItemUpdateView,
     ItemDetailView,
     ItemDeleteView,
+    ItemStockCardView,
+    ItemStockCardExportView,
     
     # Incoming transaction views
     IncomingListView,
@@ -44,6 +52,25 @@ from .inventory_views import (
     OutgoingCreateView,
     OutgoingDetailView,
     OutgoingUpdateView,
+    
+    # Stock alert views
+    StockAlertListView,
+    
+    # Reorder recommendation views
+    ReorderRecommendationView,
+    
+    # Location & transfer views
+    LocationListView,
+    LocationCreateView,
+    LocationUpdateView,
+    LocationDetailView,
+    ItemStockUpdateView,
+    StockTransferListView,
+    StockTransferCreateView,
+    
+    # Scan station views
+    ScanStationView,
+    ScanLookupView,
 )
 
 from .production_views import (
@@ -58,8 +85,10 @@ from .directur_views import (
     DirekturDashboardView,
     LaporanListView,
     HistoriAktivitasView,
-    ExportPDFBarangMasukView,
-    ExportPDFBarangKeluarView,
+    ReportExportView,
+    RekonsiliasiStokView,
+    StockAsOfView,
+    AuditLogView,
 )
 
 urlpatterns = [
@@ -68,6 +97,11 @@ urlpatterns = [
     path('login/', UserLoginView.as_view(), name='login'),  # Alternative URL
     path('logout/', UserLogoutView.as_view(), name='user_logout'),
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('dashboard/widgets/<slug:name>/', DashboardWidgetView.as_view(), name='dashboard_widget'),
+    path('dashboard/chart-data/', DashboardChartDataView.as_view(), name='dashboard_chart_data'),
+    path('events/', LiveEventStreamView.as_view(), name='live_events'),
+    path('outbox/', OutboxFeedView.as_view(), name='outbox_feed'),
+    path('outbox/ack/', OutboxAckView.as_view(), name='outbox_ack'),
     
     # User Management URLs
     path('users/', UserListView.as_view(), name='user_list'),
@@ -94,9 +128,12 @@ urlpatterns = [
     # Items (Barang Master) URLs
     path('items/', ItemListView.as_view(), name='item_list'),
     path('items/create/', ItemCreateView.as_view(), name='item_create'),
+    path('items/lookup/', ItemLookupView.as_view(), name='item_lookup'),
     path('items/<int:item_id>/', ItemDetailView.as_view(), name='item_detail'),
     path('items/<int:item_id>/edit/', ItemUpdateView.as_view(), name='item_update'),
     path('items/<int:item_id>/delete/', ItemDeleteView.as_view(), name='item_delete'),
+    path('items/<int:item_id>/kartu-stok/', ItemStockCardView.as_view(), name='item_stock_card'),
+    path('items/<int:item_id>/kartu-stok/csv/', ItemStockCardExportView.as_view(), name='item_stock_card_csv'),
     
     # Incoming Transaction URLs
     path('incoming/', IncomingListView.as_view(), name='incoming_list'),
@@ -110,6 +147,25 @@ urlpatterns = [
     path('outgoing/<int:outgoing_id>/', OutgoingDetailView.as_view(), name='outgoing_detail'),
     path('outgoing/<int:outgoing_id>/edit/', OutgoingUpdateView.as_view(), name='outgoing_update'),
     
+    # Stock Alert URLs (Gudang & Direktur)
+    path('stock-alerts/', StockAlertListView.as_view(), name='stock_alert_list'),
+    
+    # Reorder Recommendation URLs (Pegawai Gudang)
+    path('reorder/', ReorderRecommendationView.as_view(), name='reorder_recommendation_list'),
+    
+    # Location & Stock Transfer URLs (Pegawai Gudang)
+    path('locations/', LocationListView.as_view(), name='location_list'),
+    path('locations/create/', LocationCreateView.as_view(), name='location_create'),
+    path('locations/<int:location_id>/', LocationDetailView.as_view(), name='location_detail'),
+    path('locations/<int:location_id>/edit/', LocationUpdateView.as_view(), name='location_update'),
+    path('locations/stock/<int:item_stock_id>/edit/', ItemStockUpdateView.as_view(), name='item_stock_update'),
+    path('transfers/', StockTransferListView.as_view(), name='stock_transfer_list'),
+    path('transfers/create/', StockTransferCreateView.as_view(), name='stock_transfer_create'),
+    
+    # Scan Station URLs (Pegawai Gudang)
+    path('scan/', ScanStationView.as_view(), name='scan_station'),
+    path('scan/lookup/', ScanLookupView.as_view(), name='scan_lookup'),
+    
     # Request Items URLs (Pegawai Produksi)
     path('produksi/dashboard/', ProduksiDashboardView.as_view(), name='produksi_dashboard'),
     path('requests/', RequestItemListView.as_view(), name='request_list'),
@@ -121,9 +177,13 @@ urlpatterns = [
     path('direktur/dashboard/', DirekturDashboardView.as_view(), name='direktur_dashboard'),
     path('direktur/laporan/', LaporanListView.as_view(), name='direktur_laporan'),
     path('direktur/histori/', HistoriAktivitasView.as_view(), name='direktur_histori'),
+    path('direktur/rekonsiliasi/', RekonsiliasiStokView.as_view(), name='direktur_rekonsiliasi'),
+    path('direktur/audit-log/', AuditLogView.as_view(), name='direktur_audit_log'),
+    path('direktur/stok-per-tanggal/', StockAsOfView.as_view(), name='direktur_stok_as_of'),
     
-    # Direktur PDF Export URLs
-    path('direktur/export-pdf/barang-masuk/', ExportPDFBarangMasukView.as_view(), name='export_pdf_barang_masuk'),
-    path('direktur/export-pdf/barang-keluar/', ExportPDFBarangKeluarView.as_view(), name='export_pdf_barang_keluar'),
+    # Direktur Export URLs (PDF/CSV)
+    path('direktur/laporan/<slug:slug>/export/<str:fmt>/', ReportExportView.as_view(), name='direktur_laporan_export'),
+    path('direktur/export-pdf/barang-masuk/', ReportExportView.as_view(), {'slug': 'masuk', 'fmt': 'pdf'}, name='export_pdf_barang_masuk'),
+    path('direktur/export-pdf/barang-keluar/', ReportExportView.as_view(), {'slug': 'keluar', 'fmt': 'pdf'}, name='export_pdf_barang_keluar'),
 ]
 
@@ -4,172 +4,268 @@ from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
 from django.views import View
-from django.db.models import Sum, Count, Q, F
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from django.db.models import Q, Case, When, IntegerField
+from django.db.models.functions import Lower
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import User, Items, IncomingTransaction, OutgoingTransaction, RequestItems
+import json
+from .models import User, Items, OutboxEntry
 from .forms import UserForm, UserUpdateForm, ResetPasswordForm
-from .mixins import AdminOnlyMixin as AdminRequiredMixin
+from .mixins import AdminOnlyMixin as AdminRequiredMixin, ActiveUserRequiredMixin
+from .charts import ChartParameterError, cached_transaction_series
+from .widgets import item_lookup_data
+from .live_events import event_stream, latest_event_id, polling_body
+from . import outbox
+from .dashboard import DASHBOARD_WIDGETS, widgets_for_role
 
 # Create your views here.
-class DashboardView(View):    
+class DashboardView(View):
+    """
+    Kerangka dashboard: hanya placeholder widget yang boleh dilihat role user.
+    Isi widget dimuat browser dari DashboardWidgetView (lihat inventory/dashboard.py).
+    """
+    
     def get(self, request):
         user_id = request.session.get('user_id')
         
         if not user_id:
             return redirect('user_login')
         
+        user = User.objects.filter(user_id=user_id).first()
+        if user is None:
+            messages.error(request, 'User tidak ditemukan.')
+            return redirect('user_login')
+        
+        if not user.is_active:
+            messages.error(request, 'Akun Anda tidak aktif. Silakan hubungi administrator.')
+            return redirect('user_login')
+        
+        context = {
+            'user': user,
+            'role_display': user.get_role_display(),
+            'widgets': widgets_for_role(user.role),
+        }
+        
+        return render(request, 'inventory/director/dashboard.html', context)
+        
+
+class DashboardWidgetView(ActiveUserRequiredMixin, View):
+    """HTML fragmen satu widget dashboard; hanya untuk role yang diizinkan widget tersebut"""
+    
+    def test_func(self):
+        self.user = User.objects.filter(user_id=self.request.session.get('user_id'), is_active=True).first()
+        return self.user is not None
+    
+    def get(self, request, name):
+        widget = DASHBOARD_WIDGETS.get(name)
+        if widget is None:
+            raise Http404('Widget tidak ditemukan.')
+        if self.user.role not in widget.roles:
+            return HttpResponseForbidden('Widget ini tidak tersedia untuk role Anda.')
+        return HttpResponse(widget.render(self.user))
+    
+    def handle_no_permission(self):
+        return HttpResponseForbidden('Silakan login terlebih dahulu.')
+
+
+class DashboardChartDataView(ActiveUserRequiredMixin, View):
+    """
+    JSON time-series barang masuk/keluar untuk grafik dashboard.
+
+    Query params:
+    - start, end: tanggal (YYYY-MM-DD), default 7 hari terakhir
+    - granularity: day | week | month (default day)
+    - item, category, supplier: filter opsional (ID)
+    
+    Hanya untuk role yang melihat widget grafik transaksi.
+    """
+    
+    def test_func(self):
+        user = User.objects.filter(user_id=self.request.session.get('user_id'), is_active=True).first()
+        return user is not None and user.role in DASHBOARD_WIDGETS['transactions'].roles
+    
+    def get(self, request):
+        today = timezone.localdate()
+        
         try:
-            user = User.objects.get(user_id=user_id)
-            
-            if not user.is_active:
-                messages.error(request, 'Akun Anda tidak aktif. Silakan hubungi administrator.')
-                return redirect('user_login')
-            
-            # Get current month range
-            now = timezone.now()
-            start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            
-            # Total Stok Barang
-            items_aggregate = Items.objects.filter(is_active=True).aggregate(
-                total_items=Count('items_id'),
-                total_stock=Sum('current_stock')
+            end = self._parse_date(request.GET.get('end'), today)
+            start = self._parse_date(request.GET.get('start'), end - timedelta(days=6))
+            series = cached_transaction_series(
+                start,
+                end,
+                granularity=request.GET.get('granularity', 'day'),
+                item_id=self._parse_id(request.GET.get('item')),
+                category_id=self._parse_id(request.GET.get('category')),
+                supplier_id=self._parse_id(request.GET.get('supplier')),
             )
-            
-            # Get all active items for status categorization
-            all_items = Items.objects.filter(is_active=True)
-            
-            # Categorize items by stock status
-            in_stock_items = []
-            low_stock_items = []
-            out_of_stock_items = []
-            
-            for item in all_items:
-                if item.stock_status == 'out_of_stock':
-                    out_of_stock_items.append(item)
-                elif item.stock_status == 'low_stock':
-                    low_stock_items.append(item)
-                else:  # in_stock
-                    in_stock_items.append(item)
-            
-            # Sort and limit low stock items for display
-            low_stock_items_display = sorted(low_stock_items, key=lambda x: x.current_stock)[:10]
-            
-            # Debug: Print stock counts
-            print(f"DEBUG - Stock Status Counts:")
-            print(f"  In Stock: {len(in_stock_items)}")
-            print(f"  Low Stock: {len(low_stock_items)}")
-            print(f"  Out of Stock: {len(out_of_stock_items)}")
-            print(f"  Total Items: {len(all_items)}")
-            
-            # Barang Masuk (bulan ini)
-            incoming_this_month = IncomingTransaction.objects.filter(
-                transaction_date__gte=start_of_month
-            ).aggregate(
-                total_transactions=Count('incoming_id'),
-                total_quantity=Sum('quantity')
-            )
-            
-            # Barang Keluar (bulan ini)
-            outgoing_this_month = OutgoingTransaction.objects.filter(
-                transaction_date__gte=start_of_month
-            ).aggregate(
-                total_transactions=Count('outgoing_id'),
-                total_quantity=Sum('quantity')
-            )
-            
-            # Permintaan Produksi (statistics)
-            request_stats = RequestItems.objects.aggregate(
-                total_requests=Count('request_id'),
-                pending_count=Count('request_id', filter=Q(status='pending')),
-                approved_count=Count('request_id', filter=Q(status='approved')),
-                rejected_count=Count('request_id', filter=Q(status='rejected')),
-                completed_count=Count('request_id', filter=Q(status='completed'))
+        except (ValueError, ChartParameterError) as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        return JsonResponse(series)
+    
+    def handle_no_permission(self):
+        return JsonResponse({'error': 'Silakan login terlebih dahulu.'}, status=403)
+    
+    @staticmethod
+    def _parse_date(value, default):
+        if not value:
+            return default
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError(f'Format tanggal tidak valid: {value} (gunakan YYYY-MM-DD).')
+    
+    @staticmethod
+    def _parse_id(value):
+        if not value:
+            return None
+        if not value.isdigit():
+            raise ValueError(f'ID filter tidak valid: {value}')
+        return int(value)
+
+
+def _prefix_match(field, prefix):
+    """Filter prefix yang bisa memakai index btree pada `field`"""
+    return Q(**{
+        f'{field}__gte': prefix,
+        f'{field}__lt': prefix + '\U0010ffff',
+        f'{field}__startswith': prefix,
+    })
+
+
+class ItemLookupView(ActiveUserRequiredMixin, View):
+    """
+    JSON autocomplete barang aktif: prefix kode atau nama, maksimal `limit` hasil.
+    Kecocokan kode persis diurutkan paling atas, lalu prefix kode, lalu prefix nama.
+    """
+    default_limit = 10
+    max_limit = 50
+    
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+        if not query:
+            return JsonResponse({'results': []})
+        
+        limit = request.GET.get('limit', '')
+        limit = min(int(limit), self.max_limit) if limit.isdigit() and int(limit) > 0 else self.default_limit
+        
+        # Dicocokkan pada LOWER(kolom) dengan rentang [prefix, prefix + karakter tertinggi) agar
+        # index ekspresi items_*_lower_idx terpakai (LIKE/ILIKE tidak memakai btree biasa);
+        # startswith memastikan kecocokan prefix persis
+        prefix = query.lower()
+        items = Items.objects.filter(is_active=True).annotate(
+            code_lower=Lower('code'), name_lower=Lower('name'),
+        ).filter(
+            _prefix_match('code_lower', prefix) | _prefix_match('name_lower', prefix)
+        ).annotate(
+            match_rank=Case(
+                When(code_lower=prefix, then=0),
+                When(code_lower__startswith=prefix, then=1),
+                default=2,
+                output_field=IntegerField(),
             )
-            
-            # Recent requests (last 10)
-            recent_requests = RequestItems.objects.select_related(
-                'item', 'requested_by', 'approved_by'
-            ).order_by('-request_date')[:10]
-            
-            # Chart data - Transaksi 7 hari terakhir
-            last_7_days = []
-            incoming_7days = []
-            outgoing_7days = []
-            
-            for i in range(6, -1, -1):
-                day = now - timedelta(days=i)
-                # Gunakan filter equality ke DateField + status agar tidak menghitung pending/cancelled
-                target_date = day.date()
-                last_7_days.append(day.strftime('%d/%m'))
-
-                incoming_count = IncomingTransaction.objects.filter(
-                    transaction_date=target_date,
-                    status='received'
-                ).aggregate(total=Sum('quantity'))['total'] or 0
-
-                outgoing_count = OutgoingTransaction.objects.filter(
-                    transaction_date=target_date,
-                    status='released'
-                ).aggregate(total=Sum('quantity'))['total'] or 0
-
-                incoming_7days.append(incoming_count)
-                outgoing_7days.append(outgoing_count)
-            
-            # Build context with all data
-            context = {
-                'user': user,
-                'role_display': user.get_role_display(),
-                
-                # Summary cards
-                'total_items': items_aggregate['total_items'] or 0,
-                'total_stock': items_aggregate['total_stock'] or 0,
-                
-                # Stock status statistics
-                'in_stock_count': len(in_stock_items),
-                'low_stock_count': len(low_stock_items),
-                'out_of_stock_count': len(out_of_stock_items),
-                
-                # Stock status items
-                'in_stock_items': in_stock_items[:10],  # Top 10
-                'low_stock_items': low_stock_items_display,
-                'out_of_stock_items': out_of_stock_items[:10],  # Top 10
-                
-                # Transactions this month
-                'incoming_transactions': incoming_this_month['total_transactions'] or 0,
-                'incoming_quantity': incoming_this_month['total_quantity'] or 0,
-                'outgoing_transactions': outgoing_this_month['total_transactions'] or 0,
-                'outgoing_quantity': outgoing_this_month['total_quantity'] or 0,
-                
-                # Request statistics
-                'total_requests': request_stats['total_requests'] or 0,
-                'pending_requests': request_stats['pending_count'] or 0,
-                'approved_requests': request_stats['approved_count'] or 0,
-                'rejected_requests': request_stats['rejected_count'] or 0,
-                'completed_requests': request_stats['completed_count'] or 0,
-                
-                # Lists
-                'recent_requests': recent_requests,
-                
-                # Chart data
-                'chart_labels': last_7_days,
-                'chart_incoming': incoming_7days,
-                'chart_outgoing': outgoing_7days,
-            }
-            
-            # Debug: Print context data for chart
-            print(f"DEBUG - Context Data:")
-            print(f"  chart_labels: {context['chart_labels']}")
-            print(f"  chart_incoming: {context['chart_incoming']}")
-            print(f"  chart_outgoing: {context['chart_outgoing']}")
-            print(f"  Stock counts in context: In={context['in_stock_count']}, Low={context['low_stock_count']}, Out={context['out_of_stock_count']}")
-            
-            return render(request, 'inventory/director/dashboard.html', context)
-            
-        except User.DoesNotExist:
-            messages.error(request, 'User tidak ditemukan.')
-            return redirect('user_login')
+        ).order_by('match_rank', 'name')[:limit]
+        
+        return JsonResponse({'results': [item_lookup_data(item) for item in items]})
+    
+    def handle_no_permission(self):
+        return JsonResponse({'error': 'Silakan login terlebih dahulu.'}, status=403)
+
+
+class LiveEventStreamView(View):
+    """
+    Stream Server-Sent Events (perubahan stok & permintaan) untuk user aktif.
+    Di ASGI koneksi dibiarkan terbuka; di WSGI respons hanya berisi event
+    tertunda lalu ditutup, dan browser menyambung ulang (polling) sesuai `retry`.
+    """
+    
+    async def get(self, request):
+        # View async: cek session tanpa mixin (test_func mixin bersifat sync)
+        user_id = await request.session.aget('user_id')
+        if not user_id or not await User.objects.filter(user_id=user_id, is_active=True).aexists():
+            return JsonResponse({'error': 'Silakan login terlebih dahulu.'}, status=403)
         
+        last_id = request.headers.get('Last-Event-ID', '')
+        if last_id.isdigit():
+            last_id = int(last_id)
+        else:
+            last_id = await sync_to_async(latest_event_id)()
+        
+        if isinstance(request, ASGIRequest):
+            response = StreamingHttpResponse(event_stream(last_id), content_type='text/event-stream')
+        else:
+            response = HttpResponse(await sync_to_async(polling_body)(last_id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class OutboxJsonMixin(AdminRequiredMixin):
+    """Endpoint change feed untuk integrasi: hanya admin, error sebagai JSON"""
+    
+    def handle_no_permission(self):
+        return JsonResponse({'error': 'Hanya Admin yang diizinkan.'}, status=403)
+
+
+class OutboxFeedView(OutboxJsonMixin, View):
+    """
+    Change feed outbox berurutan setelah cursor.
+    `?consumer=nama` melanjutkan dari checkpoint konsumen; `?after=id` untuk cursor sendiri.
+    Cursor di respons dipakai sebagai `after` berikutnya dan dikonfirmasi lewat outbox_ack
+    (konsumen baru terdaftar saat acknowledge pertama, bukan saat membaca).
+    """
+    
+    def get(self, request):
+        after = request.GET.get('after', '')
+        limit = request.GET.get('limit', '')
+        topics = request.GET.getlist('topic')
+        valid_topics = {value for value, _ in OutboxEntry.TOPIC_CHOICES}
+        if (after and not after.isdigit()) or (limit and not limit.isdigit()):
+            return JsonResponse({'error': 'after dan limit harus bilangan bulat.'}, status=400)
+        if set(topics) - valid_topics:
+            return JsonResponse({'error': f'Topik tidak dikenal. Pilihan: {", ".join(sorted(valid_topics))}.'}, status=400)
+        
+        consumer = request.GET.get('consumer', '').strip()
+        if len(consumer) > 100:
+            return JsonResponse({'error': 'consumer maks. 100 karakter.'}, status=400)
+        if after:
+            after = int(after)
+        elif consumer:
+            after = outbox.consumer_position(consumer)
+        else:
+            return JsonResponse({'error': 'Isi consumer atau after.'}, status=400)
+        
+        entries, cursor, has_more = outbox.fetch(after, int(limit) if limit else 100, topics)
+        return JsonResponse({
+            'entries': [outbox.serialize(entry) for entry in entries],
+            'cursor': cursor,
+            'has_more': has_more,
+        })
+
+
+class OutboxAckView(OutboxJsonMixin, View):
+    """Konfirmasi batch: simpan cursor terakhir yang sudah diproses konsumen (JSON atau form)"""
+    
+    def post(self, request):
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body)
+            except ValueError:
+                return JsonResponse({'error': 'Body JSON tidak valid.'}, status=400)
+        else:
+            data = request.POST
+        consumer = str(data.get('consumer') or '').strip()
+        cursor = str(data.get('cursor') or '')
+        if not consumer or len(consumer) > 100 or not cursor.isdigit():
+            return JsonResponse({'error': 'consumer (maks. 100 karakter) dan cursor wajib diisi.'}, status=400)
+        
+        position = outbox.acknowledge(consumer, int(cursor))
+        return JsonResponse({'consumer': consumer, 'position': position})
+
+
 # User List View
 class UserListView(AdminRequiredMixin, ListView):
     """Display list of all users"""
@@ -0,0 +1,63 @@
+"""
+Widget form khusus.
+
+ItemLookupWidget menggantikan <select> berisi seluruh katalog barang dengan
+input autocomplete ke endpoint `item_lookup`. Halaman form hanya memuat barang
+yang sedang terpilih (satu query pk), sehingga ukurannya tidak tumbuh
+mengikuti jumlah barang.
+"""
+import json
+
+from django import forms
+from django.urls import reverse
+
+from .models import Items
+
+
+class ItemLookupWidget(forms.Widget):
+    """Input autocomplete barang; nilai yang dikirim tetap items_id"""
+    template_name = 'inventory/widgets/item_lookup.html'
+
+    class Media:
+        js = ('inventory/js/item_lookup.js',)
+
+    def __init__(self, attrs=None, limit=10):
+        super().__init__(attrs)
+        self.limit = limit
+
+    def format_value(self, value):
+        if value in (None, ''):
+            return ''
+        return str(value)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['lookup_url'] = reverse('item_lookup')
+        context['widget']['limit'] = self.limit
+        selected = self.selected_item(context['widget']['value'])
+        context['widget']['selected'] = selected
+        context['widget']['selected_json'] = json.dumps(selected) if selected else ''
+        return context
+
+    @staticmethod
+    def selected_item(value):
+        """Data barang terpilih untuk render awal (satu query pk)"""
+        if not value or not str(value).isdigit():
+            return None
+        item = Items.objects.filter(pk=value).first()
+        return item_lookup_data(item) if item else None
+
+
+def item_lookup_data(item):
+    """Representasi JSON barang untuk autocomplete"""
+    return {
+        'id': item.items_id,
+        'code': item.code,
+        'name': item.name,
+        'label': f'{item.code} - {item.name}',
+        'unit': item.unit,
+        'unit_display': item.get_unit_display(),
+        'current_stock': item.current_stock,
+        'minimum_stock': item.minimum_stock,
+        'stock_status': item.stock_status,
+    }
@@ -52,6 +52,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'inventory.audit.audit_middleware',
 ]
 
 ROOT_URLCONF = 'simigd.urls'
@@ -60,12 +61,20 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Template di-compile sekali per proses. Saat DEBUG, autoreloader
+            # mengosongkan cache ini setiap ada file template yang berubah.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'inventory.context_processors.stock_alerts',
             ],
         },
     },
@@ -128,4 +137,39 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Crispy Forms Configuration
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
-CRISPY_TEMPLATE_PACK = "bootstrap5"
\ No newline at end of file
+CRISPY_TEMPLATE_PACK = "bootstrap5"
+
+# Inventory data retention
+INVENTORY_ARCHIVE_AFTER_DAYS = 730          # transaksi lebih tua dari ini dipindah ke tabel arsip
+INVENTORY_PURGE_RETIRED_AFTER_DAYS = 30     # masa tenggang sebelum barang yang dihapus dibersihkan permanen
+
+# Live update (Server-Sent Events)
+INVENTORY_LIVE_EVENTS_POLL_SECONDS = 5          # interval polling DB untuk event dari worker lain
+INVENTORY_LIVE_EVENTS_STREAM_SECONDS = 300      # lama satu koneksi SSE sebelum browser menyambung ulang
+INVENTORY_LIVE_EVENTS_RETENTION_HOURS = 24      # event lebih tua dari ini dihapus
+INVENTORY_LIVE_EVENTS_GAP_WAIT_SECONDS = 10     # celah id event lebih baru dari ini dianggap transaksi yang belum commit
+
+# Export PDF
+INVENTORY_PDF_WORKERS = None                    # jumlah proses render PDF paralel (None = jumlah core CPU)
+INVENTORY_PDF_PARALLEL_MIN_ROWS = 5000          # di bawah jumlah baris ini PDF dirender satu proses
+INVENTORY_REPORT_CACHE_MAX_ROWS = 20000         # hasil laporan lebih besar dari ini tidak di-cache
+
+# Scan station
+INVENTORY_SCAN_BATCH_MAX_LINES = 500            # maksimal baris scan per batch yang dikirim sekaligus
+
+# Idempotency key (kirim ulang form/batch tanpa data ganda)
+INVENTORY_IDEMPOTENCY_KEY_TTL_HOURS = 24       # kiriman ulang setelah ini dieksekusi sebagai kiriman baru
+
+# Export analitik (Parquet)
+INVENTORY_ANALYTICS_EXPORT_DIR = BASE_DIR / 'analytics'   # tujuan default command export_parquet
+
+# Outbox (change feed untuk integrasi)
+INVENTORY_OUTBOX_GAP_WAIT_SECONDS = 10          # celah id lebih baru dari ini dianggap transaksi yang belum commit; harus > durasi transaksi penulis terlama
+INVENTORY_OUTBOX_RETENTION_DAYS = 30            # entri lebih tua dari ini dihapus walau belum dibaca semua konsumen
+
+# Analitik ABC & perputaran stok
+INVENTORY_ANALYTICS_WINDOWS = [30, 90, 365]     # window analitik (hari); histori harian disimpan sepanjang window terpanjang
+INVENTORY_ABC_THRESHOLDS = (0.8, 0.95)          # batas porsi kumulatif pemakaian kelas A dan B
+
+# Lot/batch (FEFO)
+INVENTORY_LOT_EXPIRY_WARNING_DAYS = 30          # default jangkauan laporan lot yang segera kedaluwarsa (hari)